@@ -0,0 +1,648 @@
+"""Throughput benchmarks for the METAR decoders.
+
+Each benchmark decodes every report in a NOAA PORT text file, e.g. a full
+hour of METARs, and prints reports per second for each code path::
+
+    python benchmark.py fastpath /data/noaaport/20190612_0000.txt
+"""
+import time
+
+from metar_file_parse import read_metars
+
+
+def timed(func, reports, repeat=3):
+    """Return the best wall time, in seconds, of func over all reports."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(reports)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def report(name, reports, seconds, baseline=None):
+    line = '{0:<24}{1:>10.0f} reports/s'.format(name, len(reports) / seconds)
+    if baseline is not None:
+        line += '{0:>8.1f}x'.format(baseline / seconds)
+    print(line)
+
+
+def bench_fastpath(reports):
+    """Canopy parser alone against the regular expression fast path."""
+    from metar_decode import parse, ParseError
+    from metar_fastpath import decode, DecodeStats
+
+    def run(decoder):
+        def decode_all(reports):
+            for metar in reports:
+                try:
+                    decoder(metar)
+                except ParseError:
+                    pass
+        return decode_all
+
+    baseline = timed(run(parse), reports)
+    report('metar_decode.parse', reports, baseline)
+    report('metar_fastpath.decode', reports, timed(run(decode), reports), baseline)
+
+    stats = DecodeStats()
+    run(lambda metar: decode(metar, stats))(reports)
+    print(stats)
+
+
+def bench_reuse(reports):
+    """A new Parser per report against one Parser reset for every report."""
+    from metar_decode import parse, parse_many, ParseError
+
+    def parse_each(reports):
+        for metar in reports:
+            try:
+                parse(metar)
+            except ParseError:
+                pass
+
+    def parse_all(reports):
+        for _ in parse_many(reports):
+            pass
+
+    baseline = timed(parse_each, reports)
+    report('metar_decode.parse', reports, baseline)
+    report('metar_decode.parse_many', reports, timed(parse_all, reports), baseline)
+
+
+def bench_spans(reports):
+    """Fast-path parse trees against fast-path span vectors."""
+    from metar_decode import ParseError
+    from metar_fastpath import decode, decode_spans
+
+    def run(decoder):
+        def decode_all(reports):
+            for metar in reports:
+                try:
+                    decoder(metar)
+                except ParseError:
+                    pass
+        return decode_all
+
+    baseline = timed(run(decode), reports)
+    report('metar_fastpath.decode', reports, baseline)
+    report('decode_spans', reports, timed(run(decode_spans), reports), baseline)
+
+
+def bench_memo(reports):
+    """Full packrat memoization against memo tables only for backtracking rules."""
+    from metar_decode import parse_many, Parser
+
+    def parse_all(memoize):
+        def run(reports):
+            for _ in parse_many(reports, memoize=memoize):
+                pass
+        return run
+
+    def entries(memoize):
+        # Memo entries left after each parse, which is what memoize=False saves
+        parser, total = Parser('', None, None, memoize), 0
+        for metar in reports:
+            parser.reset(metar)
+            parser.try_parse()
+            total += sum(len(memo) for memo in parser._cache.values())
+        return total / len(reports)
+
+    baseline = timed(parse_all(True), reports)
+    report('memoize=True', reports, baseline)
+    report('memoize=False', reports, timed(parse_all(False), reports), baseline)
+    for memoize in (True, False):
+        print('{0:<24}{1:>10.1f} memo entries/report'.format('memoize={0}'.format(memoize),
+                                                             entries(memoize)))
+
+
+def bench_generated(reports):
+    """Canopy's parser against the one generate_parser.py compiles from the same grammar."""
+    import metar_decode
+    import metar_decode_opt
+
+    def parse_all(module):
+        def run(reports):
+            for _ in module.parse_many(reports):
+                pass
+        return run
+
+    baseline = timed(parse_all(metar_decode), reports)
+    report('metar_decode', reports, baseline)
+    report('metar_decode_opt', reports, timed(parse_all(metar_decode_opt), reports), baseline)
+
+
+def bench_dedupe(reports):
+    """Decoding every report against dropping repeats by their header first."""
+    from metar_fastpath import decode_many, latest_reports
+
+    def decode_all(reports):
+        for _ in decode_many(reports):
+            pass
+
+    baseline = timed(decode_all, reports)
+    report('decode_many', reports, baseline)
+    report('latest_reports first', reports,
+           timed(lambda reports: decode_all(latest_reports(reports)), reports), baseline)
+    print('{0} of {1} reports kept'.format(len(latest_reports(reports)), len(reports)))
+
+
+def bench_fields(reports):
+    """Decoding every group against decoding only the groups a typical caller needs."""
+    from metar_fastpath import decode_many
+
+    def decode_all(fields):
+        def run(reports):
+            for _ in decode_many(reports, fields=fields):
+                pass
+        return run
+
+    baseline = timed(decode_all(None), reports)
+    report('all groups', reports, baseline)
+    for fields in (['wind', 'temp_dewp'], ['altim'], ['siteid', 'datetime']):
+        report('+'.join(fields), reports, timed(decode_all(fields), reports), baseline)
+
+
+def bench_failures(reports):
+    """Raising and catching ParseError against ParseFailure records, for each parser."""
+    import metar_decode
+    import metar_decode_opt
+
+    for module in (metar_decode, metar_decode_opt):
+        def parse_each(reports):
+            parser = module.Parser('', None, None)
+            for metar in reports:
+                parser.reset(metar)
+                try:
+                    parser.parse()
+                except module.ParseError:
+                    pass
+
+        def try_each(reports):
+            parser = module.Parser('', None, None)
+            for metar in reports:
+                parser.reset(metar)
+                parser.try_parse()
+
+        baseline = timed(parse_each, reports)
+        report(module.__name__ + ' raise', reports, baseline)
+        report(module.__name__ + ' record', reports, timed(try_each, reports), baseline)
+    failed = sum(1 for tree in metar_decode_opt.parse_many(reports) if tree is None)
+    print('{0} of {1} reports failed'.format(failed, len(reports)))
+
+
+def bench_categorical(reports):
+    """Object columns of strings against Categorical columns of the same codes.
+
+    The reports are repeated to stand in for a frame of several days.
+    """
+    import numpy as np
+    import pandas as pd
+    from metar_parse import parse_metars_to_columns
+
+    metars = parse_metars_to_columns(reports * 3, {}, 2019, 5)
+
+    def frame(categorical):
+        columns = {}
+        for name, column in metars.columns.items():
+            if name in metars.categories:
+                column = pd.Categorical.from_codes(column, metars.categories[name])
+                if not categorical:
+                    column = np.asarray(column, dtype=object)
+            columns[name] = column
+        return pd.DataFrame(columns)
+
+    frames = (('object', frame(False)), ('Categorical', frame(True)))
+    baseline = None
+    for name, df in frames:
+        def group(reports):
+            df.groupby('station_id', observed=True)['temperature'].mean()
+            df.groupby(['skyc1', 'current_wx1'], observed=True).size()
+        seconds = timed(group, metars.failed)
+        report(name + ' groupby', metars.failed, seconds, baseline)
+        baseline = baseline or seconds
+    for name, df in frames:
+        print('{0:<24}{1:>10.1f} MB'.format(name, df.memory_usage(deep=True).sum() / 1e6))
+
+
+def bench_cache(reports):
+    """Decoding every report against looking repeated report text up in a ParseCache."""
+    from metar_decode import parse, ParseCache, ParseError
+    from metar_parse import parse_metar_to_named_tuple
+
+    def run(decoder, maxsize):
+        def decode_all(reports):
+            cache = None if maxsize is None else ParseCache(maxsize)
+            for metar in reports:
+                try:
+                    decoder(metar, cache)
+                except (ParseError, ValueError):
+                    pass
+        return decode_all
+
+    def to_named_tuple(metar, cache):
+        return parse_metar_to_named_tuple(metar, {}, 2019, 6, cache=cache)
+
+    def parse_cached(metar, cache):
+        return parse(metar, memoize=False, cache=cache)
+
+    for name, decoder, maxsize in (('metar_decode.parse', parse_cached, 1024),
+                                   ('named tuple', to_named_tuple, 65536)):
+        baseline = timed(run(decoder, None), reports)
+        report(name, reports, baseline)
+        report(name + ' cached', reports, timed(run(decoder, maxsize), reports), baseline)
+
+    cache = ParseCache(65536)
+    for metar in reports:
+        try:
+            to_named_tuple(metar, cache)
+        except (ParseError, ValueError):
+            pass
+    print(cache)
+
+
+def bench_profile(reports):
+    """Parsing without a RuleProfile against counting, and timing, every rule call."""
+    from metar_decode import parse_many, RuleProfile
+
+    def parse_all(timed):
+        def run(reports):
+            profile = None if timed is None else RuleProfile(timed)
+            for _ in parse_many(reports, memoize=False, profile=profile):
+                pass
+        return run
+
+    baseline = timed(parse_all(None), reports)
+    report('no profile', reports, baseline)
+    report('counted', reports, timed(parse_all(False), reports), baseline)
+    report('counted and timed', reports, timed(parse_all(True), reports), baseline)
+
+    profile = RuleProfile(timed=True)
+    for _ in parse_many(reports, memoize=False, profile=profile):
+        pass
+    print(profile.report())
+
+
+def bench_columns(reports):
+    """Named tuples appended to a list per field against the columnar batch decoder."""
+    import tracemalloc
+    from metar_decode import ParseError
+    from metar_parse import Metar, parse_metar_to_named_tuple, parse_metars_to_columns
+
+    def to_lists(reports):
+        lists = dict((name, []) for name in Metar._fields)
+        for metar in reports:
+            try:
+                metar = parse_metar_to_named_tuple(metar, {}, 2019, 5)
+            except (ParseError, ValueError):
+                continue
+            for name, value in zip(Metar._fields, metar):
+                lists[name].append(value)
+        return lists
+
+    def to_columns(reports):
+        return parse_metars_to_columns(reports, {}, 2019, 5)
+
+    baseline = timed(to_lists, reports)
+    report('named tuples', reports, baseline)
+    report('parse_metars_to_columns', reports, timed(to_columns, reports), baseline)
+
+    for name, decoder in (('named tuples', to_lists), ('parse_metars_to_columns', to_columns)):
+        tracemalloc.start()
+        decoder(reports)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print('{0:<24}{1:>10.1f} MB peak'.format(name, peak / 1e6))
+
+
+def bench_altimeter(reports):
+    """A pint Quantity per QNH altimeter setting against one conversion constant.
+
+    Only the reports with a Q group are timed, as from an hour of mostly
+    international stations.
+    """
+    import re
+    from metar_decode import ParseError
+    from metar_parse import parse_metar_to_named_tuple, INHG_PER_HPA
+    from metpy.units import units
+
+    qnh = [metar for metar in reports if re.search(r' Q\d{4}', metar)]
+    settings = [float(match.group(1)) for match in
+                (re.search(r' Q(\d{4})', metar) for metar in qnh)]
+
+    def with_pint(settings):
+        for value in settings:
+            (int(value) * units.hPa).to('inHg').magnitude
+
+    def with_constant(settings):
+        for value in settings:
+            int(value) * INHG_PER_HPA
+
+    def to_named_tuples(reports):
+        for metar in reports:
+            try:
+                parse_metar_to_named_tuple(metar, {}, 2019, 5)
+            except (ParseError, ValueError):
+                pass
+
+    print('{0} of {1} reports have a Q group'.format(len(qnh), len(reports)))
+    pint = timed(with_pint, settings)
+    report('pint per value', settings, pint)
+    constant = timed(with_constant, settings)
+    report('INHG_PER_HPA', settings, constant, pint)
+    print('{0:.0f} ms of conversions avoided over {1} reports'.format((pint - constant) * 1000,
+                                                                   len(qnh)))
+    report('named tuples', qnh, timed(to_named_tuples, qnh))
+
+
+def bench_shared(reports):
+    """Pickling a list of Metar named tuples against records in shared memory.
+
+    Times the handoff alone, from the decoded batch in a worker to values the
+    parent can use, and the bytes that go through the pipe either way.
+    """
+    import pickle
+    from metar_decode import ParseError
+    from metar_parse import (parse_metar_to_named_tuple, parse_metars_to_columns, share_metars,
+                             attach_metars)
+
+    metars = []
+    for metar in reports:
+        try:
+            metars.append(parse_metar_to_named_tuple(metar, {}, 2019, 5))
+        except (ParseError, ValueError):
+            pass
+    columns = parse_metars_to_columns(reports, {}, 2019, 5)
+
+    def pickled(reports):
+        pickle.loads(pickle.dumps(metars, pickle.HIGHEST_PROTOCOL))
+
+    def shared(reports):
+        handle = pickle.loads(pickle.dumps(share_metars(columns), pickle.HIGHEST_PROTOCOL))
+        records, block = attach_metars(handle)
+        records = records.copy()
+        block.close()
+        block.unlink()
+
+    baseline = timed(pickled, reports)
+    report('pickled named tuples', reports, baseline)
+    report('shared records', reports, timed(shared, reports), baseline)
+
+    handle = share_metars(columns)
+    records, block = attach_metars(handle)
+    for name, handoff in (('pickled named tuples', metars), ('shared records', handle)):
+        print('{0:<24}{1:>10.1f} kB pickled'.format(
+            name, len(pickle.dumps(handoff, pickle.HIGHEST_PROTOCOL)) / 1e3))
+    print('{0:<24}{1:>10.1f} kB shared'.format('shared records', records.nbytes / 1e3))
+    del records
+    block.close()
+    block.unlink()
+
+
+def bench_slp(reports):
+    """altimeter_to_slp for each report against sea_level_pressure once over the batch."""
+    import numpy as np
+    from calculations import altimeter_to_slp, sea_level_pressure
+    from metar_parse import parse_metars_to_columns
+    from metpy.units import units
+
+    columns = parse_metars_to_columns(reports, {}, 2019, 5).columns
+    # Spread the stations over a plausible range of elevations
+    elevation = np.linspace(0., 2000., len(reports))
+    rows = list(zip(columns['altimeter'], elevation, columns['temperature']))
+
+    def each(rows):
+        for altim, elev, temp in rows:
+            altimeter_to_slp(altim * units('inHg'), elev * units('meters'), temp * units('degC'))
+
+    def batch(rows):
+        sea_level_pressure(columns['altimeter'], elevation, columns['temperature'])
+
+    baseline = timed(each, rows, repeat=1)
+    report('altimeter_to_slp', rows, baseline)
+    report('sea_level_pressure', rows, timed(batch, rows), baseline)
+
+
+def bench_stations(reports):
+    """Reading the station tables for every call against the process-wide cache."""
+    import process_stations
+
+    def load(reports):
+        process_stations.clear_station_cache()
+        process_stations.station_dict()
+
+    baseline = timed(load, reports)
+    print('{0:<24}{1:>10.1f} ms'.format('station tables read', baseline * 1000))
+    seconds = timed(lambda reports: process_stations.station_dict(), reports)
+    print('{0:<24}{1:>10.4f} ms{2:>8.0f}x'.format('station tables cached', seconds * 1000,
+                                                  baseline / seconds))
+
+
+def bench_stream(reports):
+    """A list of every named tuple against iter_metars, one at a time and in batches."""
+    import tracemalloc
+    from metar_decode import ParseError
+    from metar_file_parse import iter_metars
+    from metar_parse import parse_metar_to_named_tuple, weather_symbols
+
+    def to_list(reports):
+        metars = []
+        for metar in reports:
+            try:
+                metars.append(parse_metar_to_named_tuple(metar, {}, 2019, 5))
+            except (ParseError, ValueError):
+                pass
+        return metars
+
+    def stream(batch_size):
+        def run(reports):
+            for _ in iter_metars(reports, {}, 2019, 5, batch_size=batch_size):
+                pass
+        return run
+
+    runs = (('list of named tuples', to_list), ('iter_metars', stream(None)),
+            ('iter_metars, 1000', stream(1000)))
+    baseline = timed(to_list, reports)
+    for name, run in runs:
+        report(name, reports, timed(run, reports), None if run is to_list else baseline)
+
+    # Load the weather table first, so only the decoding is measured
+    weather_symbols()
+    for name, run in runs:
+        tracemalloc.start()
+        run(reports)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print('{0:<24}{1:>10.1f} MB peak'.format(name, peak / 1e6))
+
+
+def bench_lazy(reports):
+    """Named tuples against LazyMetar, routing on the station and time before the rest."""
+    from datetime import datetime
+    from metar_decode import ParseError
+    from metar_fastpath import decode_many
+    from metar_parse import LazyMetar, tree_to_named_tuple
+
+    trees = [tree for tree in decode_many(reports) if tree]
+    since = datetime(2019, 5, 1)
+
+    def routed(metar):
+        return metar.station_id.startswith('KA') and metar.date_time >= since
+
+    def eager(trees):
+        for tree in trees:
+            try:
+                routed(tree_to_named_tuple(tree, {}, 2019, 5))
+            except (ParseError, ValueError):
+                pass
+
+    def lazy(survivors):
+        def run(trees):
+            for tree in trees:
+                metar = LazyMetar(tree, {}, 2019, 5)
+                try:
+                    if routed(metar) and survivors:
+                        metar.to_named_tuple()
+                except (ParseError, ValueError):
+                    pass
+        return run
+
+    kept = 0
+    for tree in trees:
+        try:
+            kept += routed(LazyMetar(tree, {}, 2019, 5))
+        except (ParseError, ValueError):
+            pass
+    print('{0} of {1} parse trees routed on'.format(kept, len(trees)))
+    baseline = timed(eager, trees)
+    report('named tuples', trees, baseline)
+    report('LazyMetar, routing', trees, timed(lazy(False), trees), baseline)
+    report('LazyMetar, survivors', trees, timed(lazy(True), trees), baseline)
+
+
+def bench_times(reports):
+    """A datetime per report against putting the times together in one NumPy pass."""
+    from datetime import datetime
+    import numpy as np
+    from metar_fastpath import decode_many
+    from metar_parse import decode_times, month_times
+
+    times = []
+    for tree in decode_many(reports, fields=['datetime']):
+        if tree and len(tree.datetime.text.strip()) == 7:
+            text = tree.datetime.text.strip()
+            times.append((int(text[0:2]), int(text[2:4]), int(text[4:6])))
+    day, hour, minute = np.array(times).T
+    reference = datetime(2019, 6, 1, 0, 30)
+
+    def each(times):
+        for day, hour, minute in times:
+            try:
+                datetime(2019, 5, day, hour, minute)
+            except ValueError:
+                pass
+
+    baseline = timed(each, times)
+    report('datetime', times, baseline)
+    report('month_times', times, timed(lambda times: month_times(day, hour, minute, 2019, 5),
+                                       times), baseline)
+    report('decode_times', times, timed(lambda times: decode_times(day, hour, minute, reference),
+                                        times), baseline)
+
+
+def bench_weather(reports):
+    """A caught KeyError per unknown weather slot against the weather symbol table."""
+    import numpy as np
+    from metpy.plots.wx_symbols import wx_code_map
+    from metar_fastpath import decode_many
+    from metar_parse import parse_metars_to_columns, weather_symbol, weather_to_symbols
+
+    slots = []
+    for tree in decode_many(reports, fields=['curwx']):
+        if tree and tree.curwx.text:
+            wx = [np.nan, np.nan, np.nan]
+            wx[0:len(tree.curwx.text.split())] = tree.curwx.text.split()
+            slots.append(wx[:3])
+
+    def caught(slots):
+        for wx in slots:
+            for i in range(3):
+                try:
+                    int(wx_code_map[wx[i]])
+                except:
+                    np.nan
+
+    def looked_up(slots):
+        for wx in slots:
+            for i in range(3):
+                weather_symbol(wx[i])
+
+    metars = parse_metars_to_columns(reports, {}, 2019, 5, fields=['curwx'])
+
+    def columns(slots):
+        for name in ('current_wx1', 'current_wx2', 'current_wx3'):
+            weather_to_symbols(metars.columns[name], metars.categories[name])
+
+    print('{0} of {1} reports have weather'.format(len(slots), len(reports)))
+    baseline = timed(caught, slots)
+    report('try/except', slots, baseline)
+    report('weather_symbol', slots, timed(looked_up, slots), baseline)
+    report('weather_to_symbols', slots, timed(columns, slots), baseline)
+
+
+# Seconds a fresh interpreter may spend importing the decoders and decoding
+# one report, over and above starting up
+IMPORT_BUDGET = 0.010
+
+
+def bench_import(reports):
+    """Startup cost of a short-lived job: importing the decoders and decoding one report."""
+    import subprocess
+    import sys
+
+    def startup(statement, repeat=5):
+        # The best wall time over fresh interpreters, as timed from inside each
+        code = ('import time; start = time.perf_counter(); {0}; '
+                'print(time.perf_counter() - start)').format(statement)
+        return min(float(subprocess.check_output([sys.executable, '-c', code]))
+                   for _ in range(repeat))
+
+    statements = (('import metar_decode', 'import metar_decode'),
+                  ('import metar_fastpath', 'import metar_fastpath'),
+                  ('bare decode', 'from metar_fastpath import decode; decode({0!r})'.format(reports[0])),
+                  ('import metar_parse', 'import metar_parse'))
+    seconds = {}
+    for name, statement in statements:
+        seconds[name] = startup(statement)
+        print('{0:<24}{1:>10.1f} ms'.format(name, seconds[name] * 1000))
+    loaded = subprocess.check_output([sys.executable, '-c', 'import sys, metar_fastpath; '
+                                      'print(sorted({"numpy", "pandas", "metpy"} & set(sys.modules)))'])
+    print('heavy modules loaded by metar_fastpath: {0}'.format(loaded.decode().strip()))
+    # The verdict is on the bare decode figure printed above, not a new run
+    within = seconds['bare decode'] <= IMPORT_BUDGET
+    print('bare decode {0} the {1:.0f} ms budget'.format('within' if within else 'OVER',
+                                                        IMPORT_BUDGET * 1000))
+
+
+BENCHMARKS = {'altimeter': bench_altimeter, 'cache': bench_cache, 'categorical': bench_categorical,
+              'columns': bench_columns, 'dedupe': bench_dedupe, 'failures': bench_failures,
+              'fastpath': bench_fastpath, 'fields': bench_fields, 'generated': bench_generated,
+              'import': bench_import, 'lazy': bench_lazy, 'memo': bench_memo,
+              'profile': bench_profile, 'reuse': bench_reuse, 'shared': bench_shared,
+              'slp': bench_slp, 'spans': bench_spans, 'stations': bench_stations,
+              'stream': bench_stream, 'times': bench_times, 'weather': bench_weather}
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Time the METAR decoders on a NOAA PORT '
+                                                 'text file.')
+    parser.add_argument('benchmark', choices=sorted(BENCHMARKS), help='Benchmark to run')
+    parser.add_argument('file', type=str, help='NOAA PORT text file of METARs')
+    args = parser.parse_args()
+
+    metars = read_metars(args.file)
+    print('{0} reports from {1}'.format(len(metars), args.file))
+    BENCHMARKS[args.benchmark](metars)
@@ -176,3 +176,53 @@ def altimeter_to_slp(altim, elev, T):
     psl = p * exp(z/H)
 
     return psl
+
+# Constants of altimeter_to_station_pressure and altimeter_to_slp, as plain
+# numbers in hPa, meters, and kelvin, taken from metpy.constants
+HPA_PER_INHG = 33.86388640341
+RD = 287.04749097718457
+G = 9.80665
+LAPSE_RATE = 0.0065
+N = RD * LAPSE_RATE / G
+
+def sea_level_pressure(altim, elev, T):
+    """ Convert whole arrays of altimeter settings to sea level pressure.
+
+    This is altimeter_to_slp for a batch of reports, on plain NumPy arrays
+    rather than values with units, so it converts every row at once.
+
+    Parameters
+    ----------
+    altim : array of float
+            The altimeter settings in inches of mercury (in Hg)
+    elev  : array of float
+            Elevations of the stations in meters
+    T     : array of float
+            Temperatures at the stations in Celsius
+
+    Returns
+    -------
+
+    sea_level_pressure: array of float
+            The sea level pressures in hPa. A row is NaN where any of its
+            inputs is missing or the pressure cannot be reduced, while the
+            other rows are still converted.
+
+    See Also
+    --------
+    altimeter_to_slp
+    """
+    import numpy as np
+
+    altim = np.asarray(altim, dtype=float) * HPA_PER_INHG
+    elev = np.asarray(elev, dtype=float)
+    T = np.asarray(T, dtype=float) + 273.15
+
+    with np.errstate(invalid='ignore', divide='ignore', over='ignore'):
+        #Station pressure, as in altimeter_to_station_pressure
+        p = (altim ** N - ((1013.25 ** N * LAPSE_RATE * elev) / 288)) ** (1/N) + 0.3
+
+        #Reduce to sea level with the scale height at the station temperature
+        psl = p * np.exp(elev / (RD * T / G))
+
+    return psl
@@ -0,0 +1,700 @@
+"""Compile metar_decode.peg into an optimized parser module.
+
+metar_decode.py is the parser Canopy generates from metar_decode.peg. This
+script compiles the same grammar into a module with the same ``parse``,
+``parse_many`` and ``Parser`` API that runs several times faster:
+
+* sequences are flattened into straight-line code instead of nested
+  ``if address is not FAILURE`` ladders,
+* each distinct character class is compiled once, and runs of literals and
+  character classes, or repetitions of one, are matched with a single regex,
+* ordered choices between literals dispatch on the next character,
+* only the rules in NODE_RULES build tree nodes; every other rule only
+  advances the offset, and
+* only rules reached from more than one place keep a memo table.
+
+Parse errors carry the same message as metar_decode's: when the error of a
+failed parse is asked for, the report is parsed again, this time recording
+what was expected at the furthest failure. Rerun the script whenever the grammar changes::
+
+    python generate_parser.py metar_decode.peg metar_decode_opt.py
+"""
+import ast
+import re
+import textwrap
+from collections import Counter
+
+# Rules whose nodes metar_parse reads: the start rule, its groups and the
+# wind and temperature fields. Every other rule only advances the offset.
+NODE_RULES = ('ob', 'metar', 'siteid', 'datetime', 'auto', 'wind', 'vis', 'run', 'curwx',
+              'skyc', 'temp_dewp', 'altim', 'remarks', 'end', 'wind_dir', 'wind_spd', 'temp',
+              'dewp')
+
+TOKEN = re.compile(r'''\s*(?:(?P<literal>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')'''
+                   r'''|(?P<cls>\[(?:[^\]\\]|\\.)*\])'''
+                   r'''|(?P<name>[A-Za-z_]\w*)'''
+                   r'''|(?P<op>[/?*+().]))''')
+RULE = re.compile(r'\s*([A-Za-z_]\w*)\s*<-(.*)')
+
+
+def read_grammar(text):
+    """Return the grammar in text as a list of (rule name, expression) pairs.
+
+    Expressions are nested tuples: ('literal', value, description),
+    ('class', source), ('any',), ('ref', rule), ('sequence', items),
+    ('choice', alternatives), and ('optional' | 'star' | 'plus', expression).
+    """
+    rules = []
+    for line in text.splitlines():
+        if not line.strip() or line.lstrip().startswith('#') or line.startswith('grammar '):
+            continue
+        match = RULE.match(line)
+        if match:
+            rules.append([match.group(1), match.group(2)])
+        else:
+            rules[-1][1] += ' ' + line
+    return [(name, _ExpressionReader(source).read()) for name, source in rules]
+
+
+class _ExpressionReader(object):
+    def __init__(self, source):
+        self.tokens = []
+        position = 0
+        while source[position:].strip():
+            match = TOKEN.match(source, position)
+            if not match:
+                raise SyntaxError('Cannot read grammar at: ' + source[position:])
+            self.tokens.append((match.lastgroup, match.group(match.lastgroup)))
+            position = match.end()
+        self.position = 0
+
+    def read(self):
+        expression = self.choice()
+        if self.position != len(self.tokens):
+            raise SyntaxError('Unexpected {0!r} in grammar'.format(self.tokens[self.position][1]))
+        return expression
+
+    def peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else (None, None)
+
+    def choice(self):
+        alternatives = [self.sequence()]
+        while self.peek() == ('op', '/'):
+            self.position += 1
+            alternatives.append(self.sequence())
+        return alternatives[0] if len(alternatives) == 1 else ('choice', alternatives)
+
+    def sequence(self):
+        items = []
+        while self.peek()[0] and self.peek() not in (('op', '/'), ('op', ')')):
+            items.append(self.postfix())
+        if not items:
+            raise SyntaxError('Empty expression in grammar')
+        return items[0] if len(items) == 1 else ('sequence', items)
+
+    def postfix(self):
+        expression = self.atom()
+        while self.peek() in (('op', '?'), ('op', '*'), ('op', '+')):
+            operator = self.peek()[1]
+            self.position += 1
+            expression = ({'?': 'optional', '*': 'star', '+': 'plus'}[operator], expression)
+        return expression
+
+    def atom(self):
+        kind, value = self.peek()
+        self.position += 1
+        if kind == 'literal':
+            return ('literal', ast.literal_eval(value), value)
+        if kind == 'cls':
+            return ('class', value)
+        if kind == 'name':
+            return ('ref', value)
+        if value == '.':
+            return ('any',)
+        if value == '(':
+            expression = self.choice()
+            if self.peek() != ('op', ')'):
+                raise SyntaxError('Missing ) in grammar')
+            self.position += 1
+            return expression
+        raise SyntaxError('Unexpected {0!r} in grammar'.format(value))
+
+
+def _references(expression):
+    kind = expression[0]
+    if kind == 'ref':
+        yield expression[1]
+    elif kind in ('sequence', 'choice'):
+        for item in expression[1]:
+            for name in _references(item):
+                yield name
+    elif kind in ('optional', 'star', 'plus'):
+        for name in _references(expression[1]):
+            yield name
+
+
+def _can_fail(expression, rules, seen=()):
+    """Return False if expression always succeeds, e.g. an optional or a star."""
+    kind = expression[0]
+    if kind in ('optional', 'star'):
+        return False
+    if kind == 'ref':
+        name = expression[1]
+        return name in seen or _can_fail(rules[name], rules, seen + (name,))
+    if kind == 'sequence':
+        return any(_can_fail(item, rules, seen) for item in expression[1])
+    if kind == 'choice':
+        return all(_can_fail(item, rules, seen) for item in expression[1])
+    if kind == 'plus':
+        return _can_fail(expression[1], rules, seen)
+    return True
+
+
+def _regex(expression):
+    """Return the regex source matching a literal or character class."""
+    if expression[0] == 'literal':
+        return re.escape(expression[1])
+    return expression[1]
+
+
+def _width(expression):
+    return len(expression[1]) if expression[0] == 'literal' else 1
+
+
+def _description(expression):
+    return expression[2] if expression[0] == 'literal' else expression[1]
+
+
+class ParserGenerator(object):
+    """Generate the source of an optimized parser module for a grammar."""
+    def __init__(self, rules, node_rules=NODE_RULES):
+        self.rules = rules
+        self.names = [name for name, _ in rules]
+        self.expressions = dict(rules)
+        self.node_rules = set(node_rules) & set(self.names)
+        calls = Counter(name for _, expression in rules for name in _references(expression))
+        self.memo_rules = [name for name in self.names if calls[name] > 1]
+        self.patterns = {}
+        self.tables = []
+        self.choices = 0
+        self.node_classes = []
+        self.counter = 0
+        self.lines = []
+        self.indent = 2
+
+    # Module-level tables shared by the generated methods
+
+    def pattern(self, source, parts=None):
+        """Return the name of a compiled regex for source, compiling it once."""
+        if source not in self.patterns:
+            self.patterns[source] = '_PATTERN_{0}'.format(len(self.patterns) + 1)
+        name = self.patterns[source]
+        if parts is not None:
+            # What each piece of a merged run expects, for error messages
+            table = '{0}_PARTS'.format(name)
+            if table not in dict(self.tables):
+                self.tables.append((table, '({0},)'.format(', '.join(
+                    '({0}, {1!r})'.format(self.pattern(_regex(part)), _description(part))
+                    for part in parts))))
+            return name, table
+        return name
+
+    def table(self, name, value):
+        self.tables.append((name, value))
+        return name
+
+    def can_fail(self, expression):
+        return _can_fail(expression, self.expressions)
+
+    def fresh(self, prefix):
+        self.counter += 1
+        return '{0}{1}'.format(prefix, self.counter)
+
+    # Code emission
+
+    def line(self, text=''):
+        self.lines.append('    ' * self.indent + text if text else '')
+
+    def expect(self, offset, description):
+        self.line('if track:')
+        self.line('    self._expect({0}, {1!r})'.format(offset, description))
+
+    def fail(self, description):
+        self.line('else:')
+        self.indent += 1
+        self.expect('i', description)
+        self.line('i = -1')
+        self.indent -= 1
+
+    def emit(self, expression, elements=None):
+        """Emit code matching expression at offset i.
+
+        On success the code leaves i at the end of the match; on failure it
+        sets i to -1. Nodes for NODE_RULES references that are items of a
+        labelled sequence are appended to the list named by elements.
+        """
+        kind = expression[0]
+        if kind in ('literal', 'class'):
+            self.emit_terminal(expression)
+        elif kind == 'any':
+            self.line('if i < self._input_size:')
+            self.line('    i += 1')
+            self.fail('<any char>')
+        elif kind == 'ref':
+            self.emit_ref(expression[1], elements)
+        elif kind == 'sequence':
+            self.emit_sequence(expression[1])
+        elif kind == 'choice':
+            self.emit_choice(expression[1])
+        elif kind == 'optional':
+            self.emit_optional(expression[1])
+        else:
+            self.emit_repetition(expression[1], kind == 'plus')
+
+    def emit_terminal(self, expression):
+        if expression[0] == 'literal':
+            self.line('if input.startswith({0!r}, i):'.format(expression[1]))
+        else:
+            self.line('if {0}.match(input, i):'.format(self.pattern(expression[1])))
+        self.line('    i += {0}'.format(_width(expression)))
+        self.fail(_description(expression))
+
+    def emit_run(self, run):
+        """Match consecutive literals and character classes with one regex."""
+        name, parts = self.pattern(''.join(_regex(item) for item in run), run)
+        self.line('if {0}.match(input, i):'.format(name))
+        self.line('    i += {0}'.format(sum(_width(item) for item in run)))
+        self.line('else:')
+        self.line('    if track:')
+        self.line('        self._expect_sequence(i, {0})'.format(parts))
+        self.line('    i = -1')
+
+    def emit_ref(self, rule, elements=None, in_sequence=False):
+        if rule not in self.node_rules:
+            self.line('i = self._read_{0}(i)'.format(rule))
+            return
+        node = self.fresh('node')
+        self.line('{0} = self._read_{1}(i)'.format(node, rule))
+        if not self.can_fail(('ref', rule)):
+            self.line('i = {0}._end'.format(node))
+        elif in_sequence:
+            # Leave the enclosing sequence straight away
+            self.line('if {0} is FAILURE:'.format(node))
+            self.line('    i = -1')
+            self.line('    break')
+            self.line('i = {0}._end'.format(node))
+        else:
+            self.line('if {0} is FAILURE:'.format(node))
+            self.line('    i = -1')
+            self.line('else:')
+            self.line('    i = {0}._end'.format(node))
+            if elements:
+                self.line('    {0}.append({1})'.format(elements, node))
+            return
+        if elements:
+            self.line('{0}.append({1})'.format(elements, node))
+
+    def labels(self, items):
+        return [item[1] for item in items if item[0] == 'ref' and item[1] in self.node_rules]
+
+    def emit_sequence(self, items):
+        labels = self.labels(items) if self.rule in self.node_rules else []
+        start, elements = None, None
+        if labels:
+            start, elements = self.fresh('start'), self.fresh('elements')
+            self.line('{0} = i'.format(start))
+            self.line('{0} = []'.format(elements))
+        groups, run = [], []
+        for item in items:
+            if item[0] in ('literal', 'class'):
+                run.append(item)
+                continue
+            if run:
+                groups.append(('run', run))
+                run = []
+            groups.append(('item', item))
+        if run:
+            groups.append(('run', run))
+        self.line('while True:')
+        self.indent += 1
+        for position, (kind, group) in enumerate(groups):
+            if kind == 'run':
+                if len(group) == 1:
+                    self.emit_terminal(group[0])
+                else:
+                    self.emit_run(group)
+            elif group[0] == 'ref' and group[1] in self.node_rules:
+                self.emit_ref(group[1], elements, in_sequence=True)
+                continue
+            else:
+                self.emit(group, elements)
+            if position < len(groups) - 1 and (kind == 'run' or self.can_fail(group)):
+                self.line('if i < 0:')
+                self.line('    break')
+        if labels:
+            node_class = self.node_class(labels)
+            self.line('if i >= 0:')
+            self.line('    node = {0}(input, {1}, i, {2})'.format(node_class, start, elements))
+        self.line('break')
+        self.indent -= 1
+
+    def node_class(self, labels):
+        name = 'TreeNode{0}'.format(len(self.node_classes) + 1)
+        self.node_classes.append((name, labels))
+        return name
+
+    def emit_choice(self, alternatives):
+        if all(item[0] == 'literal' for item in alternatives):
+            self.emit_literal_choice(alternatives)
+            return
+        start = self.fresh('start')
+        self.line('{0} = i'.format(start))
+        self.line('while True:')
+        self.indent += 1
+        for position, item in enumerate(alternatives):
+            self.emit(item)
+            if position < len(alternatives) - 1:
+                self.line('if i >= 0:')
+                self.line('    break')
+                self.line('i = {0}'.format(start))
+        self.line('break')
+        self.indent -= 1
+
+    def emit_literal_choice(self, alternatives):
+        dispatch = {}
+        for item in alternatives:
+            bucket = dispatch.setdefault(item[1][:1], [])
+            if item[1] not in bucket:
+                bucket.append(item[1])
+        self.choices += 1
+        dispatch = self.table('_DISPATCH_{0}'.format(self.choices), '{' + ', '.join(
+            '{0!r}: ({1},)'.format(char, ', '.join(repr(literal) for literal in literals))
+            for char, literals in dispatch.items()) + '}')
+        ordered = self.table('_CHOICE_{0}'.format(self.choices), '(' + ', '.join(
+            '({0!r}, {1!r})'.format(item[1], item[2]) for item in alternatives) + ',)')
+        self.line('if track:')
+        self.line('    i = self._expect_choice(i, {0})'.format(ordered))
+        self.line('else:')
+        self.line('    for literal in {0}.get(input[i:i + 1], ()):'.format(dispatch))
+        self.line('        if input.startswith(literal, i):')
+        self.line('            i += len(literal)')
+        self.line('            break')
+        self.line('    else:')
+        self.line('        i = -1')
+
+    def emit_optional(self, expression):
+        if expression[0] in ('literal', 'class'):
+            if expression[0] == 'literal':
+                self.line('if input.startswith({0!r}, i):'.format(expression[1]))
+            else:
+                self.line('if {0}.match(input, i):'.format(self.pattern(expression[1])))
+            self.line('    i += {0}'.format(_width(expression)))
+            self.line('else:')
+            self.indent += 1
+            self.expect('i', _description(expression))
+            self.indent -= 1
+            return
+        start = self.fresh('start')
+        self.line('{0} = i'.format(start))
+        self.emit(expression)
+        if self.can_fail(expression):
+            self.line('if i < 0:')
+            self.line('    i = {0}'.format(start))
+
+    def emit_repetition(self, expression, at_least_one):
+        if expression[0] == 'any' and not at_least_one:
+            self.expect('self._input_size', '<any char>')
+            self.line('i = self._input_size')
+            return
+        if expression[0] in ('literal', 'class'):
+            match = self.fresh('match')
+            source = '(?:{0}){1}'.format(_regex(expression), '+' if at_least_one else '*')
+            self.line('{0} = {1}.match(input, i)'.format(match, self.pattern(source)))
+            self.line('if {0}:'.format(match))
+            self.line('    i = {0}.end()'.format(match))
+            self.expect('i', _description(expression))
+            if at_least_one:
+                self.line('if not {0}:'.format(match))
+                self.line('    i = -1')
+            return
+        start, matched = self.fresh('start'), self.fresh('matched')
+        self.line('{0} = False'.format(matched))
+        self.line('while True:')
+        self.indent += 1
+        self.line('{0} = i'.format(start))
+        self.emit(expression)
+        self.line('if i < 0 or i == {0}:'.format(start))
+        self.line('    i = {0} if i < 0 else i'.format(start))
+        self.line('    break')
+        self.line('{0} = True'.format(matched))
+        self.indent -= 1
+        if at_least_one:
+            self.line('if not {0}:'.format(matched))
+            self.line('    i = -1')
+
+    def emit_rule(self, name, expression):
+        self.rule = name
+        memoized = name in self.memo_rules
+        self.indent = 1
+        self.line('def _read_{0}(self, i):'.format(name))
+        self.indent = 2
+        if memoized:
+            self.line('memo = self._memo_{0}'.format(name))
+            self.line('if i in memo:')
+            self.line('    return memo[i]')
+        header = len(self.lines)
+        if name in self.node_rules:
+            self.line('node = None')
+        self.emit(expression)
+        if name in self.node_rules:
+            self.line('if i < 0:')
+            self.line('    node = FAILURE')
+            self.line('elif node is None:')
+            self.line('    node = TreeNode(input, offset, i)')
+            result = 'node'
+        else:
+            result = 'i'
+        if memoized:
+            self.line('memo[offset] = {0}'.format(result))
+        self.line('return {0}'.format(result))
+        # Bind only the locals the body uses
+        body = '\n'.join(self.lines[header:])
+        names = [local for local in ('input', 'track', 'offset')
+                 if re.search(r'\b{0}\b'.format(local), body)]
+        if names:
+            self.lines.insert(header, '        {0} = {1}'.format(', '.join(names), ', '.join(
+                {'input': 'self._input', 'track': 'self._track', 'offset': 'i'}[local]
+                for local in names)))
+        self.line()
+
+    def generate(self, grammar_file):
+        for name, expression in self.rules:
+            self.emit_rule(name, expression)
+        methods = '\n'.join(self.lines).rstrip() + '\n'
+        out = [HEADER.format(grammar_file=grammar_file, node_rules=', '.join(
+            name for name in self.names if name in self.node_rules),
+            memo_rules=', '.join(self.memo_rules))]
+        for name, labels in self.node_classes:
+            out.append('\n\nclass {0}(TreeNode):\n    __slots__ = ()\n'.format(name))
+            out.extend('    {0} = _element({1})\n'.format(label, index)
+                       for index, label in enumerate(labels))
+        out.append('\n\nclass ParseError(SyntaxError):\n    pass\n\n\nFAILURE = object()\n\n')
+        out.append(textwrap.fill('RULES = ({0})'.format(', '.join(repr(name) for name in self.names)),
+                                 100, subsequent_indent=' ' * 9) + '\n\n')
+        for source, name in sorted(self.patterns.items(), key=lambda item: int(item[1][9:])):
+            out.append('{0} = re.compile({1!r})\n'.format(name, source))
+        for name, value in self.tables:
+            out.append('{0} = {1}\n'.format(name, value))
+        out.append(GRAMMAR)
+        out.append(methods)
+        out.append(PARSER.format(start=self.names[0], memo_rules=''.join(
+            '        self._memo_{0} = {{}}\n'.format(name) for name in self.memo_rules),
+            memo_tables=', '.join("'{0}': self._memo_{0}".format(name) for name in self.memo_rules),
+            clear_memos=''.join('        self._memo_{0}.clear()\n'.format(name)
+                                for name in self.memo_rules)))
+        return ''.join(out)
+
+
+HEADER = '''\
+# Generated by generate_parser.py from {grammar_file}; do not edit by hand.
+# Rebuild it with: python generate_parser.py {grammar_file} <this file>
+#
+# Nodes are built for: {node_rules}
+# Memoized rules: {memo_rules}
+import re
+
+
+class TreeNode(object):
+    __slots__ = ('_input', 'offset', '_end', 'elements')
+
+    def __init__(self, input, offset, end, elements=()):
+        self._input = input
+        self.offset = offset
+        self._end = end
+        self.elements = elements
+
+    @property
+    def text(self):
+        return self._input[self.offset:self._end]
+
+    @property
+    def span(self):
+        return self.offset, self._end
+
+    def __iter__(self):
+        for el in self.elements:
+            yield el
+
+
+def _element(index):
+    return property(lambda self: self.elements[index])
+'''
+
+GRAMMAR = '''
+
+class Grammar(object):
+    def _expect(self, offset, expected):
+        if offset > self._failure:
+            self._failure = offset
+            self._expected = []
+        if offset == self._failure:
+            self._expected.append(expected)
+
+    def _expect_sequence(self, i, parts):
+        for pattern, expected in parts:
+            match = pattern.match(self._input, i)
+            if not match:
+                self._expect(i, expected)
+                return
+            i = match.end()
+
+    def _expect_choice(self, i, alternatives):
+        for literal, expected in alternatives:
+            if self._input.startswith(literal, i):
+                return i + len(literal)
+            self._expect(i, expected)
+        return -1
+
+'''
+
+PARSER = '''
+
+class Parser(Grammar):
+    def __init__(self, input, actions=None, types=None, profile=None):
+        """Set up a parser for input, counting its rules into profile, a
+        metar_decode.RuleProfile, if one is given."""
+        self._actions = actions
+        self._types = types
+{memo_rules}        if profile is not None:
+            profile.attach(self, RULES, {{{memo_tables}}}, FAILURE)
+        self.reset(input)
+
+    def reset(self, input):
+        """Point the parser at a new input, clearing the memo tables in place.
+
+        input may also be bytes or a memoryview, which is read as Latin-1: one
+        character per byte, so node offsets are byte offsets.
+        """
+        if not isinstance(input, str):
+            input = str(input, 'latin-1')
+        self._input = input
+        self._input_size = len(input)
+{clear_memos}        self._track = False
+        self._failure = 0
+        self._expected = []
+
+    def parse(self):
+        tree = self.try_parse()
+        if tree.__class__ is ParseFailure:
+            raise tree.error()
+        return tree
+
+    def try_parse(self):
+        """Like parse, but return a ParseFailure instead of raising ParseError."""
+        tree = self._read_{start}(0)
+        if tree is not FAILURE and tree._end == self._input_size:
+            return tree
+        return ParseFailure(self._input)
+
+    def _locate_failure(self):
+        """Parse again, returning the offset of the furthest failure and the
+        expected-token strings there."""
+        self.reset(self._input)
+        self._track = True
+        tree = self._read_{start}(0)
+        self._track = False
+        if not self._expected:
+            self._failure = 0 if tree is FAILURE else tree._end
+            self._expected.append('<EOF>')
+        return self._failure, self._expected
+
+
+class ParseFailure(object):
+    """A failed parse, recorded without building the error message.
+
+    Holds only the input. Finding the furthest failure and what was expected
+    there takes a second, tracking parse, which runs the first time offset,
+    expected or the message is asked for. A ParseFailure is false, so
+    ``if tree:`` passes over it as it would over None.
+    """
+    __slots__ = ('input', '_located')
+
+    def __init__(self, input):
+        self.input = input
+        self._located = None
+
+    def __bool__(self):
+        return False
+
+    def __repr__(self):
+        return 'ParseFailure(offset={{0}}, expected={{1}})'.format(self.offset, self.expected)
+
+    def _locate(self):
+        if self._located is None:
+            self._located = Parser(self.input)._locate_failure()
+        return self._located
+
+    @property
+    def offset(self):
+        return self._locate()[0]
+
+    @property
+    def expected(self):
+        return self._locate()[1]
+
+    @property
+    def message(self):
+        return format_error(self.input, *self._locate())
+
+    def error(self):
+        """Return the ParseError that parse would have raised."""
+        return ParseError(self.message)
+
+
+def format_error(input, offset, expected):
+    lines, line_no, position = input.split('\\n'), 0, 0
+    while position <= offset:
+        position += len(lines[line_no]) + 1
+        line_no += 1
+    message, line = 'Line ' + str(line_no) + ': expected ' + ', '.join(expected) + '\\n', lines[line_no - 1]
+    message += line + '\\n'
+    position -= len(line) + 1
+    message += ' ' * (offset - position)
+    return message + '^'
+
+
+def parse(input, actions=None, types=None, profile=None):
+    parser = Parser(input, actions, types, profile)
+    return parser.parse()
+
+
+def parse_many(inputs, actions=None, types=None, failures=False, profile=None):
+    """Parse each of inputs in turn, reusing a single Parser.
+
+    Yields the tree for each input, or None for an input that fails to parse;
+    with failures=True, a ParseFailure instead. Neither costs a second parse.
+    """
+    parser = Parser('', actions, types, profile)
+    for input in inputs:
+        parser.reset(input)
+        tree = parser.try_parse()
+        if tree.__class__ is ParseFailure and not failures:
+            tree = None
+        yield tree
+'''
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Compile a PEG grammar into an optimized '
+                                                 'parser module.')
+    parser.add_argument('grammar', nargs='?', default='metar_decode.peg', help='Grammar file')
+    parser.add_argument('output', nargs='?', default='metar_decode_opt.py',
+                        help='Python module to write')
+    args = parser.parse_args()
+
+    with open(args.grammar, 'rt') as grammar_file:
+        rules = read_grammar(grammar_file.read())
+    with open(args.output, 'wt') as output:
+        output.write(ParserGenerator(rules).generate(args.grammar))
@@ -1,161 +1,259 @@
-from collections import defaultdict
 import re
+import time
+from collections import OrderedDict
 
 
 class TreeNode(object):
-    def __init__(self, text, offset, elements=None):
-        self.text = text
+    __slots__ = ('_input', 'offset', '_end', 'elements')
+
+    def __init__(self, input, offset, end, elements=()):
+        self._input = input
         self.offset = offset
-        self.elements = elements or []
+        self._end = end
+        self.elements = elements
+
+    @property
+    def text(self):
+        return self._input[self.offset:self._end]
+
+    @property
+    def span(self):
+        return self.offset, self._end
 
     def __iter__(self):
         for el in self.elements:
             yield el
 
 
+def _element(index):
+    return property(lambda self: self.elements[index])
+
+
 class TreeNode1(TreeNode):
-    def __init__(self, text, offset, elements):
-        super(TreeNode1, self).__init__(text, offset, elements)
-        self.metar = elements[0]
-        self.siteid = elements[1]
-        self.datetime = elements[2]
-        self.auto = elements[3]
-        self.wind = elements[4]
-        self.vis = elements[5]
-        self.run = elements[6]
-        self.curwx = elements[7]
-        self.skyc = elements[8]
-        self.temp_dewp = elements[9]
-        self.altim = elements[10]
-        self.remarks = elements[11]
-        self.end = elements[12]
+    __slots__ = ()
+    metar = _element(0)
+    siteid = _element(1)
+    datetime = _element(2)
+    auto = _element(3)
+    wind = _element(4)
+    vis = _element(5)
+    run = _element(6)
+    curwx = _element(7)
+    skyc = _element(8)
+    temp_dewp = _element(9)
+    altim = _element(10)
+    remarks = _element(11)
+    end = _element(12)
 
 
 class TreeNode2(TreeNode):
-    def __init__(self, text, offset, elements):
-        super(TreeNode2, self).__init__(text, offset, elements)
-        self.sep = elements[0]
+    __slots__ = ()
+    sep = _element(0)
 
 
 class TreeNode3(TreeNode):
-    def __init__(self, text, offset, elements):
-        super(TreeNode3, self).__init__(text, offset, elements)
-        self.sep = elements[0]
+    __slots__ = ()
+    sep = _element(0)
 
 
 class TreeNode4(TreeNode):
-    def __init__(self, text, offset, elements):
-        super(TreeNode4, self).__init__(text, offset, elements)
-        self.wind_dir = elements[1]
-        self.wind_spd = elements[2]
+    __slots__ = ()
+    wind_dir = _element(1)
+    wind_spd = _element(2)
 
 
 class TreeNode5(TreeNode):
-    def __init__(self, text, offset, elements):
-        super(TreeNode5, self).__init__(text, offset, elements)
-        self.sep = elements[0]
+    __slots__ = ()
+    sep = _element(0)
 
 
 class TreeNode6(TreeNode):
-    def __init__(self, text, offset, elements):
-        super(TreeNode6, self).__init__(text, offset, elements)
-        self.sep = elements[0]
+    __slots__ = ()
+    sep = _element(0)
 
 
 class TreeNode7(TreeNode):
-    def __init__(self, text, offset, elements):
-        super(TreeNode7, self).__init__(text, offset, elements)
-        self.sep = elements[0]
+    __slots__ = ()
+    sep = _element(0)
 
 
 class TreeNode8(TreeNode):
-    def __init__(self, text, offset, elements):
-        super(TreeNode8, self).__init__(text, offset, elements)
-        self.sep = elements[0]
+    __slots__ = ()
+    sep = _element(0)
 
 
 class TreeNode9(TreeNode):
-    def __init__(self, text, offset, elements):
-        super(TreeNode9, self).__init__(text, offset, elements)
-        self.sep = elements[0]
+    __slots__ = ()
+    sep = _element(0)
 
 
 class TreeNode10(TreeNode):
-    def __init__(self, text, offset, elements):
-        super(TreeNode10, self).__init__(text, offset, elements)
-        self.sep = elements[0]
-        self.temp = elements[2]
-        self.dewp = elements[4]
+    __slots__ = ()
+    sep = _element(0)
+    temp = _element(2)
+    dewp = _element(4)
 
 
 class ParseError(SyntaxError):
     pass
 
 
+class ParseFailure(object):
+    """A failed parse, recorded without building the error message.
+
+    Holds the input, the offset of the furthest failure and the expected-token
+    strings there, all shared with the parser rather than copied. The message
+    ParseError would carry is only formatted when asked for. A ParseFailure is
+    false, so ``if tree:`` passes over it as it would over None.
+    """
+    __slots__ = ('input', 'offset', 'expected')
+
+    def __init__(self, input, offset, expected):
+        self.input = input
+        self.offset = offset
+        self.expected = expected
+
+    def __bool__(self):
+        return False
+
+    def __repr__(self):
+        return 'ParseFailure(offset={0}, expected={1})'.format(self.offset, self.expected)
+
+    @property
+    def message(self):
+        return format_error(self.input, self.offset, self.expected)
+
+    def error(self):
+        """Return the ParseError that parse would have raised."""
+        return ParseError(self.message)
+
+
 FAILURE = object()
 
 
+class LiteralChoice(object):
+    """An ordered choice between string literals, indexed by first character.
+
+    ``table`` maps a character to the ``(literal, length, failed)`` entries for
+    the alternatives starting with it, in grammar order. ``failed`` holds the
+    expected-token strings of every alternative ahead of that one: those are
+    exactly the alternatives a sequential ordered choice would have tried and
+    failed before reaching it. ``expected`` lists them all, for when nothing
+    matches.
+    """
+    def __init__(self, *literals):
+        self.expected = tuple('"{0}"'.format(literal) for literal in literals)
+        self.table = {}
+        for index, literal in enumerate(literals):
+            self.table.setdefault(literal[0], []).append(
+                (literal, len(literal), self.expected[:index]))
+
+
+# The literal choices of the wx and cover rules
+WEATHER = LiteralChoice('MI', 'PR', 'DR', 'BL', 'SH', 'TS', 'FG', 'TS', 'FZ', 'RA', 'BR', 'HZ',
+                        'SN')
+DESCRIPTOR = LiteralChoice('RA', 'BR', 'DZ', 'FG', 'FU', 'VA', 'DU', 'SA', 'SA', 'HZ', 'PY')
+COVERAGE = LiteralChoice('FEW', 'SCT', 'BKN', 'OVC', 'VV', '///')
+CLOUD_TYPE = LiteralChoice('TCU', 'CB', '///')
+CLEAR = LiteralChoice('CLR', 'SKC', 'NSC', 'NCD')
+
+
+# Canopy compiles one pattern per character class in the grammar, but the
+# same few classes recur, so each distinct one is compiled once and shared
+_ALNUM = re.compile('^[0-9A-Z]')
+_DIGIT = re.compile('^[\\d]')
+_RUNWAY_SIDE = re.compile('^[LRC]')
+_RVR_LIMIT = re.compile('^["M" \\/ "P"]')
+_TREND = re.compile('^[-+]')
+_MINUS = re.compile('^[M]')
+_ALTIM_UNIT = re.compile('^["Q" \\/ "A"]')
+
+
 class Grammar(object):
-    REGEX_1 = re.compile('^[0-9A-Z]')
-    REGEX_2 = re.compile('^[0-9A-Z]')
-    REGEX_3 = re.compile('^[0-9A-Z]')
-    REGEX_4 = re.compile('^[0-9A-Z]')
-    REGEX_5 = re.compile('^[\\d]')
-    REGEX_6 = re.compile('^[\\d]')
-    REGEX_7 = re.compile('^[\\d]')
-    REGEX_8 = re.compile('^[\\d]')
-    REGEX_9 = re.compile('^[\\d]')
-    REGEX_10 = re.compile('^[\\d]')
-    REGEX_11 = re.compile('^[\\d]')
-    REGEX_12 = re.compile('^[\\d]')
-    REGEX_13 = re.compile('^[\\d]')
-    REGEX_14 = re.compile('^[\\d]')
-    REGEX_15 = re.compile('^[\\d]')
-    REGEX_16 = re.compile('^[\\d]')
-    REGEX_17 = re.compile('^[\\d]')
-    REGEX_18 = re.compile('^[\\d]')
-    REGEX_19 = re.compile('^[\\d]')
-    REGEX_20 = re.compile('^[\\d]')
-    REGEX_21 = re.compile('^[\\d]')
-    REGEX_22 = re.compile('^[\\d]')
-    REGEX_23 = re.compile('^[\\d]')
-    REGEX_24 = re.compile('^[\\d]')
-    REGEX_25 = re.compile('^[\\d]')
-    REGEX_26 = re.compile('^[\\d]')
-    REGEX_27 = re.compile('^[LRC]')
-    REGEX_28 = re.compile('^[\\d]')
-    REGEX_29 = re.compile('^[\\d]')
-    REGEX_30 = re.compile('^[LRC]')
-    REGEX_31 = re.compile('^[\\d]')
-    REGEX_32 = re.compile('^[\\d]')
-    REGEX_33 = re.compile('^[\\d]')
-    REGEX_34 = re.compile('^[\\d]')
-    REGEX_35 = re.compile('^["M" \\/ "P"]')
-    REGEX_36 = re.compile('^[\\d]')
-    REGEX_37 = re.compile('^[\\d]')
-    REGEX_38 = re.compile('^[\\d]')
-    REGEX_39 = re.compile('^[\\d]')
-    REGEX_40 = re.compile('^[-+]')
-    REGEX_41 = re.compile('^[-+]')
-    REGEX_42 = re.compile('^[\\d]')
-    REGEX_43 = re.compile('^[M]')
-    REGEX_44 = re.compile('^[\\d]')
-    REGEX_45 = re.compile('^[\\d]')
-    REGEX_46 = re.compile('^[M]')
-    REGEX_47 = re.compile('^[\\d]')
-    REGEX_48 = re.compile('^[\\d]')
-    REGEX_49 = re.compile('^["Q" \\/ "A"]')
-    REGEX_50 = re.compile('^[\\d]')
-    REGEX_51 = re.compile('^[\\d]')
-    REGEX_52 = re.compile('^[\\d]')
-    REGEX_53 = re.compile('^[\\d]')
+    REGEX_1 = _ALNUM
+    REGEX_2 = _ALNUM
+    REGEX_3 = _ALNUM
+    REGEX_4 = _ALNUM
+    REGEX_5 = _DIGIT
+    REGEX_6 = _DIGIT
+    REGEX_7 = _DIGIT
+    REGEX_8 = _DIGIT
+    REGEX_9 = _DIGIT
+    REGEX_10 = _DIGIT
+    REGEX_11 = _DIGIT
+    REGEX_12 = _DIGIT
+    REGEX_13 = _DIGIT
+    REGEX_14 = _DIGIT
+    REGEX_15 = _DIGIT
+    REGEX_16 = _DIGIT
+    REGEX_17 = _DIGIT
+    REGEX_18 = _DIGIT
+    REGEX_19 = _DIGIT
+    REGEX_20 = _DIGIT
+    REGEX_21 = _DIGIT
+    REGEX_22 = _DIGIT
+    REGEX_23 = _DIGIT
+    REGEX_24 = _DIGIT
+    REGEX_25 = _DIGIT
+    REGEX_26 = _DIGIT
+    REGEX_27 = _RUNWAY_SIDE
+    REGEX_28 = _DIGIT
+    REGEX_29 = _DIGIT
+    REGEX_30 = _RUNWAY_SIDE
+    REGEX_31 = _DIGIT
+    REGEX_32 = _DIGIT
+    REGEX_33 = _DIGIT
+    REGEX_34 = _DIGIT
+    REGEX_35 = _RVR_LIMIT
+    REGEX_36 = _DIGIT
+    REGEX_37 = _DIGIT
+    REGEX_38 = _DIGIT
+    REGEX_39 = _DIGIT
+    REGEX_40 = _TREND
+    REGEX_41 = _TREND
+    REGEX_42 = _DIGIT
+    REGEX_43 = _MINUS
+    REGEX_44 = _DIGIT
+    REGEX_45 = _DIGIT
+    REGEX_46 = _MINUS
+    REGEX_47 = _DIGIT
+    REGEX_48 = _DIGIT
+    REGEX_49 = _ALTIM_UNIT
+    REGEX_50 = _DIGIT
+    REGEX_51 = _DIGIT
+    REGEX_52 = _DIGIT
+    REGEX_53 = _DIGIT
+
+    def _read_literals(self, choice):
+        """Match the LiteralChoice choice at the current offset.
+
+        Looks up only the alternatives sharing the next character, then
+        records the same failures the sequential ordered choice would.
+        """
+        offset, matched = self._offset, None
+        for literal, length, failed in choice.table.get(self._input[offset:offset + 1], ()):
+            if self._input.startswith(literal, offset):
+                matched = TreeNode(self._input, offset, offset + length)
+                self._offset = offset + length
+                break
+        else:
+            failed = choice.expected
+        if failed:
+            if offset > self._failure:
+                self._failure = offset
+                self._expected = []
+            if offset == self._failure:
+                self._expected.extend(failed)
+        return FAILURE if matched is None else matched
 
     def _read_ob(self):
         address0, index0 = FAILURE, self._offset
-        cached = self._cache['ob'].get(index0)
-        if cached:
-            self._offset = cached[1]
-            return cached[0]
+        memo = self._cache.get('ob')
+        if memo is not None:
+            cached = memo.get(index0)
+            if cached:
+                self._offset = cached[1]
+                return cached[0]
         index1, elements0 = self._offset, []
         address1 = FAILURE
         address1 = self._read_metar()
@@ -251,17 +349,20 @@ class Grammar(object):
         if elements0 is None:
             address0 = FAILURE
         else:
-            address0 = TreeNode1(self._input[index1:self._offset], index1, elements0)
+            address0 = TreeNode1(self._input, index1, self._offset, elements0)
             self._offset = self._offset
-        self._cache['ob'][index0] = (address0, self._offset)
+        if memo is not None:
+            memo[index0] = (address0, self._offset)
         return address0
 
     def _read_metar(self):
         address0, index0 = FAILURE, self._offset
-        cached = self._cache['metar'].get(index0)
-        if cached:
-            self._offset = cached[1]
-            return cached[0]
+        memo = self._cache.get('metar')
+        if memo is not None:
+            cached = memo.get(index0)
+            if cached:
+                self._offset = cached[1]
+                return cached[0]
         index1, elements0 = self._offset, []
         address1 = FAILURE
         index2 = self._offset
@@ -270,7 +371,7 @@ class Grammar(object):
         if self._offset < self._input_size:
             chunk0 = self._input[self._offset:self._offset + 5]
         if chunk0 == 'METAR':
-            address1 = TreeNode(self._input[self._offset:self._offset + 5], self._offset)
+            address1 = TreeNode(self._input, self._offset, self._offset + 5)
             self._offset = self._offset + 5
         else:
             address1 = FAILURE
@@ -285,7 +386,7 @@ class Grammar(object):
             if self._offset < self._input_size:
                 chunk1 = self._input[self._offset:self._offset + 5]
             if chunk1 == 'SPECI':
-                address1 = TreeNode(self._input[self._offset:self._offset + 5], self._offset)
+                address1 = TreeNode(self._input, self._offset, self._offset + 5)
                 self._offset = self._offset + 5
             else:
                 address1 = FAILURE
@@ -297,7 +398,7 @@ class Grammar(object):
             if address1 is FAILURE:
                 self._offset = index3
         if address1 is FAILURE:
-            address1 = TreeNode(self._input[index2:index2], index2)
+            address1 = TreeNode(self._input, index2, index2)
             self._offset = index2
         if address1 is not FAILURE:
             elements0.append(address1)
@@ -308,7 +409,7 @@ class Grammar(object):
             if self._offset < self._input_size:
                 chunk2 = self._input[self._offset:self._offset + 5]
             if chunk2 == ' AUTO':
-                address2 = TreeNode(self._input[self._offset:self._offset + 5], self._offset)
+                address2 = TreeNode(self._input, self._offset, self._offset + 5)
                 self._offset = self._offset + 5
             else:
                 address2 = FAILURE
@@ -323,7 +424,7 @@ class Grammar(object):
                 if self._offset < self._input_size:
                     chunk3 = self._input[self._offset:self._offset + 4]
                 if chunk3 == ' COR':
-                    address2 = TreeNode(self._input[self._offset:self._offset + 4], self._offset)
+                    address2 = TreeNode(self._input, self._offset, self._offset + 4)
                     self._offset = self._offset + 4
                 else:
                     address2 = FAILURE
@@ -335,7 +436,7 @@ class Grammar(object):
                 if address2 is FAILURE:
                     self._offset = index5
             if address2 is FAILURE:
-                address2 = TreeNode(self._input[index4:index4], index4)
+                address2 = TreeNode(self._input, index4, index4)
                 self._offset = index4
             if address2 is not FAILURE:
                 elements0.append(address2)
@@ -348,24 +449,27 @@ class Grammar(object):
         if elements0 is None:
             address0 = FAILURE
         else:
-            address0 = TreeNode(self._input[index1:self._offset], index1, elements0)
+            address0 = TreeNode(self._input, index1, self._offset, elements0)
             self._offset = self._offset
-        self._cache['metar'][index0] = (address0, self._offset)
+        if memo is not None:
+            memo[index0] = (address0, self._offset)
         return address0
 
     def _read_sep(self):
         address0, index0 = FAILURE, self._offset
-        cached = self._cache['sep'].get(index0)
-        if cached:
-            self._offset = cached[1]
-            return cached[0]
+        memo = self._cache.get('sep')
+        if memo is not None:
+            cached = memo.get(index0)
+            if cached:
+                self._offset = cached[1]
+                return cached[0]
         remaining0, index1, elements0, address1 = 1, self._offset, [], True
         while address1 is not FAILURE:
             chunk0 = None
             if self._offset < self._input_size:
                 chunk0 = self._input[self._offset:self._offset + 1]
             if chunk0 == ' ':
-                address1 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+                address1 = TreeNode(self._input, self._offset, self._offset + 1)
                 self._offset = self._offset + 1
             else:
                 address1 = FAILURE
@@ -378,25 +482,28 @@ class Grammar(object):
                 elements0.append(address1)
                 remaining0 -= 1
         if remaining0 <= 0:
-            address0 = TreeNode(self._input[index1:self._offset], index1, elements0)
+            address0 = TreeNode(self._input, index1, self._offset, elements0)
             self._offset = self._offset
         else:
             address0 = FAILURE
-        self._cache['sep'][index0] = (address0, self._offset)
+        if memo is not None:
+            memo[index0] = (address0, self._offset)
         return address0
 
     def _read_siteid(self):
         address0, index0 = FAILURE, self._offset
-        cached = self._cache['siteid'].get(index0)
-        if cached:
-            self._offset = cached[1]
-            return cached[0]
+        memo = self._cache.get('siteid')
+        if memo is not None:
+            cached = memo.get(index0)
+            if cached:
+                self._offset = cached[1]
+                return cached[0]
         index1, elements0 = self._offset, []
         address1 = FAILURE
         index2 = self._offset
         address1 = self._read_sep()
         if address1 is FAILURE:
-            address1 = TreeNode(self._input[index2:index2], index2)
+            address1 = TreeNode(self._input, index2, index2)
             self._offset = index2
         if address1 is not FAILURE:
             elements0.append(address1)
@@ -405,7 +512,7 @@ class Grammar(object):
             if self._offset < self._input_size:
                 chunk0 = self._input[self._offset:self._offset + 1]
             if chunk0 is not None and Grammar.REGEX_1.search(chunk0):
-                address2 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+                address2 = TreeNode(self._input, self._offset, self._offset + 1)
                 self._offset = self._offset + 1
             else:
                 address2 = FAILURE
@@ -421,7 +528,7 @@ class Grammar(object):
                 if self._offset < self._input_size:
                     chunk1 = self._input[self._offset:self._offset + 1]
                 if chunk1 is not None and Grammar.REGEX_2.search(chunk1):
-                    address3 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+                    address3 = TreeNode(self._input, self._offset, self._offset + 1)
                     self._offset = self._offset + 1
                 else:
                     address3 = FAILURE
@@ -437,7 +544,7 @@ class Grammar(object):
                     if self._offset < self._input_size:
                         chunk2 = self._input[self._offset:self._offset + 1]
                     if chunk2 is not None and Grammar.REGEX_3.search(chunk2):
-                        address4 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+                        address4 = TreeNode(self._input, self._offset, self._offset + 1)
                         self._offset = self._offset + 1
                     else:
                         address4 = FAILURE
@@ -453,7 +560,7 @@ class Grammar(object):
                         if self._offset < self._input_size:
                             chunk3 = self._input[self._offset:self._offset + 1]
                         if chunk3 is not None and Grammar.REGEX_4.search(chunk3):
-                            address5 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+                            address5 = TreeNode(self._input, self._offset, self._offset + 1)
                             self._offset = self._offset + 1
                         else:
                             address5 = FAILURE
@@ -482,17 +589,20 @@ class Grammar(object):
         if elements0 is None:
             address0 = FAILURE
         else:
-            address0 = TreeNode(self._input[index1:self._offset], index1, elements0)
+            address0 = TreeNode(self._input, index1, self._offset, elements0)
             self._offset = self._offset
-        self._cache['siteid'][index0] = (address0, self._offset)
+        if memo is not None:
+            memo[index0] = (address0, self._offset)
         return address0
 
     def _read_datetime(self):
         address0, index0 = FAILURE, self._offset
-        cached = self._cache['datetime'].get(index0)
-        if cached:
-            self._offset = cached[1]
-            return cached[0]
+        memo = self._cache.get('datetime')
+        if memo is not None:
+            cached = memo.get(index0)
+            if cached:
+                self._offset = cached[1]
+                return cached[0]
         index1, elements0 = self._offset, []
         address1 = FAILURE
         address1 = self._read_sep()
@@ -505,7 +615,7 @@ class Grammar(object):
                 if self._offset < self._input_size:
                     chunk0 = self._input[self._offset:self._offset + 1]
                 if chunk0 is not None and Grammar.REGEX_5.search(chunk0):
-                    address3 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+                    address3 = TreeNode(self._input, self._offset, self._offset + 1)
                     self._offset = self._offset + 1
                 else:
                     address3 = FAILURE
@@ -518,7 +628,7 @@ class Grammar(object):
                     elements1.append(address3)
                     remaining0 -= 1
             if remaining0 <= 0:
-                address2 = TreeNode(self._input[index2:self._offset], index2, elements1)
+                address2 = TreeNode(self._input, index2, self._offset, elements1)
                 self._offset = self._offset
             else:
                 address2 = FAILURE
@@ -529,7 +639,7 @@ class Grammar(object):
                 if self._offset < self._input_size:
                     chunk1 = self._input[self._offset:self._offset + 1]
                 if chunk1 == 'Z':
-                    address4 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+                    address4 = TreeNode(self._input, self._offset, self._offset + 1)
                     self._offset = self._offset + 1
                 else:
                     address4 = FAILURE
@@ -552,17 +662,20 @@ class Grammar(object):
         if elements0 is None:
             address0 = FAILURE
         else:
-            address0 = TreeNode2(self._input[index1:self._offset], index1, elements0)
+            address0 = TreeNode2(self._input, index1, self._offset, elements0)
             self._offset = self._offset
-        self._cache['datetime'][index0] = (address0, self._offset)
+        if memo is not None:
+            memo[index0] = (address0, self._offset)
         return address0
 
     def _read_auto(self):
         address0, index0 = FAILURE, self._offset
-        cached = self._cache['auto'].get(index0)
-        if cached:
-            self._offset = cached[1]
-            return cached[0]
+        memo = self._cache.get('auto')
+        if memo is not None:
+            cached = memo.get(index0)
+            if cached:
+                self._offset = cached[1]
+                return cached[0]
         index1, elements0 = self._offset, []
         address1 = FAILURE
         address1 = self._read_sep()
@@ -575,7 +688,7 @@ class Grammar(object):
             if self._offset < self._input_size:
                 chunk0 = self._input[self._offset:self._offset + 4]
             if chunk0 == 'AUTO':
-                address2 = TreeNode(self._input[self._offset:self._offset + 4], self._offset)
+                address2 = TreeNode(self._input, self._offset, self._offset + 4)
                 self._offset = self._offset + 4
             else:
                 address2 = FAILURE
@@ -590,7 +703,7 @@ class Grammar(object):
                 if self._offset < self._input_size:
                     chunk1 = self._input[self._offset:self._offset + 3]
                 if chunk1 == 'COR':
-                    address2 = TreeNode(self._input[self._offset:self._offset + 3], self._offset)
+                    address2 = TreeNode(self._input, self._offset, self._offset + 3)
                     self._offset = self._offset + 3
                 else:
                     address2 = FAILURE
@@ -602,7 +715,7 @@ class Grammar(object):
                 if address2 is FAILURE:
                     self._offset = index3
             if address2 is FAILURE:
-                address2 = TreeNode(self._input[index2:index2], index2)
+                address2 = TreeNode(self._input, index2, index2)
                 self._offset = index2
             if address2 is not FAILURE:
                 elements0.append(address2)
@@ -615,24 +728,27 @@ class Grammar(object):
         if elements0 is None:
             address0 = FAILURE
         else:
-            address0 = TreeNode3(self._input[index1:self._offset], index1, elements0)
+            address0 = TreeNode3(self._input, index1, self._offset, elements0)
             self._offset = self._offset
-        self._cache['auto'][index0] = (address0, self._offset)
+        if memo is not None:
+            memo[index0] = (address0, self._offset)
         return address0
 
     def _read_wind(self):
         address0, index0 = FAILURE, self._offset
-        cached = self._cache['wind'].get(index0)
-        if cached:
-            self._offset = cached[1]
-            return cached[0]
+        memo = self._cache.get('wind')
+        if memo is not None:
+            cached = memo.get(index0)
+            if cached:
+                self._offset = cached[1]
+                return cached[0]
         index1 = self._offset
         index2, elements0 = self._offset, []
         address1 = FAILURE
         index3 = self._offset
         address1 = self._read_sep()
         if address1 is FAILURE:
-            address1 = TreeNode(self._input[index3:index3], index3)
+            address1 = TreeNode(self._input, index3, index3)
             self._offset = index3
         if address1 is not FAILURE:
             elements0.append(address1)
@@ -648,7 +764,7 @@ class Grammar(object):
                     index4 = self._offset
                     address4 = self._read_gust()
                     if address4 is FAILURE:
-                        address4 = TreeNode(self._input[index4:index4], index4)
+                        address4 = TreeNode(self._input, index4, index4)
                         self._offset = index4
                     if address4 is not FAILURE:
                         elements0.append(address4)
@@ -658,7 +774,7 @@ class Grammar(object):
                         if self._offset < self._input_size:
                             chunk0 = self._input[self._offset:self._offset + 2]
                         if chunk0 == 'KT':
-                            address5 = TreeNode(self._input[self._offset:self._offset + 2], self._offset)
+                            address5 = TreeNode(self._input, self._offset, self._offset + 2)
                             self._offset = self._offset + 2
                         else:
                             address5 = FAILURE
@@ -673,7 +789,7 @@ class Grammar(object):
                             if self._offset < self._input_size:
                                 chunk1 = self._input[self._offset:self._offset + 3]
                             if chunk1 == 'MPS':
-                                address5 = TreeNode(self._input[self._offset:self._offset + 3], self._offset)
+                                address5 = TreeNode(self._input, self._offset, self._offset + 3)
                                 self._offset = self._offset + 3
                             else:
                                 address5 = FAILURE
@@ -690,7 +806,7 @@ class Grammar(object):
                             index6 = self._offset
                             address6 = self._read_varwind()
                             if address6 is FAILURE:
-                                address6 = TreeNode(self._input[index6:index6], index6)
+                                address6 = TreeNode(self._input, index6, index6)
                                 self._offset = index6
                             if address6 is not FAILURE:
                                 elements0.append(address6)
@@ -715,20 +831,23 @@ class Grammar(object):
         if elements0 is None:
             address0 = FAILURE
         else:
-            address0 = TreeNode4(self._input[index2:self._offset], index2, elements0)
+            address0 = TreeNode4(self._input, index2, self._offset, elements0)
             self._offset = self._offset
         if address0 is FAILURE:
-            address0 = TreeNode(self._input[index1:index1], index1)
+            address0 = TreeNode(self._input, index1, index1)
             self._offset = index1
-        self._cache['wind'][index0] = (address0, self._offset)
+        if memo is not None:
+            memo[index0] = (address0, self._offset)
         return address0
 
     def _read_wind_dir(self):
         address0, index0 = FAILURE, self._offset
-        cached = self._cache['wind_dir'].get(index0)
-        if cached:
-            self._offset = cached[1]
-            return cached[0]
+        memo = self._cache.get('wind_dir')
+        if memo is not None:
+            cached = memo.get(index0)
+            if cached:
+                self._offset = cached[1]
+                return cached[0]
         index1 = self._offset
         index2 = self._offset
         index3, elements0 = self._offset, []
@@ -737,7 +856,7 @@ class Grammar(object):
         if self._offset < self._input_size:
             chunk0 = self._input[self._offset:self._offset + 1]
         if chunk0 is not None and Grammar.REGEX_6.search(chunk0):
-            address1 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+            address1 = TreeNode(self._input, self._offset, self._offset + 1)
             self._offset = self._offset + 1
         else:
             address1 = FAILURE
@@ -753,7 +872,7 @@ class Grammar(object):
             if self._offset < self._input_size:
                 chunk1 = self._input[self._offset:self._offset + 1]
             if chunk1 is not None and Grammar.REGEX_7.search(chunk1):
-                address2 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+                address2 = TreeNode(self._input, self._offset, self._offset + 1)
                 self._offset = self._offset + 1
             else:
                 address2 = FAILURE
@@ -769,7 +888,7 @@ class Grammar(object):
                 if self._offset < self._input_size:
                     chunk2 = self._input[self._offset:self._offset + 1]
                 if chunk2 is not None and Grammar.REGEX_8.search(chunk2):
-                    address3 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+                    address3 = TreeNode(self._input, self._offset, self._offset + 1)
                     self._offset = self._offset + 1
                 else:
                     address3 = FAILURE
@@ -792,7 +911,7 @@ class Grammar(object):
         if elements0 is None:
             address0 = FAILURE
         else:
-            address0 = TreeNode(self._input[index3:self._offset], index3, elements0)
+            address0 = TreeNode(self._input, index3, self._offset, elements0)
             self._offset = self._offset
         if address0 is FAILURE:
             self._offset = index2
@@ -800,7 +919,7 @@ class Grammar(object):
             if self._offset < self._input_size:
                 chunk3 = self._input[self._offset:self._offset + 3]
             if chunk3 == 'VAR':
-                address0 = TreeNode(self._input[self._offset:self._offset + 3], self._offset)
+                address0 = TreeNode(self._input, self._offset, self._offset + 3)
                 self._offset = self._offset + 3
             else:
                 address0 = FAILURE
@@ -815,7 +934,7 @@ class Grammar(object):
                 if self._offset < self._input_size:
                     chunk4 = self._input[self._offset:self._offset + 3]
                 if chunk4 == 'VRB':
-                    address0 = TreeNode(self._input[self._offset:self._offset + 3], self._offset)
+                    address0 = TreeNode(self._input, self._offset, self._offset + 3)
                     self._offset = self._offset + 3
                 else:
                     address0 = FAILURE
@@ -830,7 +949,7 @@ class Grammar(object):
                     if self._offset < self._input_size:
                         chunk5 = self._input[self._offset:self._offset + 3]
                     if chunk5 == '///':
-                        address0 = TreeNode(self._input[self._offset:self._offset + 3], self._offset)
+                        address0 = TreeNode(self._input, self._offset, self._offset + 3)
                         self._offset = self._offset + 3
                     else:
                         address0 = FAILURE
@@ -842,17 +961,20 @@ class Grammar(object):
                     if address0 is FAILURE:
                         self._offset = index2
         if address0 is FAILURE:
-            address0 = TreeNode(self._input[index1:index1], index1)
+            address0 = TreeNode(self._input, index1, index1)
             self._offset = index1
-        self._cache['wind_dir'][index0] = (address0, self._offset)
+        if memo is not None:
+            memo[index0] = (address0, self._offset)
         return address0
 
     def _read_wind_spd(self):
         address0, index0 = FAILURE, self._offset
-        cached = self._cache['wind_spd'].get(index0)
-        if cached:
-            self._offset = cached[1]
-            return cached[0]
+        memo = self._cache.get('wind_spd')
+        if memo is not None:
+            cached = memo.get(index0)
+            if cached:
+                self._offset = cached[1]
+                return cached[0]
         index1 = self._offset
         index2 = self._offset
         index3, elements0 = self._offset, []
@@ -861,7 +983,7 @@ class Grammar(object):
         if self._offset < self._input_size:
             chunk0 = self._input[self._offset:self._offset + 1]
         if chunk0 is not None and Grammar.REGEX_9.search(chunk0):
-            address1 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+            address1 = TreeNode(self._input, self._offset, self._offset + 1)
             self._offset = self._offset + 1
         else:
             address1 = FAILURE
@@ -877,7 +999,7 @@ class Grammar(object):
             if self._offset < self._input_size:
                 chunk1 = self._input[self._offset:self._offset + 1]
             if chunk1 is not None and Grammar.REGEX_10.search(chunk1):
-                address2 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+                address2 = TreeNode(self._input, self._offset, self._offset + 1)
                 self._offset = self._offset + 1
             else:
                 address2 = FAILURE
@@ -894,7 +1016,7 @@ class Grammar(object):
                 if self._offset < self._input_size:
                     chunk2 = self._input[self._offset:self._offset + 1]
                 if chunk2 is not None and Grammar.REGEX_11.search(chunk2):
-                    address3 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+                    address3 = TreeNode(self._input, self._offset, self._offset + 1)
                     self._offset = self._offset + 1
                 else:
                     address3 = FAILURE
@@ -904,7 +1026,7 @@ class Grammar(object):
                     if self._offset == self._failure:
                         self._expected.append('[\\d]')
                 if address3 is FAILURE:
-                    address3 = TreeNode(self._input[index4:index4], index4)
+                    address3 = TreeNode(self._input, index4, index4)
                     self._offset = index4
                 if address3 is not FAILURE:
                     elements0.append(address3)
@@ -920,7 +1042,7 @@ class Grammar(object):
         if elements0 is None:
             address0 = FAILURE
         else:
-            address0 = TreeNode(self._input[index3:self._offset], index3, elements0)
+            address0 = TreeNode(self._input, index3, self._offset, elements0)
             self._offset = self._offset
         if address0 is FAILURE:
             self._offset = index2
@@ -928,7 +1050,7 @@ class Grammar(object):
             if self._offset < self._input_size:
                 chunk3 = self._input[self._offset:self._offset + 2]
             if chunk3 == '//':
-                address0 = TreeNode(self._input[self._offset:self._offset + 2], self._offset)
+                address0 = TreeNode(self._input, self._offset, self._offset + 2)
                 self._offset = self._offset + 2
             else:
                 address0 = FAILURE
@@ -940,24 +1062,27 @@ class Grammar(object):
             if address0 is FAILURE:
                 self._offset = index2
         if address0 is FAILURE:
-            address0 = TreeNode(self._input[index1:index1], index1)
+            address0 = TreeNode(self._input, index1, index1)
             self._offset = index1
-        self._cache['wind_spd'][index0] = (address0, self._offset)
+        if memo is not None:
+            memo[index0] = (address0, self._offset)
         return address0
 
     def _read_gust(self):
         address0, index0 = FAILURE, self._offset
-        cached = self._cache['gust'].get(index0)
-        if cached:
-            self._offset = cached[1]
-            return cached[0]
+        memo = self._cache.get('gust')
+        if memo is not None:
+            cached = memo.get(index0)
+            if cached:
+                self._offset = cached[1]
+                return cached[0]
         index1, elements0 = self._offset, []
         address1 = FAILURE
         chunk0 = None
         if self._offset < self._input_size:
             chunk0 = self._input[self._offset:self._offset + 1]
         if chunk0 == 'G':
-            address1 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+            address1 = TreeNode(self._input, self._offset, self._offset + 1)
             self._offset = self._offset + 1
         else:
             address1 = FAILURE
@@ -975,7 +1100,7 @@ class Grammar(object):
                 if self._offset < self._input_size:
                     chunk1 = self._input[self._offset:self._offset + 1]
                 if chunk1 is not None and Grammar.REGEX_12.search(chunk1):
-                    address3 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+                    address3 = TreeNode(self._input, self._offset, self._offset + 1)
                     self._offset = self._offset + 1
                 else:
                     address3 = FAILURE
@@ -988,7 +1113,7 @@ class Grammar(object):
                     elements1.append(address3)
                     remaining0 -= 1
             if remaining0 <= 0:
-                address2 = TreeNode(self._input[index2:self._offset], index2, elements1)
+                address2 = TreeNode(self._input, index2, self._offset, elements1)
                 self._offset = self._offset
             else:
                 address2 = FAILURE
@@ -1003,17 +1128,20 @@ class Grammar(object):
         if elements0 is None:
             address0 = FAILURE
         else:
-            address0 = TreeNode(self._input[index1:self._offset], index1, elements0)
+            address0 = TreeNode(self._input, index1, self._offset, elements0)
             self._offset = self._offset
-        self._cache['gust'][index0] = (address0, self._offset)
+        if memo is not None:
+            memo[index0] = (address0, self._offset)
         return address0
 
     def _read_varwind(self):
         address0, index0 = FAILURE, self._offset
-        cached = self._cache['varwind'].get(index0)
-        if cached:
-            self._offset = cached[1]
-            return cached[0]
+        memo = self._cache.get('varwind')
+        if memo is not None:
+            cached = memo.get(index0)
+            if cached:
+                self._offset = cached[1]
+                return cached[0]
         index1, elements0 = self._offset, []
         address1 = FAILURE
         address1 = self._read_sep()
@@ -1024,7 +1152,7 @@ class Grammar(object):
             if self._offset < self._input_size:
                 chunk0 = self._input[self._offset:self._offset + 1]
             if chunk0 is not None and Grammar.REGEX_13.search(chunk0):
-                address2 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+                address2 = TreeNode(self._input, self._offset, self._offset + 1)
                 self._offset = self._offset + 1
             else:
                 address2 = FAILURE
@@ -1040,7 +1168,7 @@ class Grammar(object):
                 if self._offset < self._input_size:
                     chunk1 = self._input[self._offset:self._offset + 1]
                 if chunk1 is not None and Grammar.REGEX_14.search(chunk1):
-                    address3 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+                    address3 = TreeNode(self._input, self._offset, self._offset + 1)
                     self._offset = self._offset + 1
                 else:
                     address3 = FAILURE
@@ -1056,7 +1184,7 @@ class Grammar(object):
                     if self._offset < self._input_size:
                         chunk2 = self._input[self._offset:self._offset + 1]
                     if chunk2 is not None and Grammar.REGEX_15.search(chunk2):
-                        address4 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+                        address4 = TreeNode(self._input, self._offset, self._offset + 1)
                         self._offset = self._offset + 1
                     else:
                         address4 = FAILURE
@@ -1072,7 +1200,7 @@ class Grammar(object):
                         if self._offset < self._input_size:
                             chunk3 = self._input[self._offset:self._offset + 1]
                         if chunk3 == 'V':
-                            address5 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+                            address5 = TreeNode(self._input, self._offset, self._offset + 1)
                             self._offset = self._offset + 1
                         else:
                             address5 = FAILURE
@@ -1088,7 +1216,7 @@ class Grammar(object):
                             if self._offset < self._input_size:
                                 chunk4 = self._input[self._offset:self._offset + 1]
                             if chunk4 is not None and Grammar.REGEX_16.search(chunk4):
-                                address6 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+                                address6 = TreeNode(self._input, self._offset, self._offset + 1)
                                 self._offset = self._offset + 1
                             else:
                                 address6 = FAILURE
@@ -1104,7 +1232,7 @@ class Grammar(object):
                                 if self._offset < self._input_size:
                                     chunk5 = self._input[self._offset:self._offset + 1]
                                 if chunk5 is not None and Grammar.REGEX_17.search(chunk5):
-                                    address7 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+                                    address7 = TreeNode(self._input, self._offset, self._offset + 1)
                                     self._offset = self._offset + 1
                                 else:
                                     address7 = FAILURE
@@ -1120,7 +1248,7 @@ class Grammar(object):
                                     if self._offset < self._input_size:
                                         chunk6 = self._input[self._offset:self._offset + 1]
                                     if chunk6 is not None and Grammar.REGEX_18.search(chunk6):
-                                        address8 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+                                        address8 = TreeNode(self._input, self._offset, self._offset + 1)
                                         self._offset = self._offset + 1
                                     else:
                                         address8 = FAILURE
@@ -1158,17 +1286,20 @@ class Grammar(object):
         if elements0 is None:
             address0 = FAILURE
         else:
-            address0 = TreeNode5(self._input[index1:self._offset], index1, elements0)
+            address0 = TreeNode5(self._input, index1, self._offset, elements0)
             self._offset = self._offset
-        self._cache['varwind'][index0] = (address0, self._offset)
+        if memo is not None:
+            memo[index0] = (address0, self._offset)
         return address0
 
     def _read_vis(self):
         address0, index0 = FAILURE, self._offset
-        cached = self._cache['vis'].get(index0)
-        if cached:
-            self._offset = cached[1]
-            return cached[0]
+        memo = self._cache.get('vis')
+        if memo is not None:
+            cached = memo.get(index0)
+            if cached:
+                self._offset = cached[1]
+                return cached[0]
         index1 = self._offset
         index2, elements0 = self._offset, []
         address1 = FAILURE
@@ -1183,7 +1314,7 @@ class Grammar(object):
             if self._offset < self._input_size:
                 chunk0 = self._input[self._offset:self._offset + 1]
             if chunk0 is not None and Grammar.REGEX_19.search(chunk0):
-                address3 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+                address3 = TreeNode(self._input, self._offset, self._offset + 1)
                 self._offset = self._offset + 1
             else:
                 address3 = FAILURE
@@ -1199,7 +1330,7 @@ class Grammar(object):
                 if self._offset < self._input_size:
                     chunk1 = self._input[self._offset:self._offset + 1]
                 if chunk1 is not None and Grammar.REGEX_20.search(chunk1):
-                    address4 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+                    address4 = TreeNode(self._input, self._offset, self._offset + 1)
                     self._offset = self._offset + 1
                 else:
                     address4 = FAILURE
@@ -1215,7 +1346,7 @@ class Grammar(object):
                     if self._offset < self._input_size:
                         chunk2 = self._input[self._offset:self._offset + 1]
                     if chunk2 is not None and Grammar.REGEX_21.search(chunk2):
-                        address5 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+                        address5 = TreeNode(self._input, self._offset, self._offset + 1)
                         self._offset = self._offset + 1
                     else:
                         address5 = FAILURE
@@ -1231,7 +1362,7 @@ class Grammar(object):
                         if self._offset < self._input_size:
                             chunk3 = self._input[self._offset:self._offset + 1]
                         if chunk3 is not None and Grammar.REGEX_22.search(chunk3):
-                            address6 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+                            address6 = TreeNode(self._input, self._offset, self._offset + 1)
                             self._offset = self._offset + 1
                         else:
                             address6 = FAILURE
@@ -1248,7 +1379,7 @@ class Grammar(object):
                             if self._offset < self._input_size:
                                 chunk4 = self._input[self._offset:self._offset + 3]
                             if chunk4 == 'NDV':
-                                address7 = TreeNode(self._input[self._offset:self._offset + 3], self._offset)
+                                address7 = TreeNode(self._input, self._offset, self._offset + 3)
                                 self._offset = self._offset + 3
                             else:
                                 address7 = FAILURE
@@ -1258,7 +1389,7 @@ class Grammar(object):
                                 if self._offset == self._failure:
                                     self._expected.append('"NDV"')
                             if address7 is FAILURE:
-                                address7 = TreeNode(self._input[index5:index5], index5)
+                                address7 = TreeNode(self._input, index5, index5)
                                 self._offset = index5
                             if address7 is not FAILURE:
                                 elements1.append(address7)
@@ -1280,7 +1411,7 @@ class Grammar(object):
             if elements1 is None:
                 address2 = FAILURE
             else:
-                address2 = TreeNode(self._input[index4:self._offset], index4, elements1)
+                address2 = TreeNode(self._input, index4, self._offset, elements1)
                 self._offset = self._offset
             if address2 is FAILURE:
                 self._offset = index3
@@ -1290,7 +1421,7 @@ class Grammar(object):
                 if self._offset < self._input_size:
                     chunk5 = self._input[self._offset:self._offset + 1]
                 if chunk5 is not None and Grammar.REGEX_23.search(chunk5):
-                    address8 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+                    address8 = TreeNode(self._input, self._offset, self._offset + 1)
                     self._offset = self._offset + 1
                 else:
                     address8 = FAILURE
@@ -1308,7 +1439,7 @@ class Grammar(object):
                     if self._offset < self._input_size:
                         chunk6 = self._input[self._offset:self._offset + 1]
                     if chunk6 is not None and Grammar.REGEX_24.search(chunk6):
-                        address9 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+                        address9 = TreeNode(self._input, self._offset, self._offset + 1)
                         self._offset = self._offset + 1
                     else:
                         address9 = FAILURE
@@ -1328,7 +1459,7 @@ class Grammar(object):
                         if self._offset < self._input_size:
                             chunk7 = self._input[self._offset:self._offset + 1]
                         if chunk7 == ' ':
-                            address11 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+                            address11 = TreeNode(self._input, self._offset, self._offset + 1)
                             self._offset = self._offset + 1
                         else:
                             address11 = FAILURE
@@ -1344,7 +1475,7 @@ class Grammar(object):
                             if self._offset < self._input_size:
                                 chunk8 = self._input[self._offset:self._offset + 1]
                             if chunk8 is not None and Grammar.REGEX_25.search(chunk8):
-                                address12 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+                                address12 = TreeNode(self._input, self._offset, self._offset + 1)
                                 self._offset = self._offset + 1
                             else:
                                 address12 = FAILURE
@@ -1364,10 +1495,10 @@ class Grammar(object):
                         if elements4 is None:
                             address10 = FAILURE
                         else:
-                            address10 = TreeNode(self._input[index11:self._offset], index11, elements4)
+                            address10 = TreeNode(self._input, index11, self._offset, elements4)
                             self._offset = self._offset
                         if address10 is FAILURE:
-                            address10 = TreeNode(self._input[index10:index10], index10)
+                            address10 = TreeNode(self._input, index10, index10)
                             self._offset = index10
                         if address10 is not FAILURE:
                             elements3.append(address10)
@@ -1376,7 +1507,7 @@ class Grammar(object):
                             if self._offset < self._input_size:
                                 chunk9 = self._input[self._offset:self._offset + 1]
                             if chunk9 == '/':
-                                address13 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+                                address13 = TreeNode(self._input, self._offset, self._offset + 1)
                                 self._offset = self._offset + 1
                             else:
                                 address13 = FAILURE
@@ -1392,7 +1523,7 @@ class Grammar(object):
                                 if self._offset < self._input_size:
                                     chunk10 = self._input[self._offset:self._offset + 1]
                                 if chunk10 is not None and Grammar.REGEX_26.search(chunk10):
-                                    address14 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+                                    address14 = TreeNode(self._input, self._offset, self._offset + 1)
                                     self._offset = self._offset + 1
                                 else:
                                     address14 = FAILURE
@@ -1415,12 +1546,12 @@ class Grammar(object):
                         if elements3 is None:
                             address9 = FAILURE
                         else:
-                            address9 = TreeNode(self._input[index9:self._offset], index9, elements3)
+                            address9 = TreeNode(self._input, index9, self._offset, elements3)
                             self._offset = self._offset
                         if address9 is FAILURE:
                             self._offset = index8
                     if address9 is FAILURE:
-                        address9 = TreeNode(self._input[index7:index7], index7)
+                        address9 = TreeNode(self._input, index7, index7)
                         self._offset = index7
                     if address9 is not FAILURE:
                         elements2.append(address9)
@@ -1429,7 +1560,7 @@ class Grammar(object):
                         if self._offset < self._input_size:
                             chunk11 = self._input[self._offset:self._offset + 2]
                         if chunk11 == 'SM':
-                            address15 = TreeNode(self._input[self._offset:self._offset + 2], self._offset)
+                            address15 = TreeNode(self._input, self._offset, self._offset + 2)
                             self._offset = self._offset + 2
                         else:
                             address15 = FAILURE
@@ -1452,7 +1583,7 @@ class Grammar(object):
                 if elements2 is None:
                     address2 = FAILURE
                 else:
-                    address2 = TreeNode(self._input[index6:self._offset], index6, elements2)
+                    address2 = TreeNode(self._input, index6, self._offset, elements2)
                     self._offset = self._offset
                 if address2 is FAILURE:
                     self._offset = index3
@@ -1460,7 +1591,7 @@ class Grammar(object):
                     if self._offset < self._input_size:
                         chunk12 = self._input[self._offset:self._offset + 5]
                     if chunk12 == 'CAVOK':
-                        address2 = TreeNode(self._input[self._offset:self._offset + 5], self._offset)
+                        address2 = TreeNode(self._input, self._offset, self._offset + 5)
                         self._offset = self._offset + 5
                     else:
                         address2 = FAILURE
@@ -1482,20 +1613,23 @@ class Grammar(object):
         if elements0 is None:
             address0 = FAILURE
         else:
-            address0 = TreeNode6(self._input[index2:self._offset], index2, elements0)
+            address0 = TreeNode6(self._input, index2, self._offset, elements0)
             self._offset = self._offset
         if address0 is FAILURE:
-            address0 = TreeNode(self._input[index1:index1], index1)
+            address0 = TreeNode(self._input, index1, index1)
             self._offset = index1
-        self._cache['vis'][index0] = (address0, self._offset)
+        if memo is not None:
+            memo[index0] = (address0, self._offset)
         return address0
 
     def _read_run(self):
         address0, index0 = FAILURE, self._offset
-        cached = self._cache['run'].get(index0)
-        if cached:
-            self._offset = cached[1]
-            return cached[0]
+        memo = self._cache.get('run')
+        if memo is not None:
+            cached = memo.get(index0)
+            if cached:
+                self._offset = cached[1]
+                return cached[0]
         index1 = self._offset
         index2, elements0 = self._offset, []
         address1 = FAILURE
@@ -1507,7 +1641,7 @@ class Grammar(object):
             if self._offset < self._input_size:
                 chunk0 = self._input[self._offset:self._offset + 1]
             if chunk0 == 'R':
-                address2 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+                address2 = TreeNode(self._input, self._offset, self._offset + 1)
                 self._offset = self._offset + 1
             else:
                 address2 = FAILURE
@@ -1524,7 +1658,7 @@ class Grammar(object):
                 if self._offset < self._input_size:
                     chunk1 = self._input[self._offset:self._offset + 1]
                 if chunk1 is not None and Grammar.REGEX_27.search(chunk1):
-                    address3 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+                    address3 = TreeNode(self._input, self._offset, self._offset + 1)
                     self._offset = self._offset + 1
                 else:
                     address3 = FAILURE
@@ -1534,7 +1668,7 @@ class Grammar(object):
                     if self._offset == self._failure:
                         self._expected.append('[LRC]')
                 if address3 is FAILURE:
-                    address3 = TreeNode(self._input[index3:index3], index3)
+                    address3 = TreeNode(self._input, index3, index3)
                     self._offset = index3
                 if address3 is not FAILURE:
                     elements0.append(address3)
@@ -1543,7 +1677,7 @@ class Grammar(object):
                     if self._offset < self._input_size:
                         chunk2 = self._input[self._offset:self._offset + 1]
                     if chunk2 is not None and Grammar.REGEX_28.search(chunk2):
-                        address4 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+                        address4 = TreeNode(self._input, self._offset, self._offset + 1)
                         self._offset = self._offset + 1
                     else:
                         address4 = FAILURE
@@ -1559,7 +1693,7 @@ class Grammar(object):
                         if self._offset < self._input_size:
                             chunk3 = self._input[self._offset:self._offset + 1]
                         if chunk3 is not None and Grammar.REGEX_29.search(chunk3):
-                            address5 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+                            address5 = TreeNode(self._input, self._offset, self._offset + 1)
                             self._offset = self._offset + 1
                         else:
                             address5 = FAILURE
@@ -1576,7 +1710,7 @@ class Grammar(object):
                             if self._offset < self._input_size:
                                 chunk4 = self._input[self._offset:self._offset + 1]
                             if chunk4 is not None and Grammar.REGEX_30.search(chunk4):
-                                address6 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+                                address6 = TreeNode(self._input, self._offset, self._offset + 1)
                                 self._offset = self._offset + 1
                             else:
                                 address6 = FAILURE
@@ -1586,7 +1720,7 @@ class Grammar(object):
                                 if self._offset == self._failure:
                                     self._expected.append('[LRC]')
                             if address6 is FAILURE:
-                                address6 = TreeNode(self._input[index4:index4], index4)
+                                address6 = TreeNode(self._input, index4, index4)
                                 self._offset = index4
                             if address6 is not FAILURE:
                                 elements0.append(address6)
@@ -1595,7 +1729,7 @@ class Grammar(object):
                                 if self._offset < self._input_size:
                                     chunk5 = self._input[self._offset:self._offset + 1]
                                 if chunk5 == '/':
-                                    address7 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+                                    address7 = TreeNode(self._input, self._offset, self._offset + 1)
                                     self._offset = self._offset + 1
                                 else:
                                     address7 = FAILURE
@@ -1614,7 +1748,7 @@ class Grammar(object):
                                     if self._offset < self._input_size:
                                         chunk6 = self._input[self._offset:self._offset + 1]
                                     if chunk6 is not None and Grammar.REGEX_31.search(chunk6):
-                                        address9 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+                                        address9 = TreeNode(self._input, self._offset, self._offset + 1)
                                         self._offset = self._offset + 1
                                     else:
                                         address9 = FAILURE
@@ -1630,7 +1764,7 @@ class Grammar(object):
                                         if self._offset < self._input_size:
                                             chunk7 = self._input[self._offset:self._offset + 1]
                                         if chunk7 is not None and Grammar.REGEX_32.search(chunk7):
-                                            address10 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+                                            address10 = TreeNode(self._input, self._offset, self._offset + 1)
                                             self._offset = self._offset + 1
                                         else:
                                             address10 = FAILURE
@@ -1646,7 +1780,7 @@ class Grammar(object):
                                             if self._offset < self._input_size:
                                                 chunk8 = self._input[self._offset:self._offset + 1]
                                             if chunk8 is not None and Grammar.REGEX_33.search(chunk8):
-                                                address11 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+                                                address11 = TreeNode(self._input, self._offset, self._offset + 1)
                                                 self._offset = self._offset + 1
                                             else:
                                                 address11 = FAILURE
@@ -1662,7 +1796,7 @@ class Grammar(object):
                                                 if self._offset < self._input_size:
                                                     chunk9 = self._input[self._offset:self._offset + 1]
                                                 if chunk9 is not None and Grammar.REGEX_34.search(chunk9):
-                                                    address12 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+                                                    address12 = TreeNode(self._input, self._offset, self._offset + 1)
                                                     self._offset = self._offset + 1
                                                 else:
                                                     address12 = FAILURE
@@ -1678,7 +1812,7 @@ class Grammar(object):
                                                     if self._offset < self._input_size:
                                                         chunk10 = self._input[self._offset:self._offset + 1]
                                                     if chunk10 == 'V':
-                                                        address13 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+                                                        address13 = TreeNode(self._input, self._offset, self._offset + 1)
                                                         self._offset = self._offset + 1
                                                     else:
                                                         address13 = FAILURE
@@ -1707,10 +1841,10 @@ class Grammar(object):
                                     if elements1 is None:
                                         address8 = FAILURE
                                     else:
-                                        address8 = TreeNode(self._input[index6:self._offset], index6, elements1)
+                                        address8 = TreeNode(self._input, index6, self._offset, elements1)
                                         self._offset = self._offset
                                     if address8 is FAILURE:
-                                        address8 = TreeNode(self._input[index5:index5], index5)
+                                        address8 = TreeNode(self._input, index5, index5)
                                         self._offset = index5
                                     if address8 is not FAILURE:
                                         elements0.append(address8)
@@ -1720,7 +1854,7 @@ class Grammar(object):
                                         if self._offset < self._input_size:
                                             chunk11 = self._input[self._offset:self._offset + 1]
                                         if chunk11 is not None and Grammar.REGEX_35.search(chunk11):
-                                            address14 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+                                            address14 = TreeNode(self._input, self._offset, self._offset + 1)
                                             self._offset = self._offset + 1
                                         else:
                                             address14 = FAILURE
@@ -1730,7 +1864,7 @@ class Grammar(object):
                                             if self._offset == self._failure:
                                                 self._expected.append('["M" / "P"]')
                                         if address14 is FAILURE:
-                                            address14 = TreeNode(self._input[index7:index7], index7)
+                                            address14 = TreeNode(self._input, index7, index7)
                                             self._offset = index7
                                         if address14 is not FAILURE:
                                             elements0.append(address14)
@@ -1739,7 +1873,7 @@ class Grammar(object):
                                             if self._offset < self._input_size:
                                                 chunk12 = self._input[self._offset:self._offset + 1]
                                             if chunk12 is not None and Grammar.REGEX_36.search(chunk12):
-                                                address15 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+                                                address15 = TreeNode(self._input, self._offset, self._offset + 1)
                                                 self._offset = self._offset + 1
                                             else:
                                                 address15 = FAILURE
@@ -1755,7 +1889,7 @@ class Grammar(object):
                                                 if self._offset < self._input_size:
                                                     chunk13 = self._input[self._offset:self._offset + 1]
                                                 if chunk13 is not None and Grammar.REGEX_37.search(chunk13):
-                                                    address16 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+                                                    address16 = TreeNode(self._input, self._offset, self._offset + 1)
                                                     self._offset = self._offset + 1
                                                 else:
                                                     address16 = FAILURE
@@ -1771,7 +1905,7 @@ class Grammar(object):
                                                     if self._offset < self._input_size:
                                                         chunk14 = self._input[self._offset:self._offset + 1]
                                                     if chunk14 is not None and Grammar.REGEX_38.search(chunk14):
-                                                        address17 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+                                                        address17 = TreeNode(self._input, self._offset, self._offset + 1)
                                                         self._offset = self._offset + 1
                                                     else:
                                                         address17 = FAILURE
@@ -1787,7 +1921,7 @@ class Grammar(object):
                                                         if self._offset < self._input_size:
                                                             chunk15 = self._input[self._offset:self._offset + 1]
                                                         if chunk15 is not None and Grammar.REGEX_39.search(chunk15):
-                                                            address18 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+                                                            address18 = TreeNode(self._input, self._offset, self._offset + 1)
                                                             self._offset = self._offset + 1
                                                         else:
                                                             address18 = FAILURE
@@ -1803,7 +1937,7 @@ class Grammar(object):
                                                             if self._offset < self._input_size:
                                                                 chunk16 = self._input[self._offset:self._offset + 2]
                                                             if chunk16 == 'FT':
-                                                                address19 = TreeNode(self._input[self._offset:self._offset + 2], self._offset)
+                                                                address19 = TreeNode(self._input, self._offset, self._offset + 2)
                                                                 self._offset = self._offset + 2
                                                             else:
                                                                 address19 = FAILURE
@@ -1859,20 +1993,23 @@ class Grammar(object):
         if elements0 is None:
             address0 = FAILURE
         else:
-            address0 = TreeNode7(self._input[index2:self._offset], index2, elements0)
+            address0 = TreeNode7(self._input, index2, self._offset, elements0)
             self._offset = self._offset
         if address0 is FAILURE:
-            address0 = TreeNode(self._input[index1:index1], index1)
+            address0 = TreeNode(self._input, index1, index1)
             self._offset = index1
-        self._cache['run'][index0] = (address0, self._offset)
+        if memo is not None:
+            memo[index0] = (address0, self._offset)
         return address0
 
     def _read_curwx(self):
         address0, index0 = FAILURE, self._offset
-        cached = self._cache['curwx'].get(index0)
-        if cached:
-            self._offset = cached[1]
-            return cached[0]
+        memo = self._cache.get('curwx')
+        if memo is not None:
+            cached = memo.get(index0)
+            if cached:
+                self._offset = cached[1]
+                return cached[0]
         index1 = self._offset
         remaining0, index2, elements0, address1 = 0, self._offset, [], True
         while address1 is not FAILURE:
@@ -1894,28 +2031,31 @@ class Grammar(object):
             if elements1 is None:
                 address1 = FAILURE
             else:
-                address1 = TreeNode8(self._input[index3:self._offset], index3, elements1)
+                address1 = TreeNode8(self._input, index3, self._offset, elements1)
                 self._offset = self._offset
             if address1 is not FAILURE:
                 elements0.append(address1)
                 remaining0 -= 1
         if remaining0 <= 0:
-            address0 = TreeNode(self._input[index2:self._offset], index2, elements0)
+            address0 = TreeNode(self._input, index2, self._offset, elements0)
             self._offset = self._offset
         else:
             address0 = FAILURE
         if address0 is FAILURE:
-            address0 = TreeNode(self._input[index1:index1], index1)
+            address0 = TreeNode(self._input, index1, index1)
             self._offset = index1
-        self._cache['curwx'][index0] = (address0, self._offset)
+        if memo is not None:
+            memo[index0] = (address0, self._offset)
         return address0
 
     def _read_wx(self):
         address0, index0 = FAILURE, self._offset
-        cached = self._cache['wx'].get(index0)
-        if cached:
-            self._offset = cached[1]
-            return cached[0]
+        memo = self._cache.get('wx')
+        if memo is not None:
+            cached = memo.get(index0)
+            if cached:
+                self._offset = cached[1]
+                return cached[0]
         index1, elements0 = self._offset, []
         address1 = FAILURE
         index2 = self._offset
@@ -1924,7 +2064,7 @@ class Grammar(object):
         if self._offset < self._input_size:
             chunk0 = self._input[self._offset:self._offset + 1]
         if chunk0 is not None and Grammar.REGEX_40.search(chunk0):
-            address1 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+            address1 = TreeNode(self._input, self._offset, self._offset + 1)
             self._offset = self._offset + 1
         else:
             address1 = FAILURE
@@ -1939,7 +2079,7 @@ class Grammar(object):
             if self._offset < self._input_size:
                 chunk1 = self._input[self._offset:self._offset + 2]
             if chunk1 == 'VC':
-                address1 = TreeNode(self._input[self._offset:self._offset + 2], self._offset)
+                address1 = TreeNode(self._input, self._offset, self._offset + 2)
                 self._offset = self._offset + 2
             else:
                 address1 = FAILURE
@@ -1951,207 +2091,11 @@ class Grammar(object):
             if address1 is FAILURE:
                 self._offset = index3
         if address1 is FAILURE:
-            address1 = TreeNode(self._input[index2:index2], index2)
+            address1 = TreeNode(self._input, index2, index2)
             self._offset = index2
         if address1 is not FAILURE:
             elements0.append(address1)
-            address2 = FAILURE
-            index4 = self._offset
-            chunk2 = None
-            if self._offset < self._input_size:
-                chunk2 = self._input[self._offset:self._offset + 2]
-            if chunk2 == 'MI':
-                address2 = TreeNode(self._input[self._offset:self._offset + 2], self._offset)
-                self._offset = self._offset + 2
-            else:
-                address2 = FAILURE
-                if self._offset > self._failure:
-                    self._failure = self._offset
-                    self._expected = []
-                if self._offset == self._failure:
-                    self._expected.append('"MI"')
-            if address2 is FAILURE:
-                self._offset = index4
-                chunk3 = None
-                if self._offset < self._input_size:
-                    chunk3 = self._input[self._offset:self._offset + 2]
-                if chunk3 == 'PR':
-                    address2 = TreeNode(self._input[self._offset:self._offset + 2], self._offset)
-                    self._offset = self._offset + 2
-                else:
-                    address2 = FAILURE
-                    if self._offset > self._failure:
-                        self._failure = self._offset
-                        self._expected = []
-                    if self._offset == self._failure:
-                        self._expected.append('"PR"')
-                if address2 is FAILURE:
-                    self._offset = index4
-                    chunk4 = None
-                    if self._offset < self._input_size:
-                        chunk4 = self._input[self._offset:self._offset + 2]
-                    if chunk4 == 'DR':
-                        address2 = TreeNode(self._input[self._offset:self._offset + 2], self._offset)
-                        self._offset = self._offset + 2
-                    else:
-                        address2 = FAILURE
-                        if self._offset > self._failure:
-                            self._failure = self._offset
-                            self._expected = []
-                        if self._offset == self._failure:
-                            self._expected.append('"DR"')
-                    if address2 is FAILURE:
-                        self._offset = index4
-                        chunk5 = None
-                        if self._offset < self._input_size:
-                            chunk5 = self._input[self._offset:self._offset + 2]
-                        if chunk5 == 'BL':
-                            address2 = TreeNode(self._input[self._offset:self._offset + 2], self._offset)
-                            self._offset = self._offset + 2
-                        else:
-                            address2 = FAILURE
-                            if self._offset > self._failure:
-                                self._failure = self._offset
-                                self._expected = []
-                            if self._offset == self._failure:
-                                self._expected.append('"BL"')
-                        if address2 is FAILURE:
-                            self._offset = index4
-                            chunk6 = None
-                            if self._offset < self._input_size:
-                                chunk6 = self._input[self._offset:self._offset + 2]
-                            if chunk6 == 'SH':
-                                address2 = TreeNode(self._input[self._offset:self._offset + 2], self._offset)
-                                self._offset = self._offset + 2
-                            else:
-                                address2 = FAILURE
-                                if self._offset > self._failure:
-                                    self._failure = self._offset
-                                    self._expected = []
-                                if self._offset == self._failure:
-                                    self._expected.append('"SH"')
-                            if address2 is FAILURE:
-                                self._offset = index4
-                                chunk7 = None
-                                if self._offset < self._input_size:
-                                    chunk7 = self._input[self._offset:self._offset + 2]
-                                if chunk7 == 'TS':
-                                    address2 = TreeNode(self._input[self._offset:self._offset + 2], self._offset)
-                                    self._offset = self._offset + 2
-                                else:
-                                    address2 = FAILURE
-                                    if self._offset > self._failure:
-                                        self._failure = self._offset
-                                        self._expected = []
-                                    if self._offset == self._failure:
-                                        self._expected.append('"TS"')
-                                if address2 is FAILURE:
-                                    self._offset = index4
-                                    chunk8 = None
-                                    if self._offset < self._input_size:
-                                        chunk8 = self._input[self._offset:self._offset + 2]
-                                    if chunk8 == 'FG':
-                                        address2 = TreeNode(self._input[self._offset:self._offset + 2], self._offset)
-                                        self._offset = self._offset + 2
-                                    else:
-                                        address2 = FAILURE
-                                        if self._offset > self._failure:
-                                            self._failure = self._offset
-                                            self._expected = []
-                                        if self._offset == self._failure:
-                                            self._expected.append('"FG"')
-                                    if address2 is FAILURE:
-                                        self._offset = index4
-                                        chunk9 = None
-                                        if self._offset < self._input_size:
-                                            chunk9 = self._input[self._offset:self._offset + 2]
-                                        if chunk9 == 'TS':
-                                            address2 = TreeNode(self._input[self._offset:self._offset + 2], self._offset)
-                                            self._offset = self._offset + 2
-                                        else:
-                                            address2 = FAILURE
-                                            if self._offset > self._failure:
-                                                self._failure = self._offset
-                                                self._expected = []
-                                            if self._offset == self._failure:
-                                                self._expected.append('"TS"')
-                                        if address2 is FAILURE:
-                                            self._offset = index4
-                                            chunk10 = None
-                                            if self._offset < self._input_size:
-                                                chunk10 = self._input[self._offset:self._offset + 2]
-                                            if chunk10 == 'FZ':
-                                                address2 = TreeNode(self._input[self._offset:self._offset + 2], self._offset)
-                                                self._offset = self._offset + 2
-                                            else:
-                                                address2 = FAILURE
-                                                if self._offset > self._failure:
-                                                    self._failure = self._offset
-                                                    self._expected = []
-                                                if self._offset == self._failure:
-                                                    self._expected.append('"FZ"')
-                                            if address2 is FAILURE:
-                                                self._offset = index4
-                                                chunk11 = None
-                                                if self._offset < self._input_size:
-                                                    chunk11 = self._input[self._offset:self._offset + 2]
-                                                if chunk11 == 'RA':
-                                                    address2 = TreeNode(self._input[self._offset:self._offset + 2], self._offset)
-                                                    self._offset = self._offset + 2
-                                                else:
-                                                    address2 = FAILURE
-                                                    if self._offset > self._failure:
-                                                        self._failure = self._offset
-                                                        self._expected = []
-                                                    if self._offset == self._failure:
-                                                        self._expected.append('"RA"')
-                                                if address2 is FAILURE:
-                                                    self._offset = index4
-                                                    chunk12 = None
-                                                    if self._offset < self._input_size:
-                                                        chunk12 = self._input[self._offset:self._offset + 2]
-                                                    if chunk12 == 'BR':
-                                                        address2 = TreeNode(self._input[self._offset:self._offset + 2], self._offset)
-                                                        self._offset = self._offset + 2
-                                                    else:
-                                                        address2 = FAILURE
-                                                        if self._offset > self._failure:
-                                                            self._failure = self._offset
-                                                            self._expected = []
-                                                        if self._offset == self._failure:
-                                                            self._expected.append('"BR"')
-                                                    if address2 is FAILURE:
-                                                        self._offset = index4
-                                                        chunk13 = None
-                                                        if self._offset < self._input_size:
-                                                            chunk13 = self._input[self._offset:self._offset + 2]
-                                                        if chunk13 == 'HZ':
-                                                            address2 = TreeNode(self._input[self._offset:self._offset + 2], self._offset)
-                                                            self._offset = self._offset + 2
-                                                        else:
-                                                            address2 = FAILURE
-                                                            if self._offset > self._failure:
-                                                                self._failure = self._offset
-                                                                self._expected = []
-                                                            if self._offset == self._failure:
-                                                                self._expected.append('"HZ"')
-                                                        if address2 is FAILURE:
-                                                            self._offset = index4
-                                                            chunk14 = None
-                                                            if self._offset < self._input_size:
-                                                                chunk14 = self._input[self._offset:self._offset + 2]
-                                                            if chunk14 == 'SN':
-                                                                address2 = TreeNode(self._input[self._offset:self._offset + 2], self._offset)
-                                                                self._offset = self._offset + 2
-                                                            else:
-                                                                address2 = FAILURE
-                                                                if self._offset > self._failure:
-                                                                    self._failure = self._offset
-                                                                    self._expected = []
-                                                                if self._offset == self._failure:
-                                                                    self._expected.append('"SN"')
-                                                            if address2 is FAILURE:
-                                                                self._offset = index4
+            address2 = self._read_literals(WEATHER)
             if address2 is not FAILURE:
                 elements0.append(address2)
                 address3 = FAILURE
@@ -2160,7 +2104,7 @@ class Grammar(object):
                 if self._offset < self._input_size:
                     chunk15 = self._input[self._offset:self._offset + 1]
                 if chunk15 is not None and Grammar.REGEX_41.search(chunk15):
-                    address3 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+                    address3 = TreeNode(self._input, self._offset, self._offset + 1)
                     self._offset = self._offset + 1
                 else:
                     address3 = FAILURE
@@ -2170,180 +2114,15 @@ class Grammar(object):
                     if self._offset == self._failure:
                         self._expected.append('[-+]')
                 if address3 is FAILURE:
-                    address3 = TreeNode(self._input[index5:index5], index5)
+                    address3 = TreeNode(self._input, index5, index5)
                     self._offset = index5
                 if address3 is not FAILURE:
                     elements0.append(address3)
                     address4 = FAILURE
                     index6 = self._offset
-                    index7 = self._offset
-                    chunk16 = None
-                    if self._offset < self._input_size:
-                        chunk16 = self._input[self._offset:self._offset + 2]
-                    if chunk16 == 'RA':
-                        address4 = TreeNode(self._input[self._offset:self._offset + 2], self._offset)
-                        self._offset = self._offset + 2
-                    else:
-                        address4 = FAILURE
-                        if self._offset > self._failure:
-                            self._failure = self._offset
-                            self._expected = []
-                        if self._offset == self._failure:
-                            self._expected.append('"RA"')
-                    if address4 is FAILURE:
-                        self._offset = index7
-                        chunk17 = None
-                        if self._offset < self._input_size:
-                            chunk17 = self._input[self._offset:self._offset + 2]
-                        if chunk17 == 'BR':
-                            address4 = TreeNode(self._input[self._offset:self._offset + 2], self._offset)
-                            self._offset = self._offset + 2
-                        else:
-                            address4 = FAILURE
-                            if self._offset > self._failure:
-                                self._failure = self._offset
-                                self._expected = []
-                            if self._offset == self._failure:
-                                self._expected.append('"BR"')
-                        if address4 is FAILURE:
-                            self._offset = index7
-                            chunk18 = None
-                            if self._offset < self._input_size:
-                                chunk18 = self._input[self._offset:self._offset + 2]
-                            if chunk18 == 'DZ':
-                                address4 = TreeNode(self._input[self._offset:self._offset + 2], self._offset)
-                                self._offset = self._offset + 2
-                            else:
-                                address4 = FAILURE
-                                if self._offset > self._failure:
-                                    self._failure = self._offset
-                                    self._expected = []
-                                if self._offset == self._failure:
-                                    self._expected.append('"DZ"')
-                            if address4 is FAILURE:
-                                self._offset = index7
-                                chunk19 = None
-                                if self._offset < self._input_size:
-                                    chunk19 = self._input[self._offset:self._offset + 2]
-                                if chunk19 == 'FG':
-                                    address4 = TreeNode(self._input[self._offset:self._offset + 2], self._offset)
-                                    self._offset = self._offset + 2
-                                else:
-                                    address4 = FAILURE
-                                    if self._offset > self._failure:
-                                        self._failure = self._offset
-                                        self._expected = []
-                                    if self._offset == self._failure:
-                                        self._expected.append('"FG"')
-                                if address4 is FAILURE:
-                                    self._offset = index7
-                                    chunk20 = None
-                                    if self._offset < self._input_size:
-                                        chunk20 = self._input[self._offset:self._offset + 2]
-                                    if chunk20 == 'FU':
-                                        address4 = TreeNode(self._input[self._offset:self._offset + 2], self._offset)
-                                        self._offset = self._offset + 2
-                                    else:
-                                        address4 = FAILURE
-                                        if self._offset > self._failure:
-                                            self._failure = self._offset
-                                            self._expected = []
-                                        if self._offset == self._failure:
-                                            self._expected.append('"FU"')
-                                    if address4 is FAILURE:
-                                        self._offset = index7
-                                        chunk21 = None
-                                        if self._offset < self._input_size:
-                                            chunk21 = self._input[self._offset:self._offset + 2]
-                                        if chunk21 == 'VA':
-                                            address4 = TreeNode(self._input[self._offset:self._offset + 2], self._offset)
-                                            self._offset = self._offset + 2
-                                        else:
-                                            address4 = FAILURE
-                                            if self._offset > self._failure:
-                                                self._failure = self._offset
-                                                self._expected = []
-                                            if self._offset == self._failure:
-                                                self._expected.append('"VA"')
-                                        if address4 is FAILURE:
-                                            self._offset = index7
-                                            chunk22 = None
-                                            if self._offset < self._input_size:
-                                                chunk22 = self._input[self._offset:self._offset + 2]
-                                            if chunk22 == 'DU':
-                                                address4 = TreeNode(self._input[self._offset:self._offset + 2], self._offset)
-                                                self._offset = self._offset + 2
-                                            else:
-                                                address4 = FAILURE
-                                                if self._offset > self._failure:
-                                                    self._failure = self._offset
-                                                    self._expected = []
-                                                if self._offset == self._failure:
-                                                    self._expected.append('"DU"')
-                                            if address4 is FAILURE:
-                                                self._offset = index7
-                                                chunk23 = None
-                                                if self._offset < self._input_size:
-                                                    chunk23 = self._input[self._offset:self._offset + 2]
-                                                if chunk23 == 'SA':
-                                                    address4 = TreeNode(self._input[self._offset:self._offset + 2], self._offset)
-                                                    self._offset = self._offset + 2
-                                                else:
-                                                    address4 = FAILURE
-                                                    if self._offset > self._failure:
-                                                        self._failure = self._offset
-                                                        self._expected = []
-                                                    if self._offset == self._failure:
-                                                        self._expected.append('"SA"')
-                                                if address4 is FAILURE:
-                                                    self._offset = index7
-                                                    chunk24 = None
-                                                    if self._offset < self._input_size:
-                                                        chunk24 = self._input[self._offset:self._offset + 2]
-                                                    if chunk24 == 'SA':
-                                                        address4 = TreeNode(self._input[self._offset:self._offset + 2], self._offset)
-                                                        self._offset = self._offset + 2
-                                                    else:
-                                                        address4 = FAILURE
-                                                        if self._offset > self._failure:
-                                                            self._failure = self._offset
-                                                            self._expected = []
-                                                        if self._offset == self._failure:
-                                                            self._expected.append('"SA"')
-                                                    if address4 is FAILURE:
-                                                        self._offset = index7
-                                                        chunk25 = None
-                                                        if self._offset < self._input_size:
-                                                            chunk25 = self._input[self._offset:self._offset + 2]
-                                                        if chunk25 == 'HZ':
-                                                            address4 = TreeNode(self._input[self._offset:self._offset + 2], self._offset)
-                                                            self._offset = self._offset + 2
-                                                        else:
-                                                            address4 = FAILURE
-                                                            if self._offset > self._failure:
-                                                                self._failure = self._offset
-                                                                self._expected = []
-                                                            if self._offset == self._failure:
-                                                                self._expected.append('"HZ"')
-                                                        if address4 is FAILURE:
-                                                            self._offset = index7
-                                                            chunk26 = None
-                                                            if self._offset < self._input_size:
-                                                                chunk26 = self._input[self._offset:self._offset + 2]
-                                                            if chunk26 == 'PY':
-                                                                address4 = TreeNode(self._input[self._offset:self._offset + 2], self._offset)
-                                                                self._offset = self._offset + 2
-                                                            else:
-                                                                address4 = FAILURE
-                                                                if self._offset > self._failure:
-                                                                    self._failure = self._offset
-                                                                    self._expected = []
-                                                                if self._offset == self._failure:
-                                                                    self._expected.append('"PY"')
-                                                            if address4 is FAILURE:
-                                                                self._offset = index7
+                    address4 = self._read_literals(DESCRIPTOR)
                     if address4 is FAILURE:
-                        address4 = TreeNode(self._input[index6:index6], index6)
+                        address4 = TreeNode(self._input, index6, index6)
                         self._offset = index6
                     if address4 is not FAILURE:
                         elements0.append(address4)
@@ -2362,17 +2141,20 @@ class Grammar(object):
         if elements0 is None:
             address0 = FAILURE
         else:
-            address0 = TreeNode(self._input[index1:self._offset], index1, elements0)
+            address0 = TreeNode(self._input, index1, self._offset, elements0)
             self._offset = self._offset
-        self._cache['wx'][index0] = (address0, self._offset)
+        if memo is not None:
+            memo[index0] = (address0, self._offset)
         return address0
 
     def _read_skyc(self):
         address0, index0 = FAILURE, self._offset
-        cached = self._cache['skyc'].get(index0)
-        if cached:
-            self._offset = cached[1]
-            return cached[0]
+        memo = self._cache.get('skyc')
+        if memo is not None:
+            cached = memo.get(index0)
+            if cached:
+                self._offset = cached[1]
+                return cached[0]
         index1 = self._offset
         remaining0, index2, elements0, address1 = 0, self._offset, [], True
         while address1 is not FAILURE:
@@ -2394,122 +2176,34 @@ class Grammar(object):
             if elements1 is None:
                 address1 = FAILURE
             else:
-                address1 = TreeNode9(self._input[index3:self._offset], index3, elements1)
+                address1 = TreeNode9(self._input, index3, self._offset, elements1)
                 self._offset = self._offset
             if address1 is not FAILURE:
                 elements0.append(address1)
                 remaining0 -= 1
         if remaining0 <= 0:
-            address0 = TreeNode(self._input[index2:self._offset], index2, elements0)
+            address0 = TreeNode(self._input, index2, self._offset, elements0)
             self._offset = self._offset
         else:
             address0 = FAILURE
         if address0 is FAILURE:
-            address0 = TreeNode(self._input[index1:index1], index1)
+            address0 = TreeNode(self._input, index1, index1)
             self._offset = index1
-        self._cache['skyc'][index0] = (address0, self._offset)
+        if memo is not None:
+            memo[index0] = (address0, self._offset)
         return address0
 
     def _read_cover(self):
         address0, index0 = FAILURE, self._offset
-        cached = self._cache['cover'].get(index0)
-        if cached:
-            self._offset = cached[1]
-            return cached[0]
+        memo = self._cache.get('cover')
+        if memo is not None:
+            cached = memo.get(index0)
+            if cached:
+                self._offset = cached[1]
+                return cached[0]
         index1 = self._offset
         index2, elements0 = self._offset, []
-        address1 = FAILURE
-        index3 = self._offset
-        chunk0 = None
-        if self._offset < self._input_size:
-            chunk0 = self._input[self._offset:self._offset + 3]
-        if chunk0 == 'FEW':
-            address1 = TreeNode(self._input[self._offset:self._offset + 3], self._offset)
-            self._offset = self._offset + 3
-        else:
-            address1 = FAILURE
-            if self._offset > self._failure:
-                self._failure = self._offset
-                self._expected = []
-            if self._offset == self._failure:
-                self._expected.append('"FEW"')
-        if address1 is FAILURE:
-            self._offset = index3
-            chunk1 = None
-            if self._offset < self._input_size:
-                chunk1 = self._input[self._offset:self._offset + 3]
-            if chunk1 == 'SCT':
-                address1 = TreeNode(self._input[self._offset:self._offset + 3], self._offset)
-                self._offset = self._offset + 3
-            else:
-                address1 = FAILURE
-                if self._offset > self._failure:
-                    self._failure = self._offset
-                    self._expected = []
-                if self._offset == self._failure:
-                    self._expected.append('"SCT"')
-            if address1 is FAILURE:
-                self._offset = index3
-                chunk2 = None
-                if self._offset < self._input_size:
-                    chunk2 = self._input[self._offset:self._offset + 3]
-                if chunk2 == 'BKN':
-                    address1 = TreeNode(self._input[self._offset:self._offset + 3], self._offset)
-                    self._offset = self._offset + 3
-                else:
-                    address1 = FAILURE
-                    if self._offset > self._failure:
-                        self._failure = self._offset
-                        self._expected = []
-                    if self._offset == self._failure:
-                        self._expected.append('"BKN"')
-                if address1 is FAILURE:
-                    self._offset = index3
-                    chunk3 = None
-                    if self._offset < self._input_size:
-                        chunk3 = self._input[self._offset:self._offset + 3]
-                    if chunk3 == 'OVC':
-                        address1 = TreeNode(self._input[self._offset:self._offset + 3], self._offset)
-                        self._offset = self._offset + 3
-                    else:
-                        address1 = FAILURE
-                        if self._offset > self._failure:
-                            self._failure = self._offset
-                            self._expected = []
-                        if self._offset == self._failure:
-                            self._expected.append('"OVC"')
-                    if address1 is FAILURE:
-                        self._offset = index3
-                        chunk4 = None
-                        if self._offset < self._input_size:
-                            chunk4 = self._input[self._offset:self._offset + 2]
-                        if chunk4 == 'VV':
-                            address1 = TreeNode(self._input[self._offset:self._offset + 2], self._offset)
-                            self._offset = self._offset + 2
-                        else:
-                            address1 = FAILURE
-                            if self._offset > self._failure:
-                                self._failure = self._offset
-                                self._expected = []
-                            if self._offset == self._failure:
-                                self._expected.append('"VV"')
-                        if address1 is FAILURE:
-                            self._offset = index3
-                            chunk5 = None
-                            if self._offset < self._input_size:
-                                chunk5 = self._input[self._offset:self._offset + 3]
-                            if chunk5 == '///':
-                                address1 = TreeNode(self._input[self._offset:self._offset + 3], self._offset)
-                                self._offset = self._offset + 3
-                            else:
-                                address1 = FAILURE
-                                if self._offset > self._failure:
-                                    self._failure = self._offset
-                                    self._expected = []
-                                if self._offset == self._failure:
-                                    self._expected.append('"///"')
-                            if address1 is FAILURE:
-                                self._offset = index3
+        address1 = self._read_literals(COVERAGE)
         if address1 is not FAILURE:
             elements0.append(address1)
             address2 = FAILURE
@@ -2520,7 +2214,7 @@ class Grammar(object):
                 if self._offset < self._input_size:
                     chunk6 = self._input[self._offset:self._offset + 1]
                 if chunk6 is not None and Grammar.REGEX_42.search(chunk6):
-                    address3 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+                    address3 = TreeNode(self._input, self._offset, self._offset + 1)
                     self._offset = self._offset + 1
                 else:
                     address3 = FAILURE
@@ -2533,65 +2227,20 @@ class Grammar(object):
                     elements1.append(address3)
                     remaining0 -= 1
             if remaining0 <= 0:
-                address2 = TreeNode(self._input[index5:self._offset], index5, elements1)
+                address2 = TreeNode(self._input, index5, self._offset, elements1)
                 self._offset = self._offset
             else:
                 address2 = FAILURE
             if address2 is FAILURE:
-                address2 = TreeNode(self._input[index4:index4], index4)
+                address2 = TreeNode(self._input, index4, index4)
                 self._offset = index4
             if address2 is not FAILURE:
                 elements0.append(address2)
                 address4 = FAILURE
                 index6 = self._offset
-                index7 = self._offset
-                chunk7 = None
-                if self._offset < self._input_size:
-                    chunk7 = self._input[self._offset:self._offset + 3]
-                if chunk7 == 'TCU':
-                    address4 = TreeNode(self._input[self._offset:self._offset + 3], self._offset)
-                    self._offset = self._offset + 3
-                else:
-                    address4 = FAILURE
-                    if self._offset > self._failure:
-                        self._failure = self._offset
-                        self._expected = []
-                    if self._offset == self._failure:
-                        self._expected.append('"TCU"')
-                if address4 is FAILURE:
-                    self._offset = index7
-                    chunk8 = None
-                    if self._offset < self._input_size:
-                        chunk8 = self._input[self._offset:self._offset + 2]
-                    if chunk8 == 'CB':
-                        address4 = TreeNode(self._input[self._offset:self._offset + 2], self._offset)
-                        self._offset = self._offset + 2
-                    else:
-                        address4 = FAILURE
-                        if self._offset > self._failure:
-                            self._failure = self._offset
-                            self._expected = []
-                        if self._offset == self._failure:
-                            self._expected.append('"CB"')
-                    if address4 is FAILURE:
-                        self._offset = index7
-                        chunk9 = None
-                        if self._offset < self._input_size:
-                            chunk9 = self._input[self._offset:self._offset + 3]
-                        if chunk9 == '///':
-                            address4 = TreeNode(self._input[self._offset:self._offset + 3], self._offset)
-                            self._offset = self._offset + 3
-                        else:
-                            address4 = FAILURE
-                            if self._offset > self._failure:
-                                self._failure = self._offset
-                                self._expected = []
-                            if self._offset == self._failure:
-                                self._expected.append('"///"')
-                        if address4 is FAILURE:
-                            self._offset = index7
+                address4 = self._read_literals(CLOUD_TYPE)
                 if address4 is FAILURE:
-                    address4 = TreeNode(self._input[index6:index6], index6)
+                    address4 = TreeNode(self._input, index6, index6)
                     self._offset = index6
                 if address4 is not FAILURE:
                     elements0.append(address4)
@@ -2607,71 +2256,11 @@ class Grammar(object):
         if elements0 is None:
             address0 = FAILURE
         else:
-            address0 = TreeNode(self._input[index2:self._offset], index2, elements0)
+            address0 = TreeNode(self._input, index2, self._offset, elements0)
             self._offset = self._offset
         if address0 is FAILURE:
             self._offset = index1
-            index8 = self._offset
-            chunk10 = None
-            if self._offset < self._input_size:
-                chunk10 = self._input[self._offset:self._offset + 3]
-            if chunk10 == 'CLR':
-                address0 = TreeNode(self._input[self._offset:self._offset + 3], self._offset)
-                self._offset = self._offset + 3
-            else:
-                address0 = FAILURE
-                if self._offset > self._failure:
-                    self._failure = self._offset
-                    self._expected = []
-                if self._offset == self._failure:
-                    self._expected.append('"CLR"')
-            if address0 is FAILURE:
-                self._offset = index8
-                chunk11 = None
-                if self._offset < self._input_size:
-                    chunk11 = self._input[self._offset:self._offset + 3]
-                if chunk11 == 'SKC':
-                    address0 = TreeNode(self._input[self._offset:self._offset + 3], self._offset)
-                    self._offset = self._offset + 3
-                else:
-                    address0 = FAILURE
-                    if self._offset > self._failure:
-                        self._failure = self._offset
-                        self._expected = []
-                    if self._offset == self._failure:
-                        self._expected.append('"SKC"')
-                if address0 is FAILURE:
-                    self._offset = index8
-                    chunk12 = None
-                    if self._offset < self._input_size:
-                        chunk12 = self._input[self._offset:self._offset + 3]
-                    if chunk12 == 'NSC':
-                        address0 = TreeNode(self._input[self._offset:self._offset + 3], self._offset)
-                        self._offset = self._offset + 3
-                    else:
-                        address0 = FAILURE
-                        if self._offset > self._failure:
-                            self._failure = self._offset
-                            self._expected = []
-                        if self._offset == self._failure:
-                            self._expected.append('"NSC"')
-                    if address0 is FAILURE:
-                        self._offset = index8
-                        chunk13 = None
-                        if self._offset < self._input_size:
-                            chunk13 = self._input[self._offset:self._offset + 3]
-                        if chunk13 == 'NCD':
-                            address0 = TreeNode(self._input[self._offset:self._offset + 3], self._offset)
-                            self._offset = self._offset + 3
-                        else:
-                            address0 = FAILURE
-                            if self._offset > self._failure:
-                                self._failure = self._offset
-                                self._expected = []
-                            if self._offset == self._failure:
-                                self._expected.append('"NCD"')
-                        if address0 is FAILURE:
-                            self._offset = index8
+            address0 = self._read_literals(CLEAR)
             if address0 is FAILURE:
                 self._offset = index1
                 address0 = self._read_wx()
@@ -2681,7 +2270,7 @@ class Grammar(object):
                     if self._offset < self._input_size:
                         chunk14 = self._input[self._offset:self._offset + 2]
                     if chunk14 == '//':
-                        address0 = TreeNode(self._input[self._offset:self._offset + 2], self._offset)
+                        address0 = TreeNode(self._input, self._offset, self._offset + 2)
                         self._offset = self._offset + 2
                     else:
                         address0 = FAILURE
@@ -2692,15 +2281,18 @@ class Grammar(object):
                             self._expected.append('"//"')
                     if address0 is FAILURE:
                         self._offset = index1
-        self._cache['cover'][index0] = (address0, self._offset)
+        if memo is not None:
+            memo[index0] = (address0, self._offset)
         return address0
 
     def _read_temp_dewp(self):
         address0, index0 = FAILURE, self._offset
-        cached = self._cache['temp_dewp'].get(index0)
-        if cached:
-            self._offset = cached[1]
-            return cached[0]
+        memo = self._cache.get('temp_dewp')
+        if memo is not None:
+            cached = memo.get(index0)
+            if cached:
+                self._offset = cached[1]
+                return cached[0]
         index1 = self._offset
         index2, elements0 = self._offset, []
         address1 = FAILURE
@@ -2713,7 +2305,7 @@ class Grammar(object):
             if self._offset < self._input_size:
                 chunk0 = self._input[self._offset:self._offset + 2]
             if chunk0 == '//':
-                address2 = TreeNode(self._input[self._offset:self._offset + 2], self._offset)
+                address2 = TreeNode(self._input, self._offset, self._offset + 2)
                 self._offset = self._offset + 2
             else:
                 address2 = FAILURE
@@ -2723,7 +2315,7 @@ class Grammar(object):
                 if self._offset == self._failure:
                     self._expected.append('"//"')
             if address2 is FAILURE:
-                address2 = TreeNode(self._input[index3:index3], index3)
+                address2 = TreeNode(self._input, index3, index3)
                 self._offset = index3
             if address2 is not FAILURE:
                 elements0.append(address2)
@@ -2736,7 +2328,7 @@ class Grammar(object):
                     if self._offset < self._input_size:
                         chunk1 = self._input[self._offset:self._offset + 1]
                     if chunk1 == '/':
-                        address4 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+                        address4 = TreeNode(self._input, self._offset, self._offset + 1)
                         self._offset = self._offset + 1
                     else:
                         address4 = FAILURE
@@ -2757,7 +2349,7 @@ class Grammar(object):
                             if self._offset < self._input_size:
                                 chunk2 = self._input[self._offset:self._offset + 2]
                             if chunk2 == '//':
-                                address6 = TreeNode(self._input[self._offset:self._offset + 2], self._offset)
+                                address6 = TreeNode(self._input, self._offset, self._offset + 2)
                                 self._offset = self._offset + 2
                             else:
                                 address6 = FAILURE
@@ -2767,7 +2359,7 @@ class Grammar(object):
                                 if self._offset == self._failure:
                                     self._expected.append('"//"')
                             if address6 is FAILURE:
-                                address6 = TreeNode(self._input[index4:index4], index4)
+                                address6 = TreeNode(self._input, index4, index4)
                                 self._offset = index4
                             if address6 is not FAILURE:
                                 elements0.append(address6)
@@ -2792,20 +2384,23 @@ class Grammar(object):
         if elements0 is None:
             address0 = FAILURE
         else:
-            address0 = TreeNode10(self._input[index2:self._offset], index2, elements0)
+            address0 = TreeNode10(self._input, index2, self._offset, elements0)
             self._offset = self._offset
         if address0 is FAILURE:
-            address0 = TreeNode(self._input[index1:index1], index1)
+            address0 = TreeNode(self._input, index1, index1)
             self._offset = index1
-        self._cache['temp_dewp'][index0] = (address0, self._offset)
+        if memo is not None:
+            memo[index0] = (address0, self._offset)
         return address0
 
     def _read_temp(self):
         address0, index0 = FAILURE, self._offset
-        cached = self._cache['temp'].get(index0)
-        if cached:
-            self._offset = cached[1]
-            return cached[0]
+        memo = self._cache.get('temp')
+        if memo is not None:
+            cached = memo.get(index0)
+            if cached:
+                self._offset = cached[1]
+                return cached[0]
         index1, elements0 = self._offset, []
         address1 = FAILURE
         index2 = self._offset
@@ -2813,7 +2408,7 @@ class Grammar(object):
         if self._offset < self._input_size:
             chunk0 = self._input[self._offset:self._offset + 1]
         if chunk0 is not None and Grammar.REGEX_43.search(chunk0):
-            address1 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+            address1 = TreeNode(self._input, self._offset, self._offset + 1)
             self._offset = self._offset + 1
         else:
             address1 = FAILURE
@@ -2823,7 +2418,7 @@ class Grammar(object):
             if self._offset == self._failure:
                 self._expected.append('[M]')
         if address1 is FAILURE:
-            address1 = TreeNode(self._input[index2:index2], index2)
+            address1 = TreeNode(self._input, index2, index2)
             self._offset = index2
         if address1 is not FAILURE:
             elements0.append(address1)
@@ -2833,7 +2428,7 @@ class Grammar(object):
             if self._offset < self._input_size:
                 chunk1 = self._input[self._offset:self._offset + 1]
             if chunk1 is not None and Grammar.REGEX_44.search(chunk1):
-                address2 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+                address2 = TreeNode(self._input, self._offset, self._offset + 1)
                 self._offset = self._offset + 1
             else:
                 address2 = FAILURE
@@ -2843,7 +2438,7 @@ class Grammar(object):
                 if self._offset == self._failure:
                     self._expected.append('[\\d]')
             if address2 is FAILURE:
-                address2 = TreeNode(self._input[index3:index3], index3)
+                address2 = TreeNode(self._input, index3, index3)
                 self._offset = index3
             if address2 is not FAILURE:
                 elements0.append(address2)
@@ -2853,7 +2448,7 @@ class Grammar(object):
                 if self._offset < self._input_size:
                     chunk2 = self._input[self._offset:self._offset + 1]
                 if chunk2 is not None and Grammar.REGEX_45.search(chunk2):
-                    address3 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+                    address3 = TreeNode(self._input, self._offset, self._offset + 1)
                     self._offset = self._offset + 1
                 else:
                     address3 = FAILURE
@@ -2863,7 +2458,7 @@ class Grammar(object):
                     if self._offset == self._failure:
                         self._expected.append('[\\d]')
                 if address3 is FAILURE:
-                    address3 = TreeNode(self._input[index4:index4], index4)
+                    address3 = TreeNode(self._input, index4, index4)
                     self._offset = index4
                 if address3 is not FAILURE:
                     elements0.append(address3)
@@ -2879,17 +2474,20 @@ class Grammar(object):
         if elements0 is None:
             address0 = FAILURE
         else:
-            address0 = TreeNode(self._input[index1:self._offset], index1, elements0)
+            address0 = TreeNode(self._input, index1, self._offset, elements0)
             self._offset = self._offset
-        self._cache['temp'][index0] = (address0, self._offset)
+        if memo is not None:
+            memo[index0] = (address0, self._offset)
         return address0
 
     def _read_dewp(self):
         address0, index0 = FAILURE, self._offset
-        cached = self._cache['dewp'].get(index0)
-        if cached:
-            self._offset = cached[1]
-            return cached[0]
+        memo = self._cache.get('dewp')
+        if memo is not None:
+            cached = memo.get(index0)
+            if cached:
+                self._offset = cached[1]
+                return cached[0]
         index1, elements0 = self._offset, []
         address1 = FAILURE
         index2 = self._offset
@@ -2897,7 +2495,7 @@ class Grammar(object):
         if self._offset < self._input_size:
             chunk0 = self._input[self._offset:self._offset + 1]
         if chunk0 is not None and Grammar.REGEX_46.search(chunk0):
-            address1 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+            address1 = TreeNode(self._input, self._offset, self._offset + 1)
             self._offset = self._offset + 1
         else:
             address1 = FAILURE
@@ -2907,7 +2505,7 @@ class Grammar(object):
             if self._offset == self._failure:
                 self._expected.append('[M]')
         if address1 is FAILURE:
-            address1 = TreeNode(self._input[index2:index2], index2)
+            address1 = TreeNode(self._input, index2, index2)
             self._offset = index2
         if address1 is not FAILURE:
             elements0.append(address1)
@@ -2917,7 +2515,7 @@ class Grammar(object):
             if self._offset < self._input_size:
                 chunk1 = self._input[self._offset:self._offset + 1]
             if chunk1 is not None and Grammar.REGEX_47.search(chunk1):
-                address2 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+                address2 = TreeNode(self._input, self._offset, self._offset + 1)
                 self._offset = self._offset + 1
             else:
                 address2 = FAILURE
@@ -2927,7 +2525,7 @@ class Grammar(object):
                 if self._offset == self._failure:
                     self._expected.append('[\\d]')
             if address2 is FAILURE:
-                address2 = TreeNode(self._input[index3:index3], index3)
+                address2 = TreeNode(self._input, index3, index3)
                 self._offset = index3
             if address2 is not FAILURE:
                 elements0.append(address2)
@@ -2937,7 +2535,7 @@ class Grammar(object):
                 if self._offset < self._input_size:
                     chunk2 = self._input[self._offset:self._offset + 1]
                 if chunk2 is not None and Grammar.REGEX_48.search(chunk2):
-                    address3 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+                    address3 = TreeNode(self._input, self._offset, self._offset + 1)
                     self._offset = self._offset + 1
                 else:
                     address3 = FAILURE
@@ -2947,7 +2545,7 @@ class Grammar(object):
                     if self._offset == self._failure:
                         self._expected.append('[\\d]')
                 if address3 is FAILURE:
-                    address3 = TreeNode(self._input[index4:index4], index4)
+                    address3 = TreeNode(self._input, index4, index4)
                     self._offset = index4
                 if address3 is not FAILURE:
                     elements0.append(address3)
@@ -2963,24 +2561,27 @@ class Grammar(object):
         if elements0 is None:
             address0 = FAILURE
         else:
-            address0 = TreeNode(self._input[index1:self._offset], index1, elements0)
+            address0 = TreeNode(self._input, index1, self._offset, elements0)
             self._offset = self._offset
-        self._cache['dewp'][index0] = (address0, self._offset)
+        if memo is not None:
+            memo[index0] = (address0, self._offset)
         return address0
 
     def _read_altim(self):
         address0, index0 = FAILURE, self._offset
-        cached = self._cache['altim'].get(index0)
-        if cached:
-            self._offset = cached[1]
-            return cached[0]
+        memo = self._cache.get('altim')
+        if memo is not None:
+            cached = memo.get(index0)
+            if cached:
+                self._offset = cached[1]
+                return cached[0]
         index1 = self._offset
         index2, elements0 = self._offset, []
         address1 = FAILURE
         index3 = self._offset
         address1 = self._read_sep()
         if address1 is FAILURE:
-            address1 = TreeNode(self._input[index3:index3], index3)
+            address1 = TreeNode(self._input, index3, index3)
             self._offset = index3
         if address1 is not FAILURE:
             elements0.append(address1)
@@ -2989,7 +2590,7 @@ class Grammar(object):
             if self._offset < self._input_size:
                 chunk0 = self._input[self._offset:self._offset + 1]
             if chunk0 is not None and Grammar.REGEX_49.search(chunk0):
-                address2 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+                address2 = TreeNode(self._input, self._offset, self._offset + 1)
                 self._offset = self._offset + 1
             else:
                 address2 = FAILURE
@@ -3005,7 +2606,7 @@ class Grammar(object):
                 if self._offset < self._input_size:
                     chunk1 = self._input[self._offset:self._offset + 1]
                 if chunk1 is not None and Grammar.REGEX_50.search(chunk1):
-                    address3 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+                    address3 = TreeNode(self._input, self._offset, self._offset + 1)
                     self._offset = self._offset + 1
                 else:
                     address3 = FAILURE
@@ -3021,7 +2622,7 @@ class Grammar(object):
                     if self._offset < self._input_size:
                         chunk2 = self._input[self._offset:self._offset + 1]
                     if chunk2 is not None and Grammar.REGEX_51.search(chunk2):
-                        address4 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+                        address4 = TreeNode(self._input, self._offset, self._offset + 1)
                         self._offset = self._offset + 1
                     else:
                         address4 = FAILURE
@@ -3037,7 +2638,7 @@ class Grammar(object):
                         if self._offset < self._input_size:
                             chunk3 = self._input[self._offset:self._offset + 1]
                         if chunk3 is not None and Grammar.REGEX_52.search(chunk3):
-                            address5 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+                            address5 = TreeNode(self._input, self._offset, self._offset + 1)
                             self._offset = self._offset + 1
                         else:
                             address5 = FAILURE
@@ -3053,7 +2654,7 @@ class Grammar(object):
                             if self._offset < self._input_size:
                                 chunk4 = self._input[self._offset:self._offset + 1]
                             if chunk4 is not None and Grammar.REGEX_53.search(chunk4):
-                                address6 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+                                address6 = TreeNode(self._input, self._offset, self._offset + 1)
                                 self._offset = self._offset + 1
                             else:
                                 address6 = FAILURE
@@ -3070,7 +2671,7 @@ class Grammar(object):
                                 if self._offset < self._input_size:
                                     chunk5 = self._input[self._offset:self._offset + 1]
                                 if chunk5 == '=':
-                                    address7 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+                                    address7 = TreeNode(self._input, self._offset, self._offset + 1)
                                     self._offset = self._offset + 1
                                 else:
                                     address7 = FAILURE
@@ -3080,7 +2681,7 @@ class Grammar(object):
                                     if self._offset == self._failure:
                                         self._expected.append('"="')
                                 if address7 is FAILURE:
-                                    address7 = TreeNode(self._input[index4:index4], index4)
+                                    address7 = TreeNode(self._input, index4, index4)
                                     self._offset = index4
                                 if address7 is not FAILURE:
                                     elements0.append(address7)
@@ -3108,27 +2709,30 @@ class Grammar(object):
         if elements0 is None:
             address0 = FAILURE
         else:
-            address0 = TreeNode(self._input[index2:self._offset], index2, elements0)
+            address0 = TreeNode(self._input, index2, self._offset, elements0)
             self._offset = self._offset
         if address0 is FAILURE:
-            address0 = TreeNode(self._input[index1:index1], index1)
+            address0 = TreeNode(self._input, index1, index1)
             self._offset = index1
-        self._cache['altim'][index0] = (address0, self._offset)
+        if memo is not None:
+            memo[index0] = (address0, self._offset)
         return address0
 
     def _read_remarks(self):
         address0, index0 = FAILURE, self._offset
-        cached = self._cache['remarks'].get(index0)
-        if cached:
-            self._offset = cached[1]
-            return cached[0]
+        memo = self._cache.get('remarks')
+        if memo is not None:
+            cached = memo.get(index0)
+            if cached:
+                self._offset = cached[1]
+                return cached[0]
         index1 = self._offset
         index2, elements0 = self._offset, []
         address1 = FAILURE
         index3 = self._offset
         address1 = self._read_sep()
         if address1 is FAILURE:
-            address1 = TreeNode(self._input[index3:index3], index3)
+            address1 = TreeNode(self._input, index3, index3)
             self._offset = index3
         if address1 is not FAILURE:
             elements0.append(address1)
@@ -3138,7 +2742,7 @@ class Grammar(object):
             if self._offset < self._input_size:
                 chunk0 = self._input[self._offset:self._offset + 3]
             if chunk0 == 'RMK':
-                address2 = TreeNode(self._input[self._offset:self._offset + 3], self._offset)
+                address2 = TreeNode(self._input, self._offset, self._offset + 3)
                 self._offset = self._offset + 3
             else:
                 address2 = FAILURE
@@ -3155,7 +2759,7 @@ class Grammar(object):
                     if self._offset < self._input_size:
                         chunk1 = self._input[self._offset:self._offset + 5]
                     if chunk1 == 'NOSIG':
-                        address3 = TreeNode(self._input[self._offset:self._offset + 5], self._offset)
+                        address3 = TreeNode(self._input, self._offset, self._offset + 5)
                         self._offset = self._offset + 5
                     else:
                         address3 = FAILURE
@@ -3168,7 +2772,7 @@ class Grammar(object):
                         elements1.append(address3)
                         remaining0 -= 1
                 if remaining0 <= 0:
-                    address2 = TreeNode(self._input[index5:self._offset], index5, elements1)
+                    address2 = TreeNode(self._input, index5, self._offset, elements1)
                     self._offset = self._offset
                 else:
                     address2 = FAILURE
@@ -3180,7 +2784,7 @@ class Grammar(object):
                 remaining1, index6, elements2, address5 = 0, self._offset, [], True
                 while address5 is not FAILURE:
                     if self._offset < self._input_size:
-                        address5 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+                        address5 = TreeNode(self._input, self._offset, self._offset + 1)
                         self._offset = self._offset + 1
                     else:
                         address5 = FAILURE
@@ -3193,7 +2797,7 @@ class Grammar(object):
                         elements2.append(address5)
                         remaining1 -= 1
                 if remaining1 <= 0:
-                    address4 = TreeNode(self._input[index6:self._offset], index6, elements2)
+                    address4 = TreeNode(self._input, index6, self._offset, elements2)
                     self._offset = self._offset
                 else:
                     address4 = FAILURE
@@ -3211,27 +2815,30 @@ class Grammar(object):
         if elements0 is None:
             address0 = FAILURE
         else:
-            address0 = TreeNode(self._input[index2:self._offset], index2, elements0)
+            address0 = TreeNode(self._input, index2, self._offset, elements0)
             self._offset = self._offset
         if address0 is FAILURE:
-            address0 = TreeNode(self._input[index1:index1], index1)
+            address0 = TreeNode(self._input, index1, index1)
             self._offset = index1
-        self._cache['remarks'][index0] = (address0, self._offset)
+        if memo is not None:
+            memo[index0] = (address0, self._offset)
         return address0
 
     def _read_end(self):
         address0, index0 = FAILURE, self._offset
-        cached = self._cache['end'].get(index0)
-        if cached:
-            self._offset = cached[1]
-            return cached[0]
+        memo = self._cache.get('end')
+        if memo is not None:
+            cached = memo.get(index0)
+            if cached:
+                self._offset = cached[1]
+                return cached[0]
         index1 = self._offset
         index2, elements0 = self._offset, []
         address1 = FAILURE
         index3 = self._offset
         address1 = self._read_sep()
         if address1 is FAILURE:
-            address1 = TreeNode(self._input[index3:index3], index3)
+            address1 = TreeNode(self._input, index3, index3)
             self._offset = index3
         if address1 is not FAILURE:
             elements0.append(address1)
@@ -3240,7 +2847,7 @@ class Grammar(object):
             if self._offset < self._input_size:
                 chunk0 = self._input[self._offset:self._offset + 1]
             if chunk0 == '=':
-                address2 = TreeNode(self._input[self._offset:self._offset + 1], self._offset)
+                address2 = TreeNode(self._input, self._offset, self._offset + 1)
                 self._offset = self._offset + 1
             else:
                 address2 = FAILURE
@@ -3260,34 +2867,193 @@ class Grammar(object):
         if elements0 is None:
             address0 = FAILURE
         else:
-            address0 = TreeNode(self._input[index2:self._offset], index2, elements0)
+            address0 = TreeNode(self._input, index2, self._offset, elements0)
             self._offset = self._offset
         if address0 is FAILURE:
-            address0 = TreeNode(self._input[index1:index1], index1)
+            address0 = TreeNode(self._input, index1, index1)
             self._offset = index1
-        self._cache['end'][index0] = (address0, self._offset)
+        if memo is not None:
+            memo[index0] = (address0, self._offset)
         return address0
 
 
+RULES = ('ob', 'metar', 'sep', 'siteid', 'datetime', 'auto', 'wind', 'wind_dir', 'wind_spd',
+         'gust', 'varwind', 'vis', 'run', 'curwx', 'wx', 'skyc', 'cover', 'temp_dewp', 'temp',
+         'dewp', 'altim', 'remarks', 'end')
+
+# Only these rules are reached from more than one place in the grammar, so
+# only they are ever tried twice at the same offset. Memoizing just these keeps
+# about a third of the memo entries, for the same trees; it parses no faster
+# (benchmark.py memo)
+BACKTRACKING_RULES = ('sep', 'wx')
+
+# The groups of the ob rule, in order. Everything after auto is optional and
+# remarks runs to the end of the input, so once auto has matched the parse is
+# bound to succeed and any later group can be left unread.
+GROUPS = ('metar', 'siteid', 'datetime', 'auto', 'wind', 'vis', 'run', 'curwx', 'skyc',
+          'temp_dewp', 'altim', 'remarks', 'end')
+
+
+def last_group(fields):
+    """Return the index in GROUPS of the last group needed to read fields.
+
+    That is the last of fields, but never before auto, which decides whether
+    the input parses at all.
+    """
+    unknown = set(fields) - set(GROUPS)
+    if unknown:
+        raise ValueError('Unknown fields: ' + ', '.join(sorted(unknown)))
+    return max([GROUPS.index('auto')] + [GROUPS.index(field) for field in fields])
+
+
+class RuleProfile(object):
+    """Per-rule counts from the parsers it is attached to.
+
+    For each rule: calls; memo hits, the calls a packrat memo table answered;
+    failures; and backtracks, the calls at an offset the rule was already
+    tried at in the same parse, memoized or not. With timed=True, also the
+    cumulative seconds spent in the rule, including the rules it calls.
+
+    Attaching wraps the rule methods of that one parser instance; a parser
+    without a profile runs the plain methods, so the counting costs nothing
+    unless it is asked for.
+    """
+    COLUMNS = ('calls', 'memo_hits', 'failures', 'backtracks', 'seconds')
+
+    def __init__(self, timed=False):
+        self.timed = timed
+        self.counts = {}
+
+    def attach(self, parser, rules, memos, failure):
+        """Count the rules of parser into this profile.
+
+        memos maps rules to the memo tables parser keeps for them, and failure
+        is what a failed rule returns, besides a negative offset.
+        """
+        tried = []
+        reset = parser.reset
+
+        def reset_tried(input):
+            for offsets in tried:
+                offsets.clear()
+            reset(input)
+
+        parser.reset = reset_tried
+        for rule in rules:
+            offsets = set()
+            tried.append(offsets)
+            read = getattr(parser, '_read_' + rule)
+            setattr(parser, '_read_' + rule,
+                    self._counted(rule, read, parser, memos.get(rule), failure, offsets))
+
+    def _counted(self, rule, read, parser, memo, failure, tried):
+        counts = self.counts.setdefault(rule, [0, 0, 0, 0, 0.])
+        clock = time.perf_counter if self.timed else None
+
+        def counted(*args):
+            # Canopy's rules read the offset from the parser, generated ones take it
+            offset = args[0] if args else parser._offset
+            counts[0] += 1
+            if memo is not None and offset in memo:
+                counts[1] += 1
+            if offset in tried:
+                counts[3] += 1
+            else:
+                tried.add(offset)
+            if clock is None:
+                node = read(*args)
+            else:
+                start = clock()
+                node = read(*args)
+                counts[4] += clock() - start
+            if node is failure or node.__class__ is int and node < 0:
+                counts[2] += 1
+            return node
+        return counted
+
+    def rows(self):
+        """Return ``(rule, calls, memo_hits, failures, backtracks, seconds)`` for
+        each rule called, costliest first."""
+        key = 5 if self.timed else 1
+        rows = [(rule,) + tuple(counts) for rule, counts in self.counts.items() if counts[0]]
+        return sorted(rows, key=lambda row: row[key], reverse=True)
+
+    def report(self):
+        """Format rows() as a table, e.g. to print after ingesting a file."""
+        lines = ['{0:<12}{1:>10}{2:>11}{3:>10}{4:>12}{5:>10}'.format('rule', *self.COLUMNS)]
+        for row in self.rows():
+            lines.append('{0:<12}{1:>10}{2:>11}{3:>10}{4:>12}{5:>10.3f}'.format(*row))
+        return '\n'.join(lines)
+
+    def clear(self):
+        """Zero every count, leaving the profile attached."""
+        for counts in self.counts.values():
+            counts[:] = [0, 0, 0, 0, 0.]
+
+    def __str__(self):
+        return self.report()
+
+
 class Parser(Grammar):
-    def __init__(self, input, actions, types):
-        self._input = input
-        self._input_size = len(input)
+    def __init__(self, input, actions, types, memoize=True, fields=None, profile=None):
+        """Set up a parser for input.
+
+        With memoize=False, only BACKTRACKING_RULES keep packrat memo tables;
+        every other rule is matched without reading or writing one. That
+        saves memory, not time: the trees are the same and parsing takes
+        about as long.
+
+        fields names the GROUPS the caller needs. Parsing stops after the last
+        of them: the groups after it are left unread and match as empty.
+
+        profile is a RuleProfile to count the calls of each rule into.
+        """
         self._actions = actions
         self._types = types
+        self._cache = dict((rule, {}) for rule in (RULES if memoize else BACKTRACKING_RULES))
+        self._skipped = ()
+        if fields is not None:
+            self._skipped = GROUPS[last_group(fields) + 1:]
+            for rule in self._skipped:
+                setattr(self, '_read_' + rule, self._read_skipped)
+        if profile is not None:
+            profile.attach(self, RULES, self._cache, FAILURE)
+        self.reset(input)
+
+    def _read_skipped(self):
+        return TreeNode(self._input, self._offset, self._offset)
+
+    def reset(self, input):
+        """Point the parser at a new input, clearing the memo tables in place.
+
+        input may also be bytes or a memoryview, which is read as Latin-1: one
+        character per byte, so node offsets are byte offsets.
+        """
+        if not isinstance(input, str):
+            input = str(input, 'latin-1')
+        self._input = input
+        self._input_size = len(input)
         self._offset = 0
-        self._cache = defaultdict(dict)
+        for memo in self._cache.values():
+            memo.clear()
         self._failure = 0
         self._expected = []
 
     def parse(self):
+        tree = self.try_parse()
+        if tree.__class__ is ParseFailure:
+            raise tree.error()
+        return tree
+
+    def try_parse(self):
+        """Like parse, but return a ParseFailure instead of raising ParseError."""
         tree = self._read_ob()
-        if tree is not FAILURE and self._offset == self._input_size:
+        if tree is not FAILURE and (self._offset == self._input_size or self._skipped):
             return tree
         if not self._expected:
             self._failure = self._offset
             self._expected.append('<EOF>')
-        raise ParseError(format_error(self._input, self._failure, self._expected))
+        return ParseFailure(self._input, self._failure, self._expected)
 
 
 def format_error(input, offset, expected):
@@ -3301,6 +3067,100 @@ def format_error(input, offset, expected):
     message += ' ' * (offset - position)
     return message + '^'
 
-def parse(input, actions=None, types=None):
-    parser = Parser(input, actions, types)
-    return parser.parse()
+class ParseCache(object):
+    """A bounded least-recently-used cache of parse results, keyed on report text.
+
+    Feeds repeat the same report many times over, in retransmissions and
+    overlapping bulletins; a hit returns the earlier result instead of parsing
+    the text again. Holds at most maxsize entries, evicting the least recently
+    used, and counts hits and misses.
+
+    Parse trees are many small objects that the garbage collector keeps
+    revisiting while they are cached, so a cache of trees pays off when it is
+    small and repeats come close together, as retransmissions do. Named tuples
+    from ``metar_parse.parse_metar_to_named_tuple`` are cheap to hold, and a
+    cache of them can be sized to catch repeats an hour's worth of reports
+    apart.
+    """
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    @staticmethod
+    def key(input, *options):
+        """Return the cache key for input parsed with options.
+
+        input is normalized to the str the parser reads, so bytes and str
+        copies of a report share an entry.
+        """
+        if not isinstance(input, str):
+            input = str(input, 'latin-1')
+        return (input,) + options
+
+    def get(self, key, default=None):
+        try:
+            value = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop every entry and reset the counters."""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __str__(self):
+        total = self.hits + self.misses
+        return 'hits: {0} ({1:.1%}) misses: {2} size: {3}/{4}'.format(
+            self.hits, self.hits / total if total else 0., self.misses, len(self), self.maxsize)
+
+
+def parse(input, actions=None, types=None, memoize=True, fields=None, cache=None, profile=None):
+    """Parse input into a tree, raising ParseError if it does not parse.
+
+    With a ParseCache, repeated input returns the tree, or raises the error,
+    of its first parse. Trees are shared between hits, so a cache should only
+    be used with one set of actions and types.
+    """
+    if cache is None:
+        parser = Parser(input, actions, types, memoize, fields, profile)
+        return parser.parse()
+    key = cache.key(input, None if fields is None else tuple(fields))
+    tree = cache.get(key)
+    if tree is None:
+        tree = Parser(input, actions, types, memoize, fields, profile).try_parse()
+        cache.put(key, tree)
+    if tree.__class__ is ParseFailure:
+        raise tree.error()
+    return tree
+
+def parse_many(inputs, actions=None, types=None, memoize=True, fields=None, failures=False,
+               profile=None):
+    """Parse each of inputs in turn, reusing a single Parser.
+
+    Yields the tree for each input, or None for an input that fails to parse;
+    with failures=True, a ParseFailure instead. No error message is formatted
+    either way.
+    """
+    parser = Parser('', actions, types, memoize, fields, profile)
+    for input in inputs:
+        parser.reset(input)
+        tree = parser.try_parse()
+        if tree.__class__ is ParseFailure and not failures:
+            tree = None
+        yield tree
@@ -0,0 +1,1165 @@
+# Generated by generate_parser.py from metar_decode.peg; do not edit by hand.
+# Rebuild it with: python generate_parser.py metar_decode.peg <this file>
+#
+# Nodes are built for: ob, metar, siteid, datetime, auto, wind, wind_dir, wind_spd, vis, run, curwx, skyc, temp_dewp, temp, dewp, altim, remarks, end
+# Memoized rules: sep, wx
+import re
+
+
+class TreeNode(object):
+    __slots__ = ('_input', 'offset', '_end', 'elements')
+
+    def __init__(self, input, offset, end, elements=()):
+        self._input = input
+        self.offset = offset
+        self._end = end
+        self.elements = elements
+
+    @property
+    def text(self):
+        return self._input[self.offset:self._end]
+
+    @property
+    def span(self):
+        return self.offset, self._end
+
+    def __iter__(self):
+        for el in self.elements:
+            yield el
+
+
+def _element(index):
+    return property(lambda self: self.elements[index])
+
+
+class TreeNode1(TreeNode):
+    __slots__ = ()
+    metar = _element(0)
+    siteid = _element(1)
+    datetime = _element(2)
+    auto = _element(3)
+    wind = _element(4)
+    vis = _element(5)
+    run = _element(6)
+    curwx = _element(7)
+    skyc = _element(8)
+    temp_dewp = _element(9)
+    altim = _element(10)
+    remarks = _element(11)
+    end = _element(12)
+
+
+class TreeNode2(TreeNode):
+    __slots__ = ()
+    wind_dir = _element(0)
+    wind_spd = _element(1)
+
+
+class TreeNode3(TreeNode):
+    __slots__ = ()
+    temp = _element(0)
+    dewp = _element(1)
+
+
+class ParseError(SyntaxError):
+    pass
+
+
+FAILURE = object()
+
+RULES = ('ob', 'metar', 'sep', 'siteid', 'datetime', 'auto', 'wind', 'wind_dir', 'wind_spd', 'gust',
+         'varwind', 'vis', 'run', 'curwx', 'wx', 'skyc', 'cover', 'temp_dewp', 'temp', 'dewp',
+         'altim', 'remarks', 'end')
+
+_PATTERN_1 = re.compile('(?:\\ )+')
+_PATTERN_2 = re.compile('[0-9A-Z][0-9A-Z][0-9A-Z][0-9A-Z]')
+_PATTERN_3 = re.compile('[0-9A-Z]')
+_PATTERN_4 = re.compile('(?:[\\d])+')
+_PATTERN_5 = re.compile('[\\d][\\d][\\d]')
+_PATTERN_6 = re.compile('[\\d]')
+_PATTERN_7 = re.compile('[\\d][\\d]')
+_PATTERN_8 = re.compile('[\\d][\\d][\\d]V[\\d][\\d][\\d]')
+_PATTERN_9 = re.compile('V')
+_PATTERN_10 = re.compile('[\\d][\\d][\\d][\\d]')
+_PATTERN_11 = re.compile('\\ [\\d]')
+_PATTERN_12 = re.compile('\\ ')
+_PATTERN_13 = re.compile('/[\\d]')
+_PATTERN_14 = re.compile('/')
+_PATTERN_15 = re.compile('[LRC]')
+_PATTERN_16 = re.compile('[\\d][\\d][\\d][\\d]V')
+_PATTERN_17 = re.compile('["M" / "P"]')
+_PATTERN_18 = re.compile('[\\d][\\d][\\d][\\d]FT')
+_PATTERN_19 = re.compile('FT')
+_PATTERN_20 = re.compile('[-+]')
+_PATTERN_21 = re.compile('(?:[\\d])*')
+_PATTERN_22 = re.compile('[M]')
+_PATTERN_23 = re.compile('["Q" / "A"][\\d][\\d][\\d][\\d]')
+_PATTERN_24 = re.compile('["Q" / "A"]')
+_PATTERN_25 = re.compile('(?:NOSIG)*')
+_DISPATCH_1 = {'M': ('METAR',), 'S': ('SPECI',)}
+_CHOICE_1 = (('METAR', '"METAR"'), ('SPECI', '"SPECI"'),)
+_DISPATCH_2 = {' ': (' AUTO', ' COR',)}
+_CHOICE_2 = ((' AUTO', '" AUTO"'), (' COR', '" COR"'),)
+_PATTERN_2_PARTS = ((_PATTERN_3, '[0-9A-Z]'), (_PATTERN_3, '[0-9A-Z]'), (_PATTERN_3, '[0-9A-Z]'), (_PATTERN_3, '[0-9A-Z]'),)
+_DISPATCH_3 = {'A': ('AUTO',), 'C': ('COR',)}
+_CHOICE_3 = (('AUTO', '"AUTO"'), ('COR', '"COR"'),)
+_DISPATCH_4 = {'K': ('KT',), 'M': ('MPS',)}
+_CHOICE_4 = (('KT', '"KT"'), ('MPS', '"MPS"'),)
+_PATTERN_5_PARTS = ((_PATTERN_6, '[\\d]'), (_PATTERN_6, '[\\d]'), (_PATTERN_6, '[\\d]'),)
+_PATTERN_7_PARTS = ((_PATTERN_6, '[\\d]'), (_PATTERN_6, '[\\d]'),)
+_PATTERN_8_PARTS = ((_PATTERN_6, '[\\d]'), (_PATTERN_6, '[\\d]'), (_PATTERN_6, '[\\d]'), (_PATTERN_9, '"V"'), (_PATTERN_6, '[\\d]'), (_PATTERN_6, '[\\d]'), (_PATTERN_6, '[\\d]'),)
+_PATTERN_10_PARTS = ((_PATTERN_6, '[\\d]'), (_PATTERN_6, '[\\d]'), (_PATTERN_6, '[\\d]'), (_PATTERN_6, '[\\d]'),)
+_PATTERN_11_PARTS = ((_PATTERN_12, '" "'), (_PATTERN_6, '[\\d]'),)
+_PATTERN_13_PARTS = ((_PATTERN_14, '"/"'), (_PATTERN_6, '[\\d]'),)
+_PATTERN_16_PARTS = ((_PATTERN_6, '[\\d]'), (_PATTERN_6, '[\\d]'), (_PATTERN_6, '[\\d]'), (_PATTERN_6, '[\\d]'), (_PATTERN_9, '"V"'),)
+_PATTERN_18_PARTS = ((_PATTERN_6, '[\\d]'), (_PATTERN_6, '[\\d]'), (_PATTERN_6, '[\\d]'), (_PATTERN_6, '[\\d]'), (_PATTERN_19, '"FT"'),)
+_DISPATCH_5 = {'M': ('MI',), 'P': ('PR',), 'D': ('DR',), 'B': ('BL', 'BR',), 'S': ('SH', 'SN',), 'T': ('TS',), 'F': ('FG', 'FZ',), 'R': ('RA',), 'H': ('HZ',)}
+_CHOICE_5 = (('MI', '"MI"'), ('PR', '"PR"'), ('DR', '"DR"'), ('BL', '"BL"'), ('SH', '"SH"'), ('TS', '"TS"'), ('FG', '"FG"'), ('TS', '"TS"'), ('FZ', '"FZ"'), ('RA', '"RA"'), ('BR', '"BR"'), ('HZ', '"HZ"'), ('SN', '"SN"'),)
+_DISPATCH_6 = {'R': ('RA',), 'B': ('BR',), 'D': ('DZ', 'DU',), 'F': ('FG', 'FU',), 'V': ('VA',), 'S': ('SA',), 'H': ('HZ',), 'P': ('PY',)}
+_CHOICE_6 = (('RA', '"RA"'), ('BR', '"BR"'), ('DZ', '"DZ"'), ('FG', '"FG"'), ('FU', '"FU"'), ('VA', '"VA"'), ('DU', '"DU"'), ('SA', '"SA"'), ('SA', '"SA"'), ('HZ', '"HZ"'), ('PY', '"PY"'),)
+_DISPATCH_7 = {'F': ('FEW',), 'S': ('SCT',), 'B': ('BKN',), 'O': ('OVC',), 'V': ('VV',), '/': ('///',)}
+_CHOICE_7 = (('FEW', '"FEW"'), ('SCT', '"SCT"'), ('BKN', '"BKN"'), ('OVC', '"OVC"'), ('VV', '"VV"'), ('///', '"///"'),)
+_DISPATCH_8 = {'T': ('TCU',), 'C': ('CB',), '/': ('///',)}
+_CHOICE_8 = (('TCU', '"TCU"'), ('CB', '"CB"'), ('///', '"///"'),)
+_DISPATCH_9 = {'C': ('CLR',), 'S': ('SKC',), 'N': ('NSC', 'NCD',)}
+_CHOICE_9 = (('CLR', '"CLR"'), ('SKC', '"SKC"'), ('NSC', '"NSC"'), ('NCD', '"NCD"'),)
+_PATTERN_23_PARTS = ((_PATTERN_24, '["Q" / "A"]'), (_PATTERN_6, '[\\d]'), (_PATTERN_6, '[\\d]'), (_PATTERN_6, '[\\d]'), (_PATTERN_6, '[\\d]'),)
+
+
+class Grammar(object):
+    def _expect(self, offset, expected):
+        if offset > self._failure:
+            self._failure = offset
+            self._expected = []
+        if offset == self._failure:
+            self._expected.append(expected)
+
+    def _expect_sequence(self, i, parts):
+        for pattern, expected in parts:
+            match = pattern.match(self._input, i)
+            if not match:
+                self._expect(i, expected)
+                return
+            i = match.end()
+
+    def _expect_choice(self, i, alternatives):
+        for literal, expected in alternatives:
+            if self._input.startswith(literal, i):
+                return i + len(literal)
+            self._expect(i, expected)
+        return -1
+
+    def _read_ob(self, i):
+        input, offset = self._input, i
+        node = None
+        start1 = i
+        elements2 = []
+        while True:
+            node3 = self._read_metar(i)
+            i = node3._end
+            elements2.append(node3)
+            node4 = self._read_siteid(i)
+            if node4 is FAILURE:
+                i = -1
+                break
+            i = node4._end
+            elements2.append(node4)
+            node5 = self._read_datetime(i)
+            if node5 is FAILURE:
+                i = -1
+                break
+            i = node5._end
+            elements2.append(node5)
+            node6 = self._read_auto(i)
+            if node6 is FAILURE:
+                i = -1
+                break
+            i = node6._end
+            elements2.append(node6)
+            node7 = self._read_wind(i)
+            i = node7._end
+            elements2.append(node7)
+            node8 = self._read_vis(i)
+            i = node8._end
+            elements2.append(node8)
+            node9 = self._read_run(i)
+            i = node9._end
+            elements2.append(node9)
+            node10 = self._read_curwx(i)
+            i = node10._end
+            elements2.append(node10)
+            node11 = self._read_skyc(i)
+            i = node11._end
+            elements2.append(node11)
+            node12 = self._read_temp_dewp(i)
+            i = node12._end
+            elements2.append(node12)
+            node13 = self._read_altim(i)
+            i = node13._end
+            elements2.append(node13)
+            node14 = self._read_remarks(i)
+            i = node14._end
+            elements2.append(node14)
+            node15 = self._read_end(i)
+            i = node15._end
+            elements2.append(node15)
+            if i >= 0:
+                node = TreeNode1(input, start1, i, elements2)
+            break
+        if i < 0:
+            node = FAILURE
+        elif node is None:
+            node = TreeNode(input, offset, i)
+        return node
+
+    def _read_metar(self, i):
+        input, track, offset = self._input, self._track, i
+        node = None
+        while True:
+            start16 = i
+            if track:
+                i = self._expect_choice(i, _CHOICE_1)
+            else:
+                for literal in _DISPATCH_1.get(input[i:i + 1], ()):
+                    if input.startswith(literal, i):
+                        i += len(literal)
+                        break
+                else:
+                    i = -1
+            if i < 0:
+                i = start16
+            start17 = i
+            if track:
+                i = self._expect_choice(i, _CHOICE_2)
+            else:
+                for literal in _DISPATCH_2.get(input[i:i + 1], ()):
+                    if input.startswith(literal, i):
+                        i += len(literal)
+                        break
+                else:
+                    i = -1
+            if i < 0:
+                i = start17
+            break
+        if i < 0:
+            node = FAILURE
+        elif node is None:
+            node = TreeNode(input, offset, i)
+        return node
+
+    def _read_sep(self, i):
+        memo = self._memo_sep
+        if i in memo:
+            return memo[i]
+        input, track, offset = self._input, self._track, i
+        match18 = _PATTERN_1.match(input, i)
+        if match18:
+            i = match18.end()
+        if track:
+            self._expect(i, '" "')
+        if not match18:
+            i = -1
+        memo[offset] = i
+        return i
+
+    def _read_siteid(self, i):
+        input, track, offset = self._input, self._track, i
+        node = None
+        while True:
+            start19 = i
+            i = self._read_sep(i)
+            if i < 0:
+                i = start19
+            if _PATTERN_2.match(input, i):
+                i += 4
+            else:
+                if track:
+                    self._expect_sequence(i, _PATTERN_2_PARTS)
+                i = -1
+            break
+        if i < 0:
+            node = FAILURE
+        elif node is None:
+            node = TreeNode(input, offset, i)
+        return node
+
+    def _read_datetime(self, i):
+        input, track, offset = self._input, self._track, i
+        node = None
+        while True:
+            i = self._read_sep(i)
+            if i < 0:
+                break
+            match20 = _PATTERN_4.match(input, i)
+            if match20:
+                i = match20.end()
+            if track:
+                self._expect(i, '[\\d]')
+            if not match20:
+                i = -1
+            if i < 0:
+                break
+            if input.startswith('Z', i):
+                i += 1
+            else:
+                if track:
+                    self._expect(i, '"Z"')
+                i = -1
+            break
+        if i < 0:
+            node = FAILURE
+        elif node is None:
+            node = TreeNode(input, offset, i)
+        return node
+
+    def _read_auto(self, i):
+        input, track, offset = self._input, self._track, i
+        node = None
+        while True:
+            i = self._read_sep(i)
+            if i < 0:
+                break
+            start21 = i
+            if track:
+                i = self._expect_choice(i, _CHOICE_3)
+            else:
+                for literal in _DISPATCH_3.get(input[i:i + 1], ()):
+                    if input.startswith(literal, i):
+                        i += len(literal)
+                        break
+                else:
+                    i = -1
+            if i < 0:
+                i = start21
+            break
+        if i < 0:
+            node = FAILURE
+        elif node is None:
+            node = TreeNode(input, offset, i)
+        return node
+
+    def _read_wind(self, i):
+        input, track, offset = self._input, self._track, i
+        node = None
+        start22 = i
+        start23 = i
+        elements24 = []
+        while True:
+            start25 = i
+            i = self._read_sep(i)
+            if i < 0:
+                i = start25
+            node26 = self._read_wind_dir(i)
+            i = node26._end
+            elements24.append(node26)
+            node27 = self._read_wind_spd(i)
+            i = node27._end
+            elements24.append(node27)
+            start28 = i
+            i = self._read_gust(i)
+            if i < 0:
+                i = start28
+            if track:
+                i = self._expect_choice(i, _CHOICE_4)
+            else:
+                for literal in _DISPATCH_4.get(input[i:i + 1], ()):
+                    if input.startswith(literal, i):
+                        i += len(literal)
+                        break
+                else:
+                    i = -1
+            if i < 0:
+                break
+            start29 = i
+            i = self._read_varwind(i)
+            if i < 0:
+                i = start29
+            if i >= 0:
+                node = TreeNode2(input, start23, i, elements24)
+            break
+        if i < 0:
+            i = start22
+        if i < 0:
+            node = FAILURE
+        elif node is None:
+            node = TreeNode(input, offset, i)
+        return node
+
+    def _read_wind_dir(self, i):
+        input, track, offset = self._input, self._track, i
+        node = None
+        start30 = i
+        start31 = i
+        while True:
+            while True:
+                if _PATTERN_5.match(input, i):
+                    i += 3
+                else:
+                    if track:
+                        self._expect_sequence(i, _PATTERN_5_PARTS)
+                    i = -1
+                break
+            if i >= 0:
+                break
+            i = start31
+            if input.startswith('VAR', i):
+                i += 3
+            else:
+                if track:
+                    self._expect(i, "'VAR'")
+                i = -1
+            if i >= 0:
+                break
+            i = start31
+            if input.startswith('VRB', i):
+                i += 3
+            else:
+                if track:
+                    self._expect(i, "'VRB'")
+                i = -1
+            if i >= 0:
+                break
+            i = start31
+            if input.startswith('///', i):
+                i += 3
+            else:
+                if track:
+                    self._expect(i, '"///"')
+                i = -1
+            break
+        if i < 0:
+            i = start30
+        if i < 0:
+            node = FAILURE
+        elif node is None:
+            node = TreeNode(input, offset, i)
+        return node
+
+    def _read_wind_spd(self, i):
+        input, track, offset = self._input, self._track, i
+        node = None
+        start32 = i
+        start33 = i
+        while True:
+            while True:
+                if _PATTERN_7.match(input, i):
+                    i += 2
+                else:
+                    if track:
+                        self._expect_sequence(i, _PATTERN_7_PARTS)
+                    i = -1
+                if i < 0:
+                    break
+                if _PATTERN_6.match(input, i):
+                    i += 1
+                else:
+                    if track:
+                        self._expect(i, '[\\d]')
+                break
+            if i >= 0:
+                break
+            i = start33
+            if input.startswith('//', i):
+                i += 2
+            else:
+                if track:
+                    self._expect(i, '"//"')
+                i = -1
+            break
+        if i < 0:
+            i = start32
+        if i < 0:
+            node = FAILURE
+        elif node is None:
+            node = TreeNode(input, offset, i)
+        return node
+
+    def _read_gust(self, i):
+        input, track = self._input, self._track
+        while True:
+            if input.startswith('G', i):
+                i += 1
+            else:
+                if track:
+                    self._expect(i, '"G"')
+                i = -1
+            if i < 0:
+                break
+            match34 = _PATTERN_4.match(input, i)
+            if match34:
+                i = match34.end()
+            if track:
+                self._expect(i, '[\\d]')
+            if not match34:
+                i = -1
+            break
+        return i
+
+    def _read_varwind(self, i):
+        input, track = self._input, self._track
+        while True:
+            i = self._read_sep(i)
+            if i < 0:
+                break
+            if _PATTERN_8.match(input, i):
+                i += 7
+            else:
+                if track:
+                    self._expect_sequence(i, _PATTERN_8_PARTS)
+                i = -1
+            break
+        return i
+
+    def _read_vis(self, i):
+        input, track, offset = self._input, self._track, i
+        node = None
+        start35 = i
+        while True:
+            i = self._read_sep(i)
+            if i < 0:
+                break
+            start36 = i
+            while True:
+                while True:
+                    if _PATTERN_10.match(input, i):
+                        i += 4
+                    else:
+                        if track:
+                            self._expect_sequence(i, _PATTERN_10_PARTS)
+                        i = -1
+                    if i < 0:
+                        break
+                    if input.startswith('NDV', i):
+                        i += 3
+                    else:
+                        if track:
+                            self._expect(i, '"NDV"')
+                    break
+                if i >= 0:
+                    break
+                i = start36
+                while True:
+                    if _PATTERN_6.match(input, i):
+                        i += 1
+                    else:
+                        if track:
+                            self._expect(i, '[\\d]')
+                        i = -1
+                    if i < 0:
+                        break
+                    start37 = i
+                    start38 = i
+                    while True:
+                        if _PATTERN_6.match(input, i):
+                            i += 1
+                        else:
+                            if track:
+                                self._expect(i, '[\\d]')
+                            i = -1
+                        if i >= 0:
+                            break
+                        i = start38
+                        while True:
+                            start39 = i
+                            while True:
+                                if _PATTERN_11.match(input, i):
+                                    i += 2
+                                else:
+                                    if track:
+                                        self._expect_sequence(i, _PATTERN_11_PARTS)
+                                    i = -1
+                                break
+                            if i < 0:
+                                i = start39
+                            if _PATTERN_13.match(input, i):
+                                i += 2
+                            else:
+                                if track:
+                                    self._expect_sequence(i, _PATTERN_13_PARTS)
+                                i = -1
+                            break
+                        break
+                    if i < 0:
+                        i = start37
+                    if input.startswith('SM', i):
+                        i += 2
+                    else:
+                        if track:
+                            self._expect(i, '"SM"')
+                        i = -1
+                    break
+                if i >= 0:
+                    break
+                i = start36
+                if input.startswith('CAVOK', i):
+                    i += 5
+                else:
+                    if track:
+                        self._expect(i, '"CAVOK"')
+                    i = -1
+                break
+            break
+        if i < 0:
+            i = start35
+        if i < 0:
+            node = FAILURE
+        elif node is None:
+            node = TreeNode(input, offset, i)
+        return node
+
+    def _read_run(self, i):
+        input, track, offset = self._input, self._track, i
+        node = None
+        start40 = i
+        while True:
+            i = self._read_sep(i)
+            if i < 0:
+                break
+            if input.startswith('R', i):
+                i += 1
+            else:
+                if track:
+                    self._expect(i, '"R"')
+                i = -1
+            if i < 0:
+                break
+            if _PATTERN_15.match(input, i):
+                i += 1
+            else:
+                if track:
+                    self._expect(i, '[LRC]')
+            if _PATTERN_7.match(input, i):
+                i += 2
+            else:
+                if track:
+                    self._expect_sequence(i, _PATTERN_7_PARTS)
+                i = -1
+            if i < 0:
+                break
+            if _PATTERN_15.match(input, i):
+                i += 1
+            else:
+                if track:
+                    self._expect(i, '[LRC]')
+            if input.startswith('/', i):
+                i += 1
+            else:
+                if track:
+                    self._expect(i, '"/"')
+                i = -1
+            if i < 0:
+                break
+            start41 = i
+            while True:
+                if _PATTERN_16.match(input, i):
+                    i += 5
+                else:
+                    if track:
+                        self._expect_sequence(i, _PATTERN_16_PARTS)
+                    i = -1
+                break
+            if i < 0:
+                i = start41
+            if _PATTERN_17.match(input, i):
+                i += 1
+            else:
+                if track:
+                    self._expect(i, '["M" / "P"]')
+            if _PATTERN_18.match(input, i):
+                i += 6
+            else:
+                if track:
+                    self._expect_sequence(i, _PATTERN_18_PARTS)
+                i = -1
+            break
+        if i < 0:
+            i = start40
+        if i < 0:
+            node = FAILURE
+        elif node is None:
+            node = TreeNode(input, offset, i)
+        return node
+
+    def _read_curwx(self, i):
+        input, offset = self._input, i
+        node = None
+        start42 = i
+        matched44 = False
+        while True:
+            start43 = i
+            while True:
+                i = self._read_sep(i)
+                if i < 0:
+                    break
+                i = self._read_wx(i)
+                break
+            if i < 0 or i == start43:
+                i = start43 if i < 0 else i
+                break
+            matched44 = True
+        if i < 0:
+            node = FAILURE
+        elif node is None:
+            node = TreeNode(input, offset, i)
+        return node
+
+    def _read_wx(self, i):
+        memo = self._memo_wx
+        if i in memo:
+            return memo[i]
+        input, track, offset = self._input, self._track, i
+        while True:
+            start45 = i
+            start46 = i
+            while True:
+                if _PATTERN_20.match(input, i):
+                    i += 1
+                else:
+                    if track:
+                        self._expect(i, '[-+]')
+                    i = -1
+                if i >= 0:
+                    break
+                i = start46
+                if input.startswith('VC', i):
+                    i += 2
+                else:
+                    if track:
+                        self._expect(i, '"VC"')
+                    i = -1
+                break
+            if i < 0:
+                i = start45
+            if track:
+                i = self._expect_choice(i, _CHOICE_5)
+            else:
+                for literal in _DISPATCH_5.get(input[i:i + 1], ()):
+                    if input.startswith(literal, i):
+                        i += len(literal)
+                        break
+                else:
+                    i = -1
+            if i < 0:
+                break
+            if _PATTERN_20.match(input, i):
+                i += 1
+            else:
+                if track:
+                    self._expect(i, '[-+]')
+            start47 = i
+            if track:
+                i = self._expect_choice(i, _CHOICE_6)
+            else:
+                for literal in _DISPATCH_6.get(input[i:i + 1], ()):
+                    if input.startswith(literal, i):
+                        i += len(literal)
+                        break
+                else:
+                    i = -1
+            if i < 0:
+                i = start47
+            break
+        memo[offset] = i
+        return i
+
+    def _read_skyc(self, i):
+        input, offset = self._input, i
+        node = None
+        start48 = i
+        matched50 = False
+        while True:
+            start49 = i
+            while True:
+                i = self._read_sep(i)
+                if i < 0:
+                    break
+                i = self._read_cover(i)
+                break
+            if i < 0 or i == start49:
+                i = start49 if i < 0 else i
+                break
+            matched50 = True
+        if i < 0:
+            node = FAILURE
+        elif node is None:
+            node = TreeNode(input, offset, i)
+        return node
+
+    def _read_cover(self, i):
+        input, track = self._input, self._track
+        start51 = i
+        while True:
+            while True:
+                if track:
+                    i = self._expect_choice(i, _CHOICE_7)
+                else:
+                    for literal in _DISPATCH_7.get(input[i:i + 1], ()):
+                        if input.startswith(literal, i):
+                            i += len(literal)
+                            break
+                    else:
+                        i = -1
+                if i < 0:
+                    break
+                start52 = i
+                match53 = _PATTERN_21.match(input, i)
+                if match53:
+                    i = match53.end()
+                if track:
+                    self._expect(i, '[\\d]')
+                start54 = i
+                if track:
+                    i = self._expect_choice(i, _CHOICE_8)
+                else:
+                    for literal in _DISPATCH_8.get(input[i:i + 1], ()):
+                        if input.startswith(literal, i):
+                            i += len(literal)
+                            break
+                    else:
+                        i = -1
+                if i < 0:
+                    i = start54
+                break
+            if i >= 0:
+                break
+            i = start51
+            if track:
+                i = self._expect_choice(i, _CHOICE_9)
+            else:
+                for literal in _DISPATCH_9.get(input[i:i + 1], ()):
+                    if input.startswith(literal, i):
+                        i += len(literal)
+                        break
+                else:
+                    i = -1
+            if i >= 0:
+                break
+            i = start51
+            i = self._read_wx(i)
+            if i >= 0:
+                break
+            i = start51
+            if input.startswith('//', i):
+                i += 2
+            else:
+                if track:
+                    self._expect(i, '"//"')
+                i = -1
+            break
+        return i
+
+    def _read_temp_dewp(self, i):
+        input, track, offset = self._input, self._track, i
+        node = None
+        start55 = i
+        start56 = i
+        elements57 = []
+        while True:
+            i = self._read_sep(i)
+            if i < 0:
+                break
+            if input.startswith('//', i):
+                i += 2
+            else:
+                if track:
+                    self._expect(i, '"//"')
+            node58 = self._read_temp(i)
+            i = node58._end
+            elements57.append(node58)
+            if input.startswith('/', i):
+                i += 1
+            else:
+                if track:
+                    self._expect(i, '"/"')
+                i = -1
+            if i < 0:
+                break
+            node59 = self._read_dewp(i)
+            i = node59._end
+            elements57.append(node59)
+            if input.startswith('//', i):
+                i += 2
+            else:
+                if track:
+                    self._expect(i, '"//"')
+            if i >= 0:
+                node = TreeNode3(input, start56, i, elements57)
+            break
+        if i < 0:
+            i = start55
+        if i < 0:
+            node = FAILURE
+        elif node is None:
+            node = TreeNode(input, offset, i)
+        return node
+
+    def _read_temp(self, i):
+        input, track, offset = self._input, self._track, i
+        node = None
+        while True:
+            if _PATTERN_22.match(input, i):
+                i += 1
+            else:
+                if track:
+                    self._expect(i, '[M]')
+            if _PATTERN_6.match(input, i):
+                i += 1
+            else:
+                if track:
+                    self._expect(i, '[\\d]')
+            if _PATTERN_6.match(input, i):
+                i += 1
+            else:
+                if track:
+                    self._expect(i, '[\\d]')
+            break
+        if i < 0:
+            node = FAILURE
+        elif node is None:
+            node = TreeNode(input, offset, i)
+        return node
+
+    def _read_dewp(self, i):
+        input, track, offset = self._input, self._track, i
+        node = None
+        while True:
+            if _PATTERN_22.match(input, i):
+                i += 1
+            else:
+                if track:
+                    self._expect(i, '[M]')
+            if _PATTERN_6.match(input, i):
+                i += 1
+            else:
+                if track:
+                    self._expect(i, '[\\d]')
+            if _PATTERN_6.match(input, i):
+                i += 1
+            else:
+                if track:
+                    self._expect(i, '[\\d]')
+            break
+        if i < 0:
+            node = FAILURE
+        elif node is None:
+            node = TreeNode(input, offset, i)
+        return node
+
+    def _read_altim(self, i):
+        input, track, offset = self._input, self._track, i
+        node = None
+        start60 = i
+        while True:
+            start61 = i
+            i = self._read_sep(i)
+            if i < 0:
+                i = start61
+            if _PATTERN_23.match(input, i):
+                i += 5
+            else:
+                if track:
+                    self._expect_sequence(i, _PATTERN_23_PARTS)
+                i = -1
+            if i < 0:
+                break
+            if input.startswith('=', i):
+                i += 1
+            else:
+                if track:
+                    self._expect(i, '"="')
+            break
+        if i < 0:
+            i = start60
+        if i < 0:
+            node = FAILURE
+        elif node is None:
+            node = TreeNode(input, offset, i)
+        return node
+
+    def _read_remarks(self, i):
+        input, track, offset = self._input, self._track, i
+        node = None
+        start62 = i
+        while True:
+            start63 = i
+            i = self._read_sep(i)
+            if i < 0:
+                i = start63
+            start64 = i
+            while True:
+                if input.startswith('RMK', i):
+                    i += 3
+                else:
+                    if track:
+                        self._expect(i, '"RMK"')
+                    i = -1
+                if i >= 0:
+                    break
+                i = start64
+                match65 = _PATTERN_25.match(input, i)
+                if match65:
+                    i = match65.end()
+                if track:
+                    self._expect(i, '"NOSIG"')
+                break
+            if track:
+                self._expect(self._input_size, '<any char>')
+            i = self._input_size
+            break
+        if i < 0:
+            node = FAILURE
+        elif node is None:
+            node = TreeNode(input, offset, i)
+        return node
+
+    def _read_end(self, i):
+        input, track, offset = self._input, self._track, i
+        node = None
+        start66 = i
+        while True:
+            start67 = i
+            i = self._read_sep(i)
+            if i < 0:
+                i = start67
+            if input.startswith('=', i):
+                i += 1
+            else:
+                if track:
+                    self._expect(i, '"="')
+                i = -1
+            break
+        if i < 0:
+            i = start66
+        if i < 0:
+            node = FAILURE
+        elif node is None:
+            node = TreeNode(input, offset, i)
+        return node
+
+
+class Parser(Grammar):
+    def __init__(self, input, actions=None, types=None, profile=None):
+        """Set up a parser for input, counting its rules into profile, a
+        metar_decode.RuleProfile, if one is given."""
+        self._actions = actions
+        self._types = types
+        self._memo_sep = {}
+        self._memo_wx = {}
+        if profile is not None:
+            profile.attach(self, RULES, {'sep': self._memo_sep, 'wx': self._memo_wx}, FAILURE)
+        self.reset(input)
+
+    def reset(self, input):
+        """Point the parser at a new input, clearing the memo tables in place.
+
+        input may also be bytes or a memoryview, which is read as Latin-1: one
+        character per byte, so node offsets are byte offsets.
+        """
+        if not isinstance(input, str):
+            input = str(input, 'latin-1')
+        self._input = input
+        self._input_size = len(input)
+        self._memo_sep.clear()
+        self._memo_wx.clear()
+        self._track = False
+        self._failure = 0
+        self._expected = []
+
+    def parse(self):
+        tree = self.try_parse()
+        if tree.__class__ is ParseFailure:
+            raise tree.error()
+        return tree
+
+    def try_parse(self):
+        """Like parse, but return a ParseFailure instead of raising ParseError."""
+        tree = self._read_ob(0)
+        if tree is not FAILURE and tree._end == self._input_size:
+            return tree
+        return ParseFailure(self._input)
+
+    def _locate_failure(self):
+        """Parse again, returning the offset of the furthest failure and the
+        expected-token strings there."""
+        self.reset(self._input)
+        self._track = True
+        tree = self._read_ob(0)
+        self._track = False
+        if not self._expected:
+            self._failure = 0 if tree is FAILURE else tree._end
+            self._expected.append('<EOF>')
+        return self._failure, self._expected
+
+
+class ParseFailure(object):
+    """A failed parse, recorded without building the error message.
+
+    Holds only the input. Finding the furthest failure and what was expected
+    there takes a second, tracking parse, which runs the first time offset,
+    expected or the message is asked for. A ParseFailure is false, so
+    ``if tree:`` passes over it as it would over None.
+    """
+    __slots__ = ('input', '_located')
+
+    def __init__(self, input):
+        self.input = input
+        self._located = None
+
+    def __bool__(self):
+        return False
+
+    def __repr__(self):
+        return 'ParseFailure(offset={0}, expected={1})'.format(self.offset, self.expected)
+
+    def _locate(self):
+        if self._located is None:
+            self._located = Parser(self.input)._locate_failure()
+        return self._located
+
+    @property
+    def offset(self):
+        return self._locate()[0]
+
+    @property
+    def expected(self):
+        return self._locate()[1]
+
+    @property
+    def message(self):
+        return format_error(self.input, *self._locate())
+
+    def error(self):
+        """Return the ParseError that parse would have raised."""
+        return ParseError(self.message)
+
+
+def format_error(input, offset, expected):
+    lines, line_no, position = input.split('\n'), 0, 0
+    while position <= offset:
+        position += len(lines[line_no]) + 1
+        line_no += 1
+    message, line = 'Line ' + str(line_no) + ': expected ' + ', '.join(expected) + '\n', lines[line_no - 1]
+    message += line + '\n'
+    position -= len(line) + 1
+    message += ' ' * (offset - position)
+    return message + '^'
+
+
+def parse(input, actions=None, types=None, profile=None):
+    parser = Parser(input, actions, types, profile)
+    return parser.parse()
+
+
+def parse_many(inputs, actions=None, types=None, failures=False, profile=None):
+    """Parse each of inputs in turn, reusing a single Parser.
+
+    Yields the tree for each input, or None for an input that fails to parse;
+    with failures=True, a ParseFailure instead. Neither costs a second parse.
+    """
+    parser = Parser('', actions, types, profile)
+    for input in inputs:
+        parser.reset(input)
+        tree = parser.try_parse()
+        if tree.__class__ is ParseFailure and not failures:
+            tree = None
+        yield tree
@@ -0,0 +1,58 @@
+import metar_decode
+import metar_decode_opt
+from generate_parser import read_grammar, ParserGenerator
+
+reports = ["KATL 102052Z 31008KT 10SM FEW013 SCT100 BKN150 BKN250 26/22 A2996",
+           "BAD REPORT",
+           "KJFK 102151Z 12008KT 1/4SM R04R/2800V4000FT BR OVC002 19/19 A2995",
+           "METAR CYYT 081100Z 00000KT 0SM FG VV000 07/07 A3019 RMK F8 SLP224",
+           "KOUN 121212Z 12010G KT"]
+
+fields = ('metar', 'siteid', 'datetime', 'auto', 'wind', 'vis', 'run', 'curwx', 'skyc',
+          'temp_dewp', 'altim', 'remarks', 'end')
+
+def tree_spans(tree):
+    spans = [getattr(tree, name).span for name in fields]
+    if tree.wind.text:
+        spans += [tree.wind.wind_dir.span, tree.wind.wind_spd.span]
+    if tree.temp_dewp.text:
+        spans += [tree.temp_dewp.temp.span, tree.temp_dewp.dewp.span]
+    return spans
+
+def parse_or_error(module, metar):
+    try:
+        return tree_spans(module.parse(metar))
+    except module.ParseError as error:
+        return str(error)
+
+def test_matches_canopy_parser():
+    for metar in reports:
+        assert parse_or_error(metar_decode_opt, metar) == parse_or_error(metar_decode, metar)
+
+def test_parse_many():
+    trees = list(metar_decode_opt.parse_many(reports))
+    assert trees[1] is None
+    assert trees[3].skyc.text == ' VV000'
+    assert trees[0].temp_dewp.dewp.text == '22'
+
+def test_parse_failures():
+    for module in (metar_decode, metar_decode_opt):
+        inputs = reports + ["METAR KOUN 1212Z"]
+        failures = [tree for tree in module.parse_many(inputs, failures=True) if not tree]
+        assert len(failures) == 2
+        for failure in failures:
+            assert failure.message == parse_or_error(metar_decode, failure.input)
+            assert str(failure.error()) == failure.message
+
+def test_generated_module_is_current():
+    with open('metar_decode.peg', 'rt') as grammar_file:
+        source = ParserGenerator(read_grammar(grammar_file.read())).generate('metar_decode.peg')
+    with open('metar_decode_opt.py', 'rt') as module_file:
+        assert module_file.read() == source
+
+if __name__ == '__main__':
+    test_matches_canopy_parser()
+    test_parse_many()
+    test_parse_failures()
+    test_generated_module_is_current()
+    print("Everything Passed")
@@ -0,0 +1,153 @@
+from metar_decode import (parse, parse_many, Parser, ParseCache, ParseError, ParseFailure,
+                          RuleProfile, FAILURE, WEATHER, COVERAGE, CLEAR)
+import metar_decode
+import metar_decode_opt
+
+reports = ["KATL 102052Z 31008KT 10SM FEW013 SCT100 BKN150 BKN250 26/22 A2996",
+           "BAD REPORT",
+           "KJFK 102151Z 12008KT 1/4SM R04R/2800V4000FT BR OVC002 19/19 A2995",
+           "METAR CYYT 081100Z 00000KT 0SM FG VV000 07/07 A3019 RMK F8 SLP224"]
+
+def tree_text(node):
+    return (node.text, node.offset, [tree_text(el) for el in node.elements])
+
+def test_parse_many_reuses_parser():
+    trees = list(parse_many(reports))
+    assert trees[1] is None
+    for metar, tree in zip(reports, trees):
+        if tree is not None:
+            assert tree_text(tree) == tree_text(parse(metar))
+
+def test_reset_clears_memo_tables():
+    parser = Parser(reports[0], None, None)
+    parser.parse()
+    memos = dict(parser._cache)
+    parser.reset(reports[3])
+    assert all(not memo for memo in parser._cache.values())
+    assert parser.parse().siteid.text == ' CYYT'
+    assert all(parser._cache[rule] is memo for rule, memo in memos.items())
+
+def test_memo_free_parse_matches():
+    for metar in reports:
+        parser = Parser(metar, None, None, memoize=False)
+        assert set(parser._cache) == {'sep', 'wx'}
+        if metar != "BAD REPORT":
+            assert tree_text(parser.parse()) == tree_text(parse(metar))
+
+def test_nodes_are_compact():
+    tree = parse(reports[0])
+    assert not hasattr(tree, '__dict__')
+    assert not hasattr(tree.wind.wind_dir, '__dict__')
+    assert tree.wind.wind_dir.text == '310'
+    assert tree.wind.wind_dir.offset == 13
+    assert tree.skyc.text == ' FEW013 SCT100 BKN150 BKN250'
+    assert tree.end.text == ''
+
+def test_parse_bytes():
+    for metar in reports:
+        if metar != "BAD REPORT":
+            assert tree_text(parse(metar.encode('ascii'))) == tree_text(parse(metar))
+            assert tree_text(parse(memoryview(metar.encode('ascii')))) == tree_text(parse(metar))
+    trees = list(parse_many(metar.encode('ascii') for metar in reports))
+    assert trees[1] is None
+    assert trees[2].run.text == ' R04R/2800V4000FT'
+
+def ordered_choice(literals, text):
+    # What trying each alternative in turn matches and expects
+    expected = []
+    for literal in literals:
+        if text.startswith(literal):
+            return literal, expected
+        expected.append('"{0}"'.format(literal))
+    return None, expected
+
+def test_literal_choice_matches_ordered_choice():
+    cases = [(WEATHER, ('MI', 'PR', 'DR', 'BL', 'SH', 'TS', 'FG', 'TS', 'FZ', 'RA', 'BR', 'HZ', 'SN')),
+             (COVERAGE, ('FEW', 'SCT', 'BKN', 'OVC', 'VV', '///')),
+             (CLEAR, ('CLR', 'SKC', 'NSC', 'NCD'))]
+    for choice, literals in cases:
+        for text in literals + ('', 'F', 'FE', 'TSRA', 'VVV', '//', 'XX'):
+            parser = Parser(text, None, None)
+            node = parser._read_literals(choice)
+            literal, expected = ordered_choice(literals, text)
+            assert (None if node is FAILURE else node.text) == literal
+            assert parser._offset == len(literal or '')
+            assert parser._expected == expected
+
+def test_parse_fields():
+    # Parsing stops after the last group asked for
+    tree = parse(reports[0], fields=['wind'])
+    assert tree.wind.text == '31008KT'
+    assert tree.skyc.text == '' and tree.altim.text == ''
+    assert parse(reports[0] + ' $$ not a group', fields=['siteid']).siteid.text == 'KATL'
+    trees = list(parse_many(reports, fields=['datetime']))
+    assert trees[1] is None
+    assert [tree.datetime.text for tree in trees if tree] == [' 102052Z', ' 102151Z', ' 081100Z']
+
+def test_try_parse():
+    parser = Parser(reports[1], None, None)
+    failure = parser.try_parse()
+    assert isinstance(failure, ParseFailure) and not failure
+    assert failure.offset == 3 and failure.expected == ['[0-9A-Z]']
+    try:
+        parse(reports[1])
+    except ParseError as error:
+        assert str(error) == failure.message
+    else:
+        raise AssertionError('bad report parsed')
+    parser.reset(reports[0])
+    assert parser.try_parse().siteid.text == 'KATL'
+
+def test_parse_cache():
+    cache = ParseCache(maxsize=2)
+    tree = parse(reports[0], cache=cache)
+    assert parse(reports[0].encode('ascii'), cache=cache) is tree
+    assert (cache.hits, cache.misses) == (1, 1)
+    for attempt in range(2):
+        try:
+            parse(reports[1], cache=cache)
+        except ParseError:
+            pass
+        else:
+            raise AssertionError('bad report parsed')
+    assert (cache.hits, cache.misses) == (2, 2)
+
+    # Different fields are different entries, and the oldest entry goes first
+    assert parse(reports[0], fields=['wind'], cache=cache) is not tree
+    assert len(cache) == 2
+    assert parse(reports[0], cache=cache) is not tree
+
+    cache.clear()
+    assert len(cache) == 0 and (cache.hits, cache.misses) == (0, 0)
+
+def test_rule_profile():
+    for module in (metar_decode, metar_decode_opt):
+        profile = RuleProfile(timed=True)
+        trees = list(module.parse_many(reports, profile=profile))
+        assert [tree_text(tree) for tree in trees if tree] == [tree_text(tree) for tree in
+                                                               module.parse_many(reports) if tree]
+        rows = dict((row[0], row[1:]) for row in profile.rows())
+        calls, memo_hits, failures, backtracks, seconds = rows['ob']
+        assert (calls, failures) == (len(reports), 1)
+        assert rows['siteid'][2] == 1
+        assert rows['sep'][1] == rows['sep'][3] > 0
+        assert seconds > 0
+        assert 'backtracks' in profile.report()
+        profile.clear()
+        assert profile.rows() == []
+
+    # Parsers without a profile run the rules unwrapped
+    assert '_read_ob' not in vars(Parser('', None, None))
+
+if __name__ == '__main__':
+    test_parse_many_reuses_parser()
+    test_reset_clears_memo_tables()
+    test_memo_free_parse_matches()
+    test_nodes_are_compact()
+    test_parse_bytes()
+    test_literal_choice_matches_ordered_choice()
+    test_parse_fields()
+    test_try_parse()
+    test_parse_cache()
+    test_rule_profile()
+    print("Everything Passed")
@@ -0,0 +1,556 @@
+"""Regular expression fast path in front of the Canopy METAR parser.
+
+The parser generated into metar_decode walks the grammar one character at a
+time in Python, memoizing every rule it tries. Most reports have the plain
+``siteid datetime wind vis curwx skyc temp_dewp altim`` shape, which a single
+compiled pattern can match in C. ``decode`` tries that pattern first and only
+hands the report to ``metar_decode.parse`` when the pattern declines it.
+
+Reports may also be bytes or memoryviews, e.g. straight out of a netCDF
+``report`` variable or a file read in binary mode. Those are matched byte for
+byte by a bytes copy of the pattern, and only the groups the tree exposes are
+decoded, as Latin-1.
+
+``decode_bulletin`` matches reports in place in the text of a whole NOAA PORT
+file, where a report may run onto continuation lines. A copy of the pattern
+in which every space also matches a line break plus the five-space indent
+takes care of those without merging the lines first.
+
+The pattern is a rule-by-rule translation of metar_decode.peg. A PEG never
+backtracks into a repetition or an ordered choice once it has succeeded, so
+every such construct is wrapped in an atomic group; with that, a match of the
+pattern is exactly the parse the Canopy parser would produce.
+"""
+import re
+from itertools import count
+from operator import itemgetter
+
+from metar_decode import parse, Parser, ParseFailure, last_group
+
+
+def _compile(pattern, flags=0):
+    """Compile pattern, emulating ``(?>...)`` atomic groups if re lacks them."""
+    try:
+        re.compile('(?>a)')
+    except re.error:
+        pattern = _emulate_atomic_groups(pattern)
+    return re.compile(pattern, flags)
+
+
+class _LazyPattern(object):
+    """A pattern compiled by calling compile when it is first used.
+
+    Attributes of the compiled pattern are copied onto the _LazyPattern as
+    they are read, so from then on ``match`` and the rest cost the same as on
+    the pattern itself. Patterns only some callers need are built this way,
+    keeping them out of import time.
+    """
+    def __init__(self, compile):
+        self._compile = compile
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        pattern = self.__dict__.get('_pattern')
+        if pattern is None:
+            pattern = self._pattern = self._compile()
+        value = getattr(pattern, name)
+        setattr(self, name, value)
+        return value
+
+
+def _bytes_copy(pattern, flags=0):
+    """Return a _LazyPattern for the bytes copy of pattern."""
+    return _LazyPattern(lambda: re.compile(pattern.pattern.encode('ascii'), flags))
+
+
+def _emulate_atomic_groups(pattern):
+    # Before Python 3.11, (?>X) can be written as (?:(?=(?P<n>X))(?P=n)): a
+    # lookahead is never re-entered once it has matched
+    out, stack, names = [], [], count(1)
+    i, in_class = 0, False
+    while i < len(pattern):
+        char = pattern[i]
+        if char == '\\':
+            out.append(pattern[i:i + 2])
+            i += 2
+            continue
+        if in_class:
+            in_class = char != ']'
+        elif char == '[':
+            in_class = True
+        elif pattern.startswith('(?>', i):
+            stack.append('_a{0}'.format(next(names)))
+            out.append('(?:(?=(?P<{0}>'.format(stack[-1]))
+            i += 3
+            continue
+        elif char == '(':
+            stack.append(None)
+        elif char == ')':
+            name = stack.pop()
+            if name:
+                char = '))(?P={0}))'.format(name)
+        out.append(char)
+        i += 1
+    return ''.join(out)
+
+
+# Each rule of metar_decode.peg, with every optional, repeated or ordered
+# choice expression wrapped in an atomic group
+SEP = r'(?> +)'
+SEP_OPT = r'(?> *)'
+WX = (r'(?>(?>[-+]|VC)?)'
+      r'(?>MI|PR|DR|BL|SH|TS|FG|TS|FZ|RA|BR|HZ|SN)'
+      r'(?>[-+]?)'
+      r'(?>(?>RA|BR|DZ|FG|FU|VA|DU|SA|SA|HZ|PY)?)')
+COVER = (r'(?>(?>FEW|SCT|BKN|OVC|VV|///)(?>\d*)(?>(?>TCU|CB|///)?)'
+         r'|(?>CLR|SKC|NSC|NCD)'
+         r'|' + WX +
+         r'|//)')
+TEMP = r'(?>M?)(?>\d?)(?>\d?)'
+
+METAR = r'(?>(?>METAR|SPECI)?)(?>(?> AUTO| COR)?)'
+SITEID = SEP_OPT + r'[0-9A-Z][0-9A-Z][0-9A-Z][0-9A-Z]'
+DATETIME = SEP + r'(?>\d+)Z'
+AUTO = SEP + r'(?>(?>AUTO|COR)?)'
+WIND = (r'(?>(?:' + SEP_OPT
+        + r'(?P<wind_dir>(?>(?>\d\d\d|VAR|VRB|///)?))'
+        + r'(?P<wind_spd>(?>(?>\d\d(?>\d?)|//)?))'
+        + r'(?>(?:G(?>\d+))?)'
+        + r'(?>KT|MPS)'
+        + r'(?>(?:' + SEP + r'\d\d\dV\d\d\d)?))?)')
+VIS = (r'(?>(?:' + SEP
+       + r'(?>\d\d\d\d(?>(?:NDV)?)|\d(?>(?>\d|(?>(?: \d)?)/\d)?)SM|CAVOK))?)')
+# The runway visual range group is left to the full parser
+NO_RUN = r'(?! +R[LRC]?\d\d)'
+CURWX = r'(?>(?:' + SEP + WX + r')*)'
+SKYC = r'(?>(?:' + SEP + COVER + r')*)'
+TEMP_DEWP = (r'(?>(?:' + SEP + r'(?>(?://)?)(?P<temp>' + TEMP + r')/(?P<dewp>' + TEMP
+             + r')(?>(?://)?))?)')
+ALTIM = r'(?>(?:' + SEP_OPT + r'["Q /A]\d\d\d\d(?>=?))?)'
+
+# Each group of the ob rule with its pattern, in report order
+GROUP_PATTERNS = (('metar', METAR), ('siteid', SITEID), ('datetime', DATETIME), ('auto', AUTO),
+                  ('wind', WIND), ('vis', VIS), ('run', ''), ('curwx', CURWX), ('skyc', SKYC),
+                  ('temp_dewp', TEMP_DEWP), ('altim', ALTIM),
+                  # remarks <- (sep? ("RMK" / "NOSIG"*) .*)? always runs to the
+                  # end of the report, which leaves end empty
+                  ('remarks', r'.*'), ('end', ''))
+
+
+def _prefix_source(last):
+    """Return the pattern source for the groups up to and including last."""
+    out = []
+    for name, source in GROUP_PATTERNS:
+        if name == 'run':
+            out.append(NO_RUN)
+        out.append('(?P<{0}>{1})'.format(name, source))
+        if name == last:
+            break
+    return ''.join(out)
+
+
+METAR_PATTERN = _compile(_prefix_source('end'), re.DOTALL)
+
+# The same pattern over byte values; \\d and the character classes only match
+# ASCII in either, so both accept exactly the same reports
+METAR_BYTES_PATTERN = _bytes_copy(METAR_PATTERN, re.DOTALL)
+
+# Where a report wraps onto a continuation line in a bulletin, as merged by
+# metar_file_parse.merge(). \r breaks lines as \n does, as in text mode
+JOINT = r'[\r\n]+     '
+
+
+def _bulletin_pattern(pattern):
+    """Rewrite pattern so each literal space also matches a JOINT."""
+    out, i, in_class = [], 0, False
+    while i < len(pattern):
+        char = pattern[i]
+        if char == '\\':
+            out.append(pattern[i:i + 2])
+            i += 2
+            continue
+        if in_class:
+            in_class = char != ']'
+        elif char == '[':
+            in_class = True
+        elif char == ' ':
+            char = '(?: |' + JOINT + ')'
+        out.append(char)
+        i += 1
+    return ''.join(out)
+
+
+def _bulletin_copy(pattern, flags=0):
+    """Return a _LazyPattern for the bulletin copy of pattern."""
+    return _LazyPattern(lambda: re.compile(_bulletin_pattern(pattern.pattern), flags))
+
+
+BULLETIN_PATTERN = _bulletin_copy(METAR_PATTERN, re.DOTALL)
+BULLETIN_BYTES_PATTERN = _bytes_copy(BULLETIN_PATTERN, re.DOTALL)
+_joints = re.compile(JOINT)
+
+# Just the start of a report, up to the separator the auto rule requires. The
+# rest of the grammar is optional and remarks runs to the end, so a report
+# parses exactly when this matches
+HEADER = (r'(?:' + METAR + r')(?P<siteid>' + SITEID + r')(?P<datetime>' + DATETIME + r')(?= )')
+HEADER_PATTERN = _LazyPattern(lambda: _compile(HEADER))
+HEADER_BYTES_PATTERN = _bytes_copy(HEADER_PATTERN)
+BULLETIN_HEADER_PATTERN = _bulletin_copy(HEADER_PATTERN)
+BULLETIN_HEADER_BYTES_PATTERN = _bytes_copy(BULLETIN_HEADER_PATTERN)
+
+GROUPS = tuple(name for name, _ in GROUP_PATTERNS)
+
+# Every rule that matches at most once per report, in input order
+SPAN_FIELDS = ('metar', 'siteid', 'datetime', 'auto', 'wind', 'wind_dir', 'wind_spd', 'vis',
+               'run', 'curwx', 'skyc', 'temp_dewp', 'temp', 'dewp', 'altim', 'remarks', 'end')
+SPAN_INDEX = dict((name, i) for i, name in enumerate(SPAN_FIELDS))
+NO_SPAN = (-1, -1)
+
+# The patterns to match a whole report with, as str, bytes, and in a bulletin
+# as str and as bytes
+PATTERNS = (METAR_PATTERN, METAR_BYTES_PATTERN, BULLETIN_PATTERN, BULLETIN_BYTES_PATTERN)
+_selections = {}
+
+
+def _select(fields):
+    """Return fields as a frozenset, with PATTERNS cut short after the last of them."""
+    key = tuple(fields)
+    if key not in _selections:
+        pattern = _compile(_prefix_source(GROUPS[last_group(fields)]), re.DOTALL)
+        bulletin = _bulletin_copy(pattern, re.DOTALL)
+        _selections[key] = frozenset(fields), (pattern, _bytes_copy(pattern, re.DOTALL),
+                                               bulletin, _bytes_copy(bulletin, re.DOTALL))
+    return _selections[key]
+
+
+_match_spans = itemgetter(*[METAR_PATTERN.groupindex[name] for name in SPAN_FIELDS])
+
+
+class SkippedNode(object):
+    """Stand-in for a group that was not asked for, which reads as empty."""
+    text = ''
+    offset = -1
+    span = NO_SPAN
+
+
+SKIPPED = SkippedNode()
+
+
+class FastNode(object):
+    """Stand-in for a TreeNode, built from one named group of a match."""
+    def __init__(self, match, name):
+        self.text = match.group(name) or ''
+        self.offset = match.start(name)
+
+
+class BytesFastNode(FastNode):
+    """FastNode for a match over bytes, with the group decoded to text."""
+    def __init__(self, match, name):
+        text = match.group(name)
+        self.text = text.decode('latin-1') if text else ''
+        self.offset = match.start(name)
+
+
+class FastTree(object):
+    """Stand-in for the TreeNode1 returned by ``metar_decode.parse``.
+
+    Carries the same top-level group attributes, plus ``wind.wind_dir``,
+    ``wind.wind_spd``, ``temp_dewp.temp`` and ``temp_dewp.dewp``. Given
+    fields, only those groups are read from the match; the rest are SKIPPED.
+    """
+    def __init__(self, match, node=FastNode, fields=None):
+        self._match = match
+        self.offset = 0
+        for name in GROUPS:
+            setattr(self, name, node(match, name) if fields is None or name in fields else SKIPPED)
+        if self.wind is not SKIPPED:
+            self.wind.wind_dir = node(match, 'wind_dir')
+            self.wind.wind_spd = node(match, 'wind_spd')
+        if self.temp_dewp is not SKIPPED:
+            self.temp_dewp.temp = node(match, 'temp')
+            self.temp_dewp.dewp = node(match, 'dewp')
+
+    @property
+    def text(self):
+        text = self._match.string
+        return text if isinstance(text, str) else str(text, 'latin-1')
+
+
+class BulletinNode(FastNode):
+    """FastNode for a report matched in a bulletin, with the group's text as
+    merge() would have joined it. Offsets index the bulletin."""
+    def __init__(self, match, name):
+        text = match.group(name) or ''
+        if not isinstance(text, str):
+            text = text.decode('latin-1')
+        self.text = _joints.sub(' ', text) if _wrapped(text) else text
+        self.offset = match.start(name)
+
+
+class BulletinTree(FastTree):
+    """FastTree for a report matched in place in a bulletin."""
+    def __init__(self, match, fields=None):
+        FastTree.__init__(self, match, BulletinNode, fields)
+
+    @property
+    def text(self):
+        return _merged(self._match.string, self._match.pos, self._match.endpos)
+
+
+class SelectedTree(object):
+    """A parse tree from ``metar_decode.parse`` showing only fields.
+
+    Every other group is SKIPPED, as in a FastTree decoded with fields.
+    """
+    def __init__(self, tree, fields):
+        self.text = tree.text
+        self.offset = tree.offset
+        for name in GROUPS:
+            setattr(self, name, getattr(tree, name) if name in fields else SKIPPED)
+
+
+def _wrapped(text):
+    """Whether text runs onto a continuation line."""
+    return '\n' in text or '\r' in text
+
+
+def _merged(buffer, start, end):
+    """The report at buffer[start:end], with its lines joined as by merge()."""
+    text = buffer[start:end]
+    if not isinstance(text, str):
+        text = str(text, 'latin-1')
+    return _joints.sub(' ', text) if _wrapped(text) else text
+
+
+def _match(metar_text, patterns=PATTERNS):
+    """Match metar_text against the pattern of patterns for its type.
+
+    Returns the match, or None, and the node class for building a FastTree.
+    """
+    if isinstance(metar_text, str):
+        return patterns[0].match(metar_text), FastNode
+    return patterns[1].match(metar_text), BytesFastNode
+
+
+class DecodeStats(object):
+    """Count the reports served by the fast path and by the full parser."""
+    def __init__(self):
+        self.fast = 0
+        self.fallback = 0
+
+    @property
+    def total(self):
+        return self.fast + self.fallback
+
+    def fraction(self, path):
+        """Return the fraction of reports served by path ('fast' or 'fallback')."""
+        return getattr(self, path) / self.total if self.total else 0.
+
+    def reset(self):
+        self.fast = 0
+        self.fallback = 0
+
+    def __str__(self):
+        return 'fast: {0} ({1:.1%}) fallback: {2} ({3:.1%})'.format(
+            self.fast, self.fraction('fast'), self.fallback, self.fraction('fallback'))
+
+
+stats = DecodeStats()
+
+
+def decode(metar_text, stats=stats, fields=None):
+    """Decode a METAR into a parse tree, trying the fast path first.
+
+    Parameters
+    ----------
+    metar_text : str, bytes or memoryview
+        A single METAR or SPECI report
+    stats : DecodeStats
+        Counters updated with the path that served the report. Defaults to the
+        module-level ``stats``.
+    fields : sequence of str, optional
+        The groups to decode, out of GROUPS. Matching stops after the last of
+        them, and every other group is SKIPPED. Defaults to all groups.
+
+    Returns
+    -------
+    tree : FastTree, SelectedTree or metar_decode.TreeNode1
+        Either way, the tree exposes the groups ``parse_metar_to_named_tuple``
+        reads, with the same text the Canopy parser would produce.
+
+    Raises
+    ------
+    ParseError
+        If the report cannot be parsed at all
+    """
+    if fields is None:
+        match, node = _match(metar_text)
+        if match is not None:
+            stats.fast += 1
+            return FastTree(match, node)
+        stats.fallback += 1
+        return parse(metar_text, memoize=False)
+
+    fields, patterns = _select(fields)
+    match, node = _match(metar_text, patterns)
+    if match is not None:
+        stats.fast += 1
+        return FastTree(match, node, fields)
+    stats.fallback += 1
+    return SelectedTree(parse(metar_text, memoize=False, fields=fields), fields)
+
+
+def _fallback(parser, metar_text, fields, failures):
+    """Parse a report the fast path declined, without raising on failure."""
+    parser.reset(metar_text)
+    tree = parser.try_parse()
+    if tree.__class__ is ParseFailure:
+        return tree if failures else None
+    return tree if fields is None else SelectedTree(tree, fields)
+
+
+def decode_many(reports, stats=stats, fields=None, failures=False, profile=None):
+    """Decode each of reports in turn, like ``decode``.
+
+    Reports the fast path declines all go through one reusable Parser. Yields
+    the tree for each report, or None for a report that fails to parse; with
+    failures=True, the ``metar_decode.ParseFailure`` saying why instead. A
+    ``metar_decode.RuleProfile`` given as profile counts that Parser's rules.
+    """
+    patterns = PATTERNS
+    if fields is not None:
+        fields, patterns = _select(fields)
+    parser = Parser('', None, None, memoize=False, fields=fields, profile=profile)
+    for metar_text in reports:
+        match, node = _match(metar_text, patterns)
+        if match is not None:
+            stats.fast += 1
+            yield FastTree(match, node, fields)
+            continue
+        stats.fallback += 1
+        yield _fallback(parser, metar_text, fields, failures)
+
+
+def decode_bulletin(buffer, bounds, stats=stats, fields=None, failures=False, profile=None):
+    """Decode the reports at each ``(start, end)`` of bounds in buffer, in place.
+
+    buffer is the text of a whole NOAA PORT file, as str or bytes, and bounds
+    the report boundaries ``metar_file_parse.report_bounds`` finds in it. No
+    report is copied out of buffer: the fast path matches each one where it
+    lies, continuation lines and all, and only the fields it exposes are
+    sliced out, as ``merge()`` would have joined them.
+
+    Reports the fast path declines are merged into a string and parsed as in
+    ``decode_many``; node offsets in those trees index that string rather
+    than buffer. fields selects groups as in ``decode``.
+
+    Yields the tree for each report, or None (or with failures=True, a
+    ParseFailure) for a report that fails to parse.
+    """
+    patterns = PATTERNS
+    if fields is not None:
+        fields, patterns = _select(fields)
+    pattern = patterns[2] if isinstance(buffer, str) else patterns[3]
+    parser = Parser('', None, None, memoize=False, fields=fields, profile=profile)
+    for start, end in bounds:
+        match = pattern.match(buffer, start, end)
+        if match is not None:
+            stats.fast += 1
+            yield BulletinTree(match, fields)
+            continue
+        stats.fallback += 1
+        yield _fallback(parser, _merged(buffer, start, end), fields, failures)
+
+
+def _header_key(match):
+    siteid, datetime = match.group('siteid', 'datetime')
+    return siteid.strip(), datetime.strip()
+
+
+def decode_header(metar_text):
+    """Decode only the station and time of a METAR.
+
+    Returns the ``(siteid, datetime)`` text, stripped and of the same type as
+    metar_text, or None if the report would fail to parse at all.
+    """
+    if isinstance(metar_text, str):
+        match = HEADER_PATTERN.match(metar_text)
+    else:
+        match = HEADER_BYTES_PATTERN.match(metar_text)
+    return None if match is None else _header_key(match)
+
+
+def _latest(items, keys):
+    # Keep the last of items for each key, in their original order
+    last = {}
+    for index, key in enumerate(keys):
+        if key is not None:
+            last[key] = index
+    return [items[index] for index in sorted(last.values())]
+
+
+def latest_reports(reports):
+    """Drop repeated and superseded reports before decoding them.
+
+    Keeps only the last report for each station and time, which is the one
+    ``drop_duplicates(keep='last')`` keeps once every report is decoded, and
+    drops the reports that would fail to parse. Only the header of each
+    report is read.
+    """
+    reports = list(reports)
+    return _latest(reports, map(decode_header, reports))
+
+
+def latest_bulletin_reports(buffer, bounds):
+    """Like ``latest_reports``, for reports at bounds in a bulletin buffer.
+
+    Returns the ``(start, end)`` of the reports to keep, for
+    ``decode_bulletin``.
+    """
+    pattern = BULLETIN_HEADER_PATTERN if isinstance(buffer, str) else BULLETIN_HEADER_BYTES_PATTERN
+    bounds = list(bounds)
+
+    def keys():
+        for start, end in bounds:
+            match = pattern.match(buffer, start, end)
+            yield None if match is None else _header_key(match)
+    return _latest(bounds, keys())
+
+
+def _tree_spans(tree):
+    spans = [NO_SPAN] * len(SPAN_FIELDS)
+    for name in GROUPS:
+        spans[SPAN_INDEX[name]] = getattr(tree, name).span
+    if hasattr(tree.wind, 'wind_dir'):
+        spans[SPAN_INDEX['wind_dir']] = tree.wind.wind_dir.span
+        spans[SPAN_INDEX['wind_spd']] = tree.wind.wind_spd.span
+    if hasattr(tree.temp_dewp, 'temp'):
+        spans[SPAN_INDEX['temp']] = tree.temp_dewp.temp.span
+        spans[SPAN_INDEX['dewp']] = tree.temp_dewp.dewp.span
+    return tuple(spans)
+
+
+def decode_spans(metar_text, stats=stats):
+    """Decode a METAR into the offsets of each grammar rule, without a tree.
+
+    Returns a tuple with one ``(start, end)`` pair per name in SPAN_FIELDS,
+    so a field can be sliced straight out of the report, e.g.
+    ``metar_text[slice(*spans[SPAN_INDEX['wind_dir']])]``. Rules that did not
+    take part in the parse, such as ``temp`` when there is no temperature
+    group, get NO_SPAN, which slices to ''.
+
+    Only reports the fast path declines build a parse tree on the way, and
+    bytes reports the fast path accepts are never decoded at all.
+
+    Raises
+    ------
+    ParseError
+        If the report cannot be parsed at all
+    """
+    match, _ = _match(metar_text)
+    if match is not None:
+        stats.fast += 1
+        return _match_spans(match.regs)
+    stats.fallback += 1
+    return _tree_spans(parse(metar_text, memoize=False))
@@ -0,0 +1,208 @@
+import subprocess
+import sys
+
+from metar_decode import parse
+from metar_fastpath import (decode, decode_many, decode_spans, decode_bulletin, decode_header,
+                            latest_reports, latest_bulletin_reports, DecodeStats, SPAN_INDEX,
+                            NO_SPAN, SKIPPED)
+from metar_file_parse import merge, read_bulletin, read_metars, report_bounds
+
+reports = ["KATL 102052Z 31008KT 10SM FEW013 SCT100 BKN150 BKN250 26/22 A2996 "
+           "RMK AO2 SLP136 VIRGA NW-N TCU DSNT NE 60001 T02610222 58006",
+           "KLAS 102156Z VRB03KT 10SM BKN250 34/M06 A3007 RMK AO2 SLP154 T03441061",
+           "METAR KFOE 131345Z 11008KT 1 1/2SM BR-DZ OVC013 00/M02 A3049",
+           "METAR CYYT 081100Z 00000KT 0SM FG VV000 07/07 A3019 RMK F8 SLP224",
+           "EGLL 121250Z 24012G22KT 9999 FEW030 18/09 Q1015 NOSIG=",
+           "KDEN 121253Z AUTO 35006KT 10SM CLR 12/M03 A3012 RMK AO2",
+           "KXYZ 121253Z 12010KT 10SM -DZ MM/MM A2999"]
+
+groups = ['metar', 'siteid', 'datetime', 'auto', 'wind', 'vis', 'run', 'curwx', 'skyc',
+          'temp_dewp', 'altim', 'remarks', 'end']
+
+def test_fast_path_matches_parser():
+    for metar in reports:
+        stats = DecodeStats()
+        fast, tree = decode(metar, stats), parse(metar)
+        assert stats.fast == 1
+        for group in groups:
+            assert getattr(fast, group).text == getattr(tree, group).text
+            assert getattr(fast, group).offset == getattr(tree, group).offset
+        assert fast.wind.wind_dir.text == tree.wind.wind_dir.text
+        assert fast.wind.wind_spd.text == tree.wind.wind_spd.text
+        if tree.temp_dewp.text:
+            assert fast.temp_dewp.temp.text == tree.temp_dewp.temp.text
+            assert fast.temp_dewp.dewp.text == tree.temp_dewp.dewp.text
+
+def test_runway_visual_range_falls_back():
+    stats = DecodeStats()
+    tree = decode("KJFK 102151Z 12008KT 1/4SM R04R/2800V4000FT BR OVC002 19/19 A2995", stats)
+    assert stats.fallback == 1
+    assert stats.fraction('fallback') == 1.
+    assert tree.run.text == ' R04R/2800V4000FT'
+    assert tree.skyc.text == ' OVC002'
+
+def test_decode_many():
+    stats = DecodeStats()
+    trees = list(decode_many(reports + ["BAD REPORT"], stats))
+    assert trees[-1] is None
+    assert [tree.siteid.text for tree in trees[:-1]] == [decode(metar).siteid.text
+                                                         for metar in reports]
+    assert stats.fast == len(reports)
+    assert stats.fallback == 1
+    failure = list(decode_many(["BAD REPORT"], failures=True))[0]
+    assert not failure and failure.input == "BAD REPORT"
+
+def test_decode_spans():
+    metar = reports[1]
+    spans = decode_spans(metar)
+    assert metar[slice(*spans[SPAN_INDEX['siteid']])] == 'KLAS'
+    assert metar[slice(*spans[SPAN_INDEX['wind_dir']])] == 'VRB'
+    assert metar[slice(*spans[SPAN_INDEX['dewp']])] == 'M06'
+    assert spans[SPAN_INDEX['run']] == (spans[SPAN_INDEX['vis']][1],) * 2
+
+    metar = "KJFK 102151Z 12008KT 1/4SM R04R/2800V4000FT BR OVC002 A2995"
+    spans = decode_spans(metar)
+    assert metar[slice(*spans[SPAN_INDEX['run']])] == ' R04R/2800V4000FT'
+    assert metar[slice(*spans[SPAN_INDEX['curwx']])] == ' BR'
+    assert spans[SPAN_INDEX['temp']] == NO_SPAN
+
+def test_bytes_reports():
+    for metar in reports + ["KJFK 102151Z 12008KT 1/4SM R04R/2800V4000FT BR OVC002 19/19 A2995"]:
+        tree = decode(metar)
+        for report in (metar.encode('ascii'), memoryview(metar.encode('ascii'))):
+            from_bytes = decode(report)
+            for group in groups:
+                assert getattr(from_bytes, group).text == getattr(tree, group).text
+                assert getattr(from_bytes, group).offset == getattr(tree, group).offset
+            assert from_bytes.wind.wind_dir.text == tree.wind.wind_dir.text
+            assert from_bytes.text == metar
+            assert decode_spans(report) == decode_spans(metar)
+
+bulletin = ("\n\x01\n123\nSAUS70 KWBC 121300\nMETAR\n"
+            "KATL 102052Z 31008KT 10SM FEW013 SCT100 BKN150\n"
+            "     BKN250 26/22 A2996 RMK AO2 SLP136\n"
+            "KJFK 102151Z 12008KT 1/4SM R04R/2800V4000FT BR\n\n"
+            "     OVC002 19/19 A2995\n"
+            "KDEN 121253Z AUTO 35006KT 10SM CLR 12/M03 A3012 RMK AO2\n  \n")
+
+def test_decode_bulletin():
+    lines = [line for line in bulletin.rstrip().split('\n') if line]
+    metars = [metar for metar in merge(lines) if len(metar) > 25]
+    for buffer in (bulletin, bulletin.encode('ascii')):
+        bounds = list(report_bounds(buffer))
+        assert len(bounds) == len(metars) == 3
+        stats = DecodeStats()
+        trees = list(decode_bulletin(buffer, bounds, stats))
+        assert stats.fast == 2 and stats.fallback == 1
+        for metar, tree in zip(metars, trees):
+            assert tree.text == metar
+            for group in groups:
+                assert getattr(tree, group).text == getattr(decode(metar), group).text
+        assert trees[0].skyc.text == ' FEW013 SCT100 BKN150 BKN250'
+        assert trees[0].siteid.offset == bulletin.index('KATL')
+        assert trees[1].skyc.text == ' OVC002'
+
+def test_crlf_files():
+    import os
+    import tempfile
+
+    # NOAA PORT ends its lines with \r\r\n; text mode turns every \r into a line break
+    text = bulletin + "KBOS 102054Z\n     11015KT 10SM FEW031 22/15 A3007=\n"
+    for newline in ('\r\n', '\r\r\n'):
+        with tempfile.NamedTemporaryFile('wb', suffix = '.txt', delete = False) as myfile:
+            myfile.write(text.replace('\n', newline).encode('ascii'))
+        try:
+            metars = read_metars(myfile.name)
+            from_bytes = read_metars(myfile.name, binary = True)
+        finally:
+            os.remove(myfile.name)
+        assert len(metars) == 4 and [metar.encode('ascii') for metar in metars] == from_bytes
+        assert [tree.siteid.text for tree in decode_many(from_bytes)] == ['KATL', 'KJFK', 'KDEN',
+                                                                          'KBOS']
+
+def test_crlf_bulletin():
+    import os
+    import tempfile
+
+    text = bulletin + "KBOS 102054Z\n     11015KT 10SM FEW031 22/15 A3007=\n"
+    for newline in ('\r\n', '\r\r\n'):
+        with tempfile.NamedTemporaryFile('wb', suffix = '.txt', delete = False) as myfile:
+            myfile.write(text.replace('\n', newline).encode('ascii'))
+        try:
+            metars = read_metars(myfile.name)
+            stats = DecodeStats()
+            buffer, bounds = read_bulletin(myfile.name, binary = True)
+            trees = list(decode_bulletin(buffer, bounds, stats))
+            buffer, bounds = read_bulletin(myfile.name)
+            assert [tree.text for tree in decode_bulletin(buffer, bounds)] == metars
+        finally:
+            os.remove(myfile.name)
+        # Wrapped reports still match in place; only the runway visual range falls back
+        assert [tree.text for tree in trees] == metars
+        assert stats.fast == 3 and stats.fallback == 1
+        assert trees[0].skyc.text == ' FEW013 SCT100 BKN150 BKN250'
+        assert trees[3].wind.text == '11015KT'
+
+def test_latest_reports():
+    assert decode_header(reports[2]) == ('KFOE', '131345Z')
+    assert decode_header(reports[2].encode('ascii')) == (b'KFOE', b'131345Z')
+    assert decode_header("BAD REPORT") is None
+    corrected = "METAR KFOE 131345Z COR 11008KT 1 1/2SM BR OVC013 00/M02 A3049"
+    kept = latest_reports([reports[2], reports[0], "BAD REPORT", corrected, reports[0]])
+    assert kept == [corrected, reports[0]]
+
+    repeated = bulletin + bulletin.replace("KDEN 121253Z", "KDEN 121353Z")
+    bounds = latest_bulletin_reports(repeated, report_bounds(repeated))
+    trees = list(decode_bulletin(repeated, bounds))
+    assert [tree.siteid.text for tree in trees] == ['KDEN', 'KATL', 'KJFK', 'KDEN']
+    assert trees[0].siteid.offset < len(bulletin)
+    assert trees[1].siteid.offset > len(bulletin)
+
+def test_selected_fields():
+    fields = ['wind', 'temp_dewp']
+    for metar in reports + ["KJFK 102151Z 12008KT 1/4SM R04R/2800V4000FT BR OVC002 19/19 A2995"]:
+        full = decode(metar)
+        for tree in (decode(metar, fields=fields), next(decode_many([metar], fields=fields))):
+            for group in groups:
+                if group in fields:
+                    assert getattr(tree, group).text == getattr(full, group).text
+                else:
+                    assert getattr(tree, group) is SKIPPED
+            assert tree.wind.wind_spd.text == full.wind.wind_spd.text
+            assert tree.temp_dewp.dewp.text == full.temp_dewp.dewp.text
+
+    # Stopping before the runway visual range keeps such reports on the fast path
+    stats = DecodeStats()
+    tree = decode("KJFK 102151Z 12008KT 1/4SM R04R/2800V4000FT BR OVC002 19/19 A2995",
+                  stats, fields=['siteid'])
+    assert tree.siteid.text == 'KJFK' and stats.fast == 1
+
+    trees = list(decode_bulletin(bulletin, report_bounds(bulletin), fields=['skyc']))
+    assert trees[0].skyc.text == ' FEW013 SCT100 BKN150 BKN250'
+    assert trees[0].altim is SKIPPED
+
+    try:
+        decode(reports[0], fields=['wind', 'gust'])
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('unknown field accepted')
+
+def test_imports_without_pandas_or_metpy():
+    code = ('import sys, metar_fastpath, metar_parse; '
+            'print(sorted({"pandas", "metpy"} & set(sys.modules)))')
+    assert subprocess.check_output([sys.executable, '-c', code]).strip() == b'[]'
+
+if __name__ == '__main__':
+    test_fast_path_matches_parser()
+    test_runway_visual_range_falls_back()
+    test_decode_many()
+    test_decode_spans()
+    test_bytes_reports()
+    test_decode_bulletin()
+    test_crlf_files()
+    test_crlf_bulletin()
+    test_latest_reports()
+    test_selected_fields()
+    test_imports_without_pandas_or_metpy()
+    print("Everything Passed")
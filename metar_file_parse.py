@@ -1,51 +1,60 @@
-from datetime import datetime
-def text_file_parse(file, year = datetime.now().year, month = datetime.now().month):
-    """ Takes a text file taken from the NOAA PORT system containing
-    METAR data and creates a dataframe with all the observations
+import re
+from itertools import chain
+
+# A report is a line plus any continuation lines after it, which start with
+# five spaces; blank lines in between are skipped, as they are before merge().
+# \r breaks lines too, as in text mode, so CRLF and \r\r\n files match in place
+REPORT = re.compile(r'[^\r\n]+(?:[\r\n]+     [^\r\n]*)*')
+REPORT_BYTES = re.compile(REPORT.pattern.encode('ascii'))
+
+def merge(x, key='     '):
+    """Join METARs that NOAA PORT wraps onto continuation lines
+
+    Continuation lines start with five spaces (key), which are dropped before
+    the line is joined onto the report above it with a single space. Lines
+    may be bytes, in which case key must be bytes too.
+    """
+    tmp = []
+    for i in x:
+        if (i[0:len(key)] != key) and len(tmp):
+            yield key[:1].join(tmp)
+            tmp = []
+        if i.startswith(key):
+            i = i[5:]
+        tmp.append(i)
+    if len(tmp):
+        yield key[:1].join(tmp)
+
+def read_metars(file, binary=False):
+    """ Reads the METAR reports out of a text file taken from the NOAA PORT system
 
     parameters
     ----------
     file: string
           The path to the file containing the data. It should be extracted
           from NOAA PORT and NOT be in binary format
+    binary: bool
+          Return each report as bytes, without decoding the file. The decoders
+          accept bytes directly.
 
     return
     ---------
-    df : pandas dataframe wtih the station id as the index
+    metars : list of strings (or bytes), one METAR report each
 
     """
-    import pandas as pd
-    import numpy as np
-    from metar_decode import ParseError
-    from metar_parse import parse_metar_to_named_tuple
-    from process_stations import station_dict
-    from datetime import datetime
-    from calculations import altimeter_to_slp
-    from metpy.units import units, pandas_dataframe_to_unit_arrays
-
-    #Function to merge METARs
-    def merge(x, key='     '):
-        tmp = []
-        for i in x:
-            if (i[0:len(key)] != key) and len(tmp):
-                yield ' '.join(tmp)
-                tmp = []
-            if i.startswith(key):
-                i = i[5:]
-            tmp.append(i)
-        if len(tmp):
-            yield ' '.join(tmp)
-
     #Open the file
-    myfile = open(file)
+    myfile = open(file, 'rb' if binary else 'rt')
+    newline, key = (b'\n', b'     ') if binary else ('\n', '     ')
 
-    #Clean up the file and take out the next line (\n)
+    #Clean up the file and take out the next line (\n). Read as bytes, the
+    #\r of CRLF and NOAA PORT's \r\r\n endings is still there, so break the
+    #lines wherever text mode would have
     value = myfile.read().rstrip()
-    list_values = value.split(sep = '\n')
+    list_values = value.splitlines() if binary else value.split(sep = newline)
     list_values = list(filter(None, list_values))
 
     #Call the merge function and assign the result to the list of metars
-    list_values = list(merge(list_values))
+    list_values = list(merge(list_values, key))
 
     #Remove the short lines that do not contain METAR observations or contain
     #METAR observations that lack a robust amount of data
@@ -56,67 +65,128 @@ def text_file_parse(file, year = datetime.now().year, month = datetime.now().mon
     else:
         None
 
+    return metars
+
+def report_bounds(buffer):
+    """ Finds the METAR reports in the text of a NOAA PORT file without copying them
+
+    parameters
+    ----------
+    buffer: string or bytes
+          The whole text of the file
+
+    return
+    ---------
+    bounds : generator of (start, end) offsets into buffer, one per report.
+             A report spans its continuation lines, which is what merge()
+             would have joined into one string, and reports that would be 25
+             characters or shorter once merged are skipped, as in read_metars
+
+    """
+    if isinstance(buffer, str):
+        pattern, newlines, joints = REPORT, ('\n', '\r'), ('\n     ', '\r     ')
+    else:
+        pattern, newlines, joints = REPORT_BYTES, (b'\n', b'\r'), (b'\n     ', b'\r     ')
+
+    #Leave off trailing whitespace, as read_metars strips it from the file
+    end = len(buffer)
+    while end and buffer[end - 1:end].isspace():
+        end -= 1
+
+    for match in pattern.finditer(buffer, 0, end):
+        start, stop = match.span()
+        #Merging turns each newline run and the five spaces after it into one space.
+        #Only the last line break of a run is followed by the spaces
+        length = stop - start
+        for newline, joint in zip(newlines, joints):
+            length -= buffer.count(newline, start, stop) + 4 * buffer.count(joint, start, stop)
+        if length > 25:
+            yield start, stop
+
+def read_bulletin(file, binary=False):
+    """ Reads the text of a NOAA PORT file and finds the METAR reports in it
+
+    parameters
+    ----------
+    file: string
+          The path to the file containing the data. It should be extracted
+          from NOAA PORT and NOT be in binary format
+    binary: bool
+          Read the text as bytes, without decoding it
+
+    return
+    ---------
+    buffer : string (or bytes), the whole text of the file
+    bounds : generator of the (start, end) offsets of each report in buffer,
+             for metar_fastpath.decode_bulletin. It scans buffer as it goes,
+             so the offsets are never all held at once
+
+    """
+    with open(file, 'rb' if binary else 'rt') as myfile:
+        buffer = myfile.read()
+    return buffer, report_bounds(buffer)
+
+def text_file_parse(file, year = None, month = None, reference = None):
+    """ Takes a text file taken from the NOAA PORT system containing
+    METAR data and creates a dataframe with all the observations
+
+    parameters
+    ----------
+    file: string
+          The path to the file containing the data. It should be extracted
+          from NOAA PORT and NOT be in binary format
+    year, month: int
+          The month of every report. Leave both out to place each report in
+          the latest month up to reference instead, as metar_parse.decode_times
+          does
+    reference: datetime
+          When the file was written, in UTC. Defaults to now
+
+    return
+    ---------
+    df : pandas dataframe wtih the station id as the index
+
+    """
+    import pandas as pd
+    import numpy as np
+    from metar_fastpath import decode_bulletin, latest_bulletin_reports
+    from metar_parse import check_month, trees_to_columns
+    from process_stations import station_dict
+    from calculations import sea_level_pressure
+    from metpy.units import pandas_dataframe_to_unit_arrays
+
+    check_month(year, month)
+
+    #Find the METARs in the file, leaving the text as bytes and each report in
+    #place for the decoder
+    buffer, bounds = read_bulletin(file, binary=True)
+
+    #Drop repeated and superseded reports using only their station and time,
+    #before decoding them in full
+    bounds = latest_bulletin_reports(buffer, bounds)
+
     #Create a dictionary with all the station name, locations, and elevations
     master = station_dict()
 
-    #Setup lists to append the data to
-    station_id = []
-    lat = []
-    lon = []
-    elev = []
-    date_time = []
-    wind_dir = []
-    wind_spd = []
-    current_wx1= []
-    current_wx2 = []
-    current_wx3 = []
-    skyc1 = []
-    skylev1 = []
-    skyc2 = []
-    skylev2 = []
-    skyc3 = []
-    skylev3 = []
-    skyc4 = []
-    skylev4 = []
-    cloudcover = []
-    temp = []
-    dewp = []
-    altim = []
-    current_wx1_symbol = []
-    current_wx2_symbol = []
-    current_wx3_symbol = []
-
-    for metar in metars:
-        try:
-            metar = parse_metar_to_named_tuple(metar, master, year = year, month = month)
-            station_id.append(metar.station_id)
-            lat.append(metar.latitude)
-            lon.append(metar.longitude)
-            elev.append(metar.elevation)
-            date_time.append(metar.date_time)
-            wind_dir.append(metar.wind_direction)
-            wind_spd.append(metar.wind_speed)
-            current_wx1.append(metar.current_wx1)
-            current_wx2.append(metar.current_wx2)
-            current_wx3.append(metar.current_wx3)
-            skyc1.append(metar.skyc1)
-            skylev1.append(metar.skylev1)
-            skyc2.append(metar.skyc2)
-            skylev2.append(metar.skylev2)
-            skyc3.append(metar.skyc3)
-            skylev3.append(metar.skylev3)
-            skyc4.append(metar.skyc4)
-            skylev4.append(metar.skylev4)
-            cloudcover.append(metar.cloudcover)
-            temp.append(metar.temperature)
-            dewp.append(metar.dewpoint)
-            altim.append(metar.altimeter)
-            current_wx1_symbol.append(metar.current_wx1_symbol)
-            current_wx2_symbol.append(metar.current_wx2_symbol)
-            current_wx3_symbol.append(metar.current_wx3_symbol)
-
-        except ParseError:
-            None
+    #Decode the reports straight into one array per field, rather than into a
+    #tuple per report, and drop the reports that fail to parse
+    metars = trees_to_columns(decode_bulletin(buffer, bounds), master, year = year, month = month,
+                              reference = reference)
+    keep = ~metars.failed
+    columns = {}
+    for name, column in metars.columns.items():
+        column = column[keep]
+        if name in metars.categories:
+            #Keep the codes as they are, with code -1 for a missing value
+            column = pd.Categorical.from_codes(column, metars.categories[name])
+        columns[name] = column
+    columns['date_time'] = columns['date_time'].astype('datetime64[ns]')
+
+    #Reduce the whole batch to sea level pressure at once, leaving NaN only in
+    #the rows missing an altimeter setting, elevation, or temperature
+    columns['sea_level_pressure'] = sea_level_pressure(columns['altimeter'],
+                                                       columns['elevation'],
+                                                       columns['temperature'])
 
     col_units = {
     'station_id': None,
@@ -146,23 +216,8 @@ def text_file_parse(file, year = datetime.now().year, month = datetime.now().mon
     'current_wx2_symbol': None,
     'current_wx3_symbol': None,}
 
-    df = pd.DataFrame({'station_id':station_id, 'latitude':lat, 'longitude':lon,
-    'elevation':elev, 'date_time':date_time, 'wind_direction':wind_dir,
-    'wind_speed':wind_spd, 'current_wx1':current_wx1, 'current_wx2':current_wx2,
-    'current_wx3':current_wx3, 'skyc1':skyc1, 'skylev1':skylev1, 'skyc2':skyc2,
-    'skylev2':skylev2, 'skyc3':skyc3, 'skylev3': skylev3, 'skyc4':skyc4,
-    'skylev4':skylev4, 'cloudcover':cloudcover, 'temperature':temp, 'dewpoint':dewp,
-    'altimeter':altim, 'current_wx1_symbol':current_wx2_symbol,
-    'current_wx2_symbol':current_wx2_symbol, 'current_wx3_symbol':current_wx3_symbol},
-    index = station_id)
-
-    try:
-        df['sea_level_pressure'] = altimeter_to_slp(
-        altim * units('inHg'),
-        elev * units('meters'),
-        temp * units('degC')).magnitude
-    except:
-        df['sea_level_pressure'] = [np.nan]
+    df = pd.DataFrame(columns, index = columns['station_id'])
+
     #Drop duplicates
     df = df.drop_duplicates(subset = ['date_time','latitude', 'longitude'], keep = 'last')
 
@@ -178,3 +233,146 @@ def text_file_parse(file, year = datetime.now().year, month = datetime.now().mon
     pandas_dataframe_to_unit_arrays(df)
 
     return df
+
+def _report_lines(lines):
+    #Merge the lines into reports as read_metars does, one line at a time. The
+    #last line that is not blank is held back, as read_metars strips the
+    #whitespace off the end of the file
+    def broken(lines):
+        #Break lines at \r too, as text mode does, so the \r of CRLF and NOAA
+        #PORT's \r\r\n endings is not left in the reports
+        for line in lines:
+            line = line.rstrip(newline)
+            if cr in line:
+                yield from line.split(cr)
+            else:
+                yield line
+
+    def trimmed(lines):
+        last, blank = None, []
+        for line in broken(lines):
+            if not line:
+                continue
+            if line.isspace():
+                blank.append(line)
+                continue
+            if last is not None:
+                yield last
+                yield from blank
+            last, blank = line, []
+        if last is not None:
+            yield last.rstrip()
+
+    lines = iter(lines)
+    for first in lines:
+        break
+    else:
+        return
+    if isinstance(first, bytes):
+        newline, cr, key = b'\n', b'\r', b'     '
+    else:
+        newline, cr, key = '\n', '\r', '     '
+    for metar in merge(trimmed(chain((first,), lines)), key):
+        if len(metar) > 25:
+            yield metar
+
+def iter_reports(source, chunk = 4096):
+    """ Reads the METAR reports out of a source one at a time, without holding
+    more than a report, or a chunk of rows, at once
+
+    parameters
+    ----------
+    source: string, file, array, or iterable
+          The path to a NOAA PORT text file, an open file or other iterable of
+          its lines, as str or bytes, or an array of whole reports, one per
+          row, e.g. the report variable of a netCDF file. Rows of single
+          characters are joined into one report each
+    chunk: int
+          How many rows of an array to read at a time
+
+    return
+    ---------
+    metars : generator of strings (or bytes), one METAR report each, as
+             read_metars would give them. A file named by path is read as
+             bytes
+
+    """
+    import os
+
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as myfile:
+            yield from _report_lines(myfile)
+    elif hasattr(source, 'ndim') and hasattr(source, 'dtype'):
+        import numpy as np
+        for start in range(0, source.shape[0], chunk):
+            rows = np.ascontiguousarray(source[start:start + chunk])
+            if rows.ndim == 2:
+                #Character arrays, as netCDF stores strings, padded with nulls
+                rows = rows.view('{0}{1}'.format(rows.dtype.kind, rows.shape[1])).ravel()
+            for metar in rows.tolist():
+                metar = metar.rstrip(b'\x00 ' if isinstance(metar, bytes) else '\x00 ')
+                if len(metar) > 25:
+                    yield metar
+    else:
+        yield from _report_lines(source)
+
+def iter_metars(source, station_dict = None, year = None, month = None, reference = None,
+                batch_size = None, lazy = False):
+    """ Decodes the METAR reports of a source as it reads them, in memory that
+    does not grow with the size of the source
+
+    parameters
+    ----------
+    source: string, file, array, or iterable
+          Where to read the reports from, as in iter_reports
+    station_dict: dictionary
+          Station metadata keyed by station id, as in metar_parse. Defaults
+          to the tables process_stations.station_dict() loads
+    year, month, reference:
+          When the reports were made, as in metar_parse.trees_to_columns
+    batch_size: int
+          Yield a metar_parse.MetarColumns for each batch of this many reports
+          instead of a Metar named tuple per report
+    lazy: bool
+          Yield a metar_parse.LazyMetar per report instead, which decodes
+          each field the first time it is read, so the reports a caller
+          passes over after a look at a field or two are never decoded in
+          full. A field that does not convert raises its error when it is
+          read
+
+    return
+    ---------
+    metars : generator of Metar named tuples, one per report that decodes,
+             or of MetarColumns, whose failed rows mark the reports that did
+             not, or of LazyMetar, one per report that parses
+
+    """
+    from itertools import islice
+    from metar_decode import ParseError
+    from metar_fastpath import decode_many
+    from metar_parse import LazyMetar, check_month, tree_to_named_tuple, trees_to_columns
+
+    #Checked up front, as errors decoding a report only skip it
+    check_month(year, month)
+    reports = iter_reports(source)
+    if lazy:
+        for tree in decode_many(reports):
+            if tree:
+                yield LazyMetar(tree, station_dict, year = year, month = month,
+                                reference = reference)
+    elif batch_size is None:
+        for tree in decode_many(reports):
+            if not tree:
+                continue
+            try:
+                yield tree_to_named_tuple(tree, station_dict, year = year, month = month,
+                                          reference = reference)
+            except (ParseError, ValueError):
+                continue
+    else:
+        while True:
+            batch = list(islice(reports, batch_size))
+            if not batch:
+                return
+            yield trees_to_columns(decode_many(batch), station_dict, year = year, month = month,
+                                   reference = reference)
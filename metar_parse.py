@@ -1,23 +1,108 @@
-# Import the neccessary libraries
-import pandas as pd
+# Import the neccessary libraries. pandas and metpy are only imported by the
+# code that needs them, so decoding a report does not have to load them
 import numpy as np
+import process_stations
 from process_stations import station_dict
-from metpy.plots.wx_symbols import wx_code_map
-from metar_decode import parse
-from metpy.units import units, pandas_dataframe_to_unit_arrays
-from calculations import altimeter_to_slp
+from metar_fastpath import decode, decode_many
+from metar_decode import ParseError
 import warnings
-from collections import namedtuple
-from datetime import datetime
+from array import array
+from collections import Counter, namedtuple
+from datetime import datetime, timezone
 
 warnings.filterwarnings('ignore', 'Pandas doesn\'t allow columns to be created', UserWarning)
-Metar = namedtuple('metar', ['station_id', 'latitude', 'longitude', 'elevation',
+Metar = namedtuple('Metar', ['station_id', 'latitude', 'longitude', 'elevation',
 'date_time', 'wind_direction', 'wind_speed', 'current_wx1',
 'current_wx2', 'current_wx3', 'skyc1', 'skylev1', 'skyc2', 'skylev2', 'skyc3',
 'skylev3', 'skyc4', 'skylev4', 'cloudcover', 'temperature', 'dewpoint', 'altimeter',
 'current_wx1_symbol', 'current_wx2_symbol', 'current_wx3_symbol'])
 
-def parse_metar_to_pandas(metar_text, year = datetime.now().year, month = datetime.now().month):
+# Inches of mercury per hectopascal, the factor pint converts with, so an
+# altimeter setting in hPa decodes to the same inHg without a unit registry.
+# Units are attached per column, by pandas_dataframe_to_unit_arrays
+INHG_PER_HPA = 0.029529983301010098
+
+def _times_in(start, day, hour, minute):
+    #The times of the reports within the month that starts at start, or NaT
+    days = ((start + 1).astype('datetime64[D]') - start.astype('datetime64[D]')).astype(int)
+    valid = (day >= 1) & (day <= days) & (hour >= 0) & (hour < 24) & (minute >= 0) & (minute < 60)
+    date_time = np.full(len(day), 'NaT', dtype = 'datetime64[m]')
+    date_time[valid] = start.astype('datetime64[m]') + (((day - 1) * 24 + hour) * 60 + minute)[valid]
+    return date_time
+
+def month_times(day, hour, minute, year, month):
+    """Takes the day, hour, and minute of many METARs, as integer arrays with -1
+    where they are missing, and puts them together into times within a month
+
+    Output:
+    datetime64[m] array, NaT where a report has no time or its time is not in
+    the month
+    """
+    day, hour, minute = (np.asarray(value, dtype = np.int64) for value in (day, hour, minute))
+    return _times_in(np.datetime64('{0:04d}-{1:02d}'.format(year, month), 'M'), day, hour, minute)
+
+# How far after the reference time decode_times still places a report, for
+# clocks that are off and references that are only rounded, e.g. to the hour
+# of a file
+TIME_TOLERANCE = np.timedelta64(1, 'D')
+
+def reference_minute(reference = None):
+    """Returns reference as a UTC numpy.datetime64 to the minute, or now if it
+    is None. A datetime with a time zone is converted to UTC first, as numpy
+    has no time zones; one without is taken to be in UTC already"""
+    if reference is None:
+        reference = datetime.now(timezone.utc)
+    if isinstance(reference, datetime) and reference.tzinfo is not None:
+        reference = reference.astimezone(timezone.utc).replace(tzinfo = None)
+    return np.datetime64(reference, 'm')
+
+def decode_times(day, hour, minute, reference = None):
+    """Takes the day, hour, and minute of many METARs, as in month_times, and
+    puts them together into the latest times up to a reference time
+
+    Each report is placed in the month before, the month of, or the month
+    after reference, whichever puts it latest but no more than TIME_TOLERANCE
+    after reference, so that reports from either side of the turn of a month
+    or year each get their own month and year.
+
+    Input:
+    reference = datetime or numpy.datetime64, e.g. when the reports were sent.
+        A datetime with a time zone is converted to UTC, and any other time
+        is taken to be in UTC already. Defaults to now, as of the call
+
+    Output:
+    datetime64[m] array, NaT where a report has no time or cannot be placed
+    """
+    reference = reference_minute(reference)
+    day, hour, minute = (np.asarray(value, dtype = np.int64) for value in (day, hour, minute))
+    date_time = np.full(len(day), 'NaT', dtype = 'datetime64[m]')
+    latest = reference + TIME_TOLERANCE
+    for start in reference.astype('datetime64[M]') + np.arange(-1, 2):
+        #Each month is later than the one before, so keep the last that fits
+        times = _times_in(start, day, hour, minute)
+        fits = ~np.isnat(times) & (times <= latest)
+        date_time[fits] = times[fits]
+    return date_time
+
+def check_month(year, month):
+    """Raises ValueError unless year and month are given together, or both
+    left out; one without the other would otherwise be dropped, and the
+    report placed by decode_times instead"""
+    if (year is None) != (month is None):
+        raise ValueError('give both year and month, or neither: '
+                         'year = {0!r}, month = {1!r}'.format(year, month))
+
+def report_time(day, hour, minute, year = None, month = None, reference = None):
+    """Returns the datetime of one METAR: in the month given by year and month
+    if both are, and otherwise as decode_times places it up to reference, or
+    NaN if it cannot be placed"""
+    check_month(year, month)
+    if year is not None:
+        return datetime(year, month, day, hour, minute)
+    date_time = decode_times([day], [hour], [minute], reference)[0]
+    return np.nan if np.isnat(date_time) else date_time.item()
+
+def parse_metar_to_pandas(metar_text, year = None, month = None, fields = None):
     """Takes in a metar file, in a text form, and creates a pandas
     dataframe that can be easily subset
 
@@ -31,21 +116,38 @@ def parse_metar_to_pandas(metar_text, year = datetime.now().year, month = dateti
         wind_direction, wind_speed, wxsymbol1, wxsymbol2, skycover1, skylevel1,
         skycover2, skylevel2, skycover3, skylevel3, skycover4, skylevel4,
         cloudcover, temperature, dewpoint, altimeter_value, sea_level_pressure]
+    year, month = the month of the report. Defaults to the month, and year,
+        that put it latest up to the current time, as decode_times does
+    fields = groups of the report to decode, out of metar_fastpath.GROUPS,
+        e.g. ['wind', 'temp_dewp']. Decoding stops after the last of them and
+        the columns of the other groups are NaN. Defaults to every group.
 
     Output:
     Pandas Dataframe that can be subset easily
     """
-    from datetime import datetime
+    import pandas as pd
+    from metpy.units import pandas_dataframe_to_unit_arrays
+    from calculations import sea_level_pressure
+
+    check_month(year, month)
 
-    #Create a dictionary with all the station metadata
-    station_metadata = station_dict()
+    #Create a dictionary with all the station metadata, unless the station id
+    #was left undecoded
+    if fields is None or 'siteid' in fields:
+        station_metadata = station_dict()
+    else:
+        station_metadata = {}
 
-    # Decode the data using the parser (built using Canopy)
-    tree = parse(metar_text)
+    # Decode the data, falling back to the parser built using Canopy only for
+    # reports the fast path declines
+    tree = decode(metar_text, fields = fields)
 
     #Station ID, Latitude, Longitude, and Elevation
     if tree.siteid.text == '':
         station_id = [np.nan]
+        lat = np.nan
+        lon = np.nan
+        elev = np.nan
     else:
         station_id = [tree.siteid.text.strip()]
         #Extract the latitude and longitude values from "master" dictionary
@@ -60,7 +162,7 @@ def parse_metar_to_pandas(metar_text, year = datetime.now().year, month = dateti
 
     # Set the datetime, day, and time_utc
     if tree.datetime.text == '':
-        datetime = np.nan
+        date_time = np.nan
         day = np.nan
         time_utc = np.nan
     else:
@@ -68,7 +170,7 @@ def parse_metar_to_pandas(metar_text, year = datetime.now().year, month = dateti
         day = int(day_time_utc[0:2])
         hour = int(day_time_utc[2:4])
         minute = int(day_time_utc[4:7])
-        date_time = datetime(year, month, day, hour, minute)
+        date_time = report_time(day, hour, minute, year, month)
 
     # Set the wind variables
     if tree.wind.text == '':
@@ -99,18 +201,9 @@ def parse_metar_to_pandas(metar_text, year = datetime.now().year, month = dateti
         current_wx1 = wx[0]
         current_wx2 = wx[1]
         current_wx3 = wx[2]
-        try:
-            current_wx1_symbol = int(wx_code_map[wx[0]])
-        except:
-            current_wx1_symbol = np.nan
-        try:
-            current_wx2_symbol = int(wx_code_map[wx[1]])
-        except:
-            current_wx2_symbol = np.nan
-        try:
-            current_wx3_symbol = int(wx_code_map[wx[3]])
-        except:
-            current_wx3_symbol = np.nan
+        current_wx1_symbol = weather_symbol(wx[0])
+        current_wx2_symbol = weather_symbol(wx[1])
+        current_wx3_symbol = weather_symbol(wx[2])
 
     # Set the sky conditions
     if tree.skyc.text == '':
@@ -203,7 +296,7 @@ def parse_metar_to_pandas(metar_text, year = datetime.now().year, month = dateti
         if (float(tree.altim.text.strip()[1:5])) > 1100:
             altim = (float(tree.altim.text.strip()[1:5]) / 100)
         else:
-            altim = ((int(tree.altim.text.strip()[1:5])*units.hPa).to('inHg').magnitude)
+            altim = int(tree.altim.text.strip()[1:5]) * INHG_PER_HPA
 
     col_units = {
     'station_id': None,
@@ -242,17 +335,11 @@ def parse_metar_to_pandas(metar_text, year = datetime.now().year, month = dateti
     'skylev1':skylev1, 'skyc2':skyc2, 'skylev2':skylev2, 'skyc3':skyc3,
     'skylev3': skylev3, 'skyc4':skyc4, 'skylev4':skylev4,
     'cloudcover':cloudcover, 'temperature':temp, 'dewpoint':dewp,
-    'altimeter':altim, 'current_wx1_symbol':current_wx2_symbol,
+    'altimeter':altim, 'current_wx1_symbol':current_wx1_symbol,
     'current_wx2_symbol':current_wx2_symbol, 'current_wx3_symbol':current_wx3_symbol},
     index = station_id)
 
-    try:
-        df['sea_level_pressure'] = float(format(altimeter_to_slp(
-        altim * units('inHg'),
-        elev * units('meters'),
-        temp * units('degC')).magnitude, '.1f'))
-    except:
-        df['sea_level_pressure'] = [np.nan]
+    df['sea_level_pressure'] = float(format(sea_level_pressure(altim, elev, temp), '.1f'))
 
     df['altimeter'] = df.altimeter.round(2)
     df['sea_level_pressure'] = df.sea_level_pressure.round(2)
@@ -265,7 +352,8 @@ def parse_metar_to_pandas(metar_text, year = datetime.now().year, month = dateti
 
     return df
 
-def parse_metar_to_named_tuple(metar_text, station_dict, year = datetime.now().year, month = datetime.now().month):
+def parse_metar_to_named_tuple(metar_text, station_dict = None, year = None, month = None,
+                               fields = None, cache = None, reference = None):
     """Takes in a metar file, in a text form, and creates a pandas
     dataframe that can be easily subset
 
@@ -279,43 +367,114 @@ def parse_metar_to_named_tuple(metar_text, station_dict, year = datetime.now().y
         wind_direction, wind_speed, wxsymbol1, wxsymbol2, skycover1, skylevel1,
         skycover2, skylevel2, skycover3, skylevel3, skycover4, skylevel4,
         cloudcover, temperature, dewpoint, altimeter_value, sea_level_pressure]
+    year, month = the month of the report, as in parse_metar_to_pandas
+    fields = groups of the report to decode, as in parse_metar_to_pandas; the
+        values of the other groups are NaN
+    cache = metar_decode.ParseCache to look the report up in first, so that
+        repeated text skips decoding and the station lookup. Keep one cache
+        per station_dict. Without year and month, an entry only serves the
+        reference minute it was made for, as decode_times places a report up
+        to that minute
+    reference = time the report was sent, for decode_times when there is no
+        month, as in tree_to_named_tuple. Defaults to now
 
     Output:
     Pandas Dataframe that can be subset easily
     """
-    from datetime import datetime
-    station_metadata = station_dict
+    check_month(year, month)
+    if cache is not None:
+        # Decode up to the same minute the entry is keyed on, which a month
+        # makes no difference to
+        reference = reference_minute(reference) if year is None else None
+        key = cache.key(metar_text, year, month, reference,
+                        None if fields is None else tuple(fields))
+        metar = cache.get(key)
+        if metar is None:
+            try:
+                metar = parse_metar_to_named_tuple(metar_text, station_dict, year = year,
+                                                   month = month, fields = fields,
+                                                   reference = reference)
+            except ParseError as error:
+                # Keep only the message; raising one stored error on every hit
+                # would chain each hit's frames onto its traceback
+                metar = str(error)
+            cache.put(key, metar)
+        if isinstance(metar, str):
+            raise ParseError(metar)
+        return metar
 
-    # Decode the data using the parser (built using Canopy)
-    tree = parse(metar_text)
+    # Decode the data, falling back to the parser built using Canopy only for
+    # reports the fast path declines
+    tree = decode(metar_text, fields = fields)
 
-    #Station ID, Latitude, Longitude, and Elevation
+    return tree_to_named_tuple(tree, station_dict, year = year, month = month,
+                               reference = reference)
+
+def tree_to_named_tuple(tree, station_dict = None, year = None, month = None, reference = None):
+    """Takes in an already decoded METAR, e.g. from metar_fastpath.decode_bulletin,
+    and creates the Metar named tuple that parse_metar_to_named_tuple returns
+
+    Input:
+    tree = parse tree of a single METAR
+    station_dict = dictionary of station metadata, keyed by station id. Defaults
+        to the tables process_stations.station_dict() loads once per process
+    year, month = the month of the report, as in parse_metar_to_pandas
+    reference = time the report was sent, for decode_times when there is no
+        month. Defaults to now
+
+    Output:
+    Metar named tuple
+    """
+    check_month(year, month)
+    if station_dict is None:
+        station_dict = process_stations.station_dict()
+
+    station_id, = _station_id(tree)
+    lat, lon, elev = _location(tree, station_dict)
+    date_time, = _date_time(tree, year, month, reference)
+    wind_dir, wind_spd = _wind(tree)
+    (current_wx1, current_wx2, current_wx3, current_wx1_symbol, current_wx2_symbol,
+     current_wx3_symbol) = _current_wx(tree)
+    skyc1, skylev1, skyc2, skylev2, skyc3, skylev3, skyc4, skylev4, cloudcover = _sky(tree)
+    temp, dewp = _temp_dewp(tree)
+    altim, = _altimeter(tree)
+
+    return Metar(station_id, lat, lon, elev, date_time, wind_dir, wind_spd,
+    current_wx1, current_wx2, current_wx3, skyc1, skylev1, skyc2, skylev2, skyc3, skylev3,
+    skyc4, skylev4, cloudcover, temp, dewp, altim, current_wx1_symbol, current_wx2_symbol,
+    current_wx3_symbol)
+
+# Each group of Metar fields is decoded out of the tree by one of the functions
+# below, for tree_to_named_tuple and, one group at a time, for LazyMetar
+
+def _station_id(tree):
+    #Station ID
     if tree.siteid.text == '':
-        station_id = np.nan
-    else:
-        station_id = tree.siteid.text.strip()
-        #Extract the latitude and longitude values from "master" dictionary
-        try:
-            lat = station_metadata[station_id].latitude
-            lon = station_metadata[station_id].longitude
-            elev = station_metadata[station_id].altitude
-        except:
-            lat = np.nan
-            lon = np.nan
-            elev = np.nan
+        return np.nan,
+    return tree.siteid.text.strip(),
 
-    # Set the datetime, day, and time_utc
+def _location(tree, station_dict):
+    #Latitude, Longitude, and Elevation, from the station metadata
+    if tree.siteid.text == '':
+        return np.nan, np.nan, np.nan
+    station_id = tree.siteid.text.strip()
+    try:
+        return (station_dict[station_id].latitude, station_dict[station_id].longitude,
+                station_dict[station_id].altitude)
+    except:
+        return np.nan, np.nan, np.nan
+
+def _date_time(tree, year, month, reference):
+    # Set the datetime
     if tree.datetime.text == '':
-        datetime = np.nan
-        day = np.nan
-        time_utc = np.nan
-    else:
-        day_time_utc = tree.datetime.text[:-1].strip()
-        day = int(day_time_utc[0:2])
-        hour = int(day_time_utc[2:4])
-        minute = int(day_time_utc[4:7])
-        date_time = datetime(year, month, day, hour, minute)
+        return np.nan,
+    day_time_utc = tree.datetime.text[:-1].strip()
+    day = int(day_time_utc[0:2])
+    hour = int(day_time_utc[2:4])
+    minute = int(day_time_utc[4:7])
+    return report_time(day, hour, minute, year, month, reference),
 
+def _wind(tree):
     # Set the wind variables
     if tree.wind.text == '':
         wind_dir = np.nan
@@ -331,34 +490,18 @@ def parse_metar_to_named_tuple(metar_text, station_dict, year = datetime.now().y
         else:
             wind_dir = int(tree.wind.wind_dir.text)
             wind_spd = int(tree.wind.wind_spd.text)
+    return wind_dir, wind_spd
 
-    # Set the weather symbols
+def _current_wx(tree):
+    # Set the weather and its symbols
     if tree.curwx.text == '':
-        current_wx1 = np.nan
-        current_wx2 = np.nan
-        current_wx3 = np.nan
-        current_wx1_symbol = np.nan
-        current_wx2_symbol = np.nan
-        current_wx3_symbol = np.nan
-    else:
-        wx = [np.nan, np.nan, np.nan]
-        wx[0:len((tree.curwx.text.strip()).split())] = tree.curwx.text.strip().split()
-        current_wx1 = wx[0]
-        current_wx2 = wx[1]
-        current_wx3 = wx[2]
-        try:
-            current_wx1_symbol = int(wx_code_map[wx[0]])
-        except:
-            current_wx1_symbol = np.nan
-        try:
-            current_wx2_symbol = int(wx_code_map[wx[1]])
-        except:
-            current_wx2_symbol = np.nan
-        try:
-            current_wx3_symbol = int(wx_code_map[wx[2]])
-        except:
-            current_wx3_symbol = np.nan
+        return (np.nan,) * 6
+    wx = [np.nan, np.nan, np.nan]
+    wx[0:len((tree.curwx.text.strip()).split())] = tree.curwx.text.strip().split()
+    return (wx[0], wx[1], wx[2], weather_symbol(wx[0]), weather_symbol(wx[1]),
+            weather_symbol(wx[2]))
 
+def _sky(tree):
     # Set the sky conditions
     if tree.skyc.text == '':
         skyc1 = np.nan
@@ -422,7 +565,9 @@ def parse_metar_to_named_tuple(metar_text, station_dict, year = datetime.now().y
         cloudcover = 2
     else:
         cloudcover = np.nan
+    return skyc1, skylev1, skyc2, skylev2, skyc3, skylev3, skyc4, skylev4, cloudcover
 
+def _temp_dewp(tree):
     # Set the temperature and dewpoint
     if (tree.temp_dewp.text == '') or (tree.temp_dewp.text == ' MM/MM'):
         temp = np.nan
@@ -442,7 +587,9 @@ def parse_metar_to_named_tuple(metar_text, station_dict, year = datetime.now().y
                 dewp = float(tree.temp_dewp.dewp.text[-2:])
         except:
             dewp = np.nan
+    return temp, dewp
 
+def _altimeter(tree):
     # Set the altimeter value and sea level pressure
     if tree.altim.text == '':
         altim = np.nan
@@ -450,9 +597,451 @@ def parse_metar_to_named_tuple(metar_text, station_dict, year = datetime.now().y
         if (float(tree.altim.text.strip()[1:5])) > 1100:
             altim = (float(tree.altim.text.strip()[1:5]) / 100)
         else:
-            altim = ((int(tree.altim.text.strip()[1:5])*units.hPa).to('inHg').magnitude)
+            altim = int(tree.altim.text.strip()[1:5]) * INHG_PER_HPA
+    return altim,
 
-    return Metar(station_id, lat, lon, elev, date_time, wind_dir, wind_spd,
-    current_wx1, current_wx2, current_wx3, skyc1, skylev1, skyc2, skylev2, skyc3, skylev3,
-    skyc4, skylev4, cloudcover, temp, dewp, altim, current_wx1_symbol, current_wx2_symbol,
-    current_wx3_symbol)
+class LazyMetar(object):
+    """A METAR with the fields of Metar, each decoded out of the parse tree the
+    first time it is read
+
+    The fields are decoded a group at a time, as tree_to_named_tuple decodes
+    them, and kept: reading station_id and date_time, say, leaves the wind,
+    sky, weather, temperature, and altimeter alone, and a field that does
+    not convert raises its error when it is read rather than when the record
+    is made. The station metadata is only looked up for the location.
+
+    Input:
+    tree = parse tree of a single METAR
+    station_dict, year, month, reference = as in tree_to_named_tuple
+    """
+    _fields = Metar._fields
+
+    def __init__(self, tree, station_dict = None, year = None, month = None, reference = None):
+        check_month(year, month)
+        self._tree = tree
+        self._station_dict = station_dict
+        self._year = year
+        self._month = month
+        self._reference = reference
+
+    def _station_id(self):
+        return _station_id(self._tree)
+
+    def _location(self):
+        if self._station_dict is None:
+            self._station_dict = process_stations.station_dict()
+        return _location(self._tree, self._station_dict)
+
+    def _date_time(self):
+        return _date_time(self._tree, self._year, self._month, self._reference)
+
+    def _wind(self):
+        return _wind(self._tree)
+
+    def _current_wx(self):
+        return _current_wx(self._tree)
+
+    def _sky(self):
+        return _sky(self._tree)
+
+    def _temp_dewp(self):
+        return _temp_dewp(self._tree)
+
+    def _altimeter(self):
+        return _altimeter(self._tree)
+
+    def __getattr__(self, name):
+        # Only called for a field not read yet, which is decoded with the rest
+        # of its group and set on the record, so it is not called for it again
+        try:
+            fields, decode_group = _LAZY_GROUPS[name]
+        except KeyError:
+            raise AttributeError(name)
+        values = getattr(self, decode_group)()
+        self.__dict__.update(zip(fields, values))
+        return self.__dict__[name]
+
+    def __iter__(self):
+        return (getattr(self, name) for name in self._fields)
+
+    def __repr__(self):
+        return 'LazyMetar({0!r})'.format(self._tree.text)
+
+    def to_named_tuple(self):
+        """Decode every field that is left and return the Metar named tuple."""
+        return Metar(*self)
+
+# The fields of each group of LazyMetar, and the method that decodes them
+_LAZY_GROUPS = {}
+for fields, decode_group in ((('station_id',), '_station_id'),
+                             (('latitude', 'longitude', 'elevation'), '_location'),
+                             (('date_time',), '_date_time'),
+                             (('wind_direction', 'wind_speed'), '_wind'),
+                             (('current_wx1', 'current_wx2', 'current_wx3', 'current_wx1_symbol',
+                               'current_wx2_symbol', 'current_wx3_symbol'), '_current_wx'),
+                             (('skyc1', 'skylev1', 'skyc2', 'skylev2', 'skyc3', 'skylev3',
+                               'skyc4', 'skylev4', 'cloudcover'), '_sky'),
+                             (('temperature', 'dewpoint'), '_temp_dewp'),
+                             (('altimeter',), '_altimeter')):
+    _LAZY_GROUPS.update((name, (fields, decode_group)) for name in fields)
+assert sorted(_LAZY_GROUPS) == sorted(Metar._fields)
+
+# The columns of parse_metars_to_columns, which keeps the order of Metar.
+# Station id, sky cover, and weather are dictionary encoded: each row holds a
+# code, indexing the categories of its column, or -1 where the value is
+# missing, as pandas.Categorical.from_codes takes them
+SKY_COLUMNS = ('skyc1', 'skyc2', 'skyc3', 'skyc4')
+WX_COLUMNS = ('current_wx1', 'current_wx2', 'current_wx3')
+SYMBOL_COLUMNS = ('current_wx1_symbol', 'current_wx2_symbol', 'current_wx3_symbol')
+CATEGORICAL_COLUMNS = ('station_id',) + SKY_COLUMNS + WX_COLUMNS
+FLOAT_COLUMNS = tuple(name for name in Metar._fields
+                      if name not in ('date_time',) + CATEGORICAL_COLUMNS)
+MetarColumns = namedtuple('MetarColumns', ['columns', 'categories', 'failed'])
+
+# The sky covers that come with a level, which start the categories of every
+# sky cover column, so a cover has the same code in every batch
+SKY_COVERS = ('FEW', 'SCT', 'BKN', 'OVC', 'VV')
+
+# The weather strings of metpy's wx_code_map with their symbol codes, built on
+# first use, and how many times each weather string outside them was looked up
+_weather = {}
+unknown_weather = Counter()
+
+def weather_symbols():
+    """Return a dictionary of the symbol code of each weather string in metpy's
+    wx_code_map, built and checked the first time it is needed. These weather
+    strings start the categories of every weather column, in this order, so
+    that, like the sky covers, each has the same code in every batch.
+    """
+    if not _weather:
+        from metpy.plots.wx_symbols import wx_code_map
+        symbols = {}
+        for wx, code in wx_code_map.items():
+            if not wx:
+                continue
+            if int(code) != code or not 0 <= code <= np.iinfo(np.int16).max:
+                raise ValueError('Bad symbol code {0!r} for weather {1!r}'.format(code, wx))
+            symbols[wx] = int(code)
+        _weather.update(symbols)
+    return _weather
+
+def weather_categories():
+    """Return the weather strings of weather_symbols(), in order."""
+    return tuple(weather_symbols())
+
+def weather_symbol(wx, unknown = unknown_weather):
+    """Return the symbol code of one weather string, or NaN for a missing or
+    unknown one, counting the unknown ones in unknown."""
+    symbol = (_weather or weather_symbols()).get(wx)
+    if symbol is None:
+        if isinstance(wx, str):
+            unknown[wx] += 1
+        return np.nan
+    return symbol
+
+def weather_to_symbols(codes, categories, unknown = unknown_weather):
+    """Return the symbol codes of a whole column of weather, given as codes into
+    categories with -1 where it is missing, as floats with NaN for missing or
+    unknown weather. The unknown weather strings are counted in unknown, once
+    for every row they are in."""
+    symbols = weather_symbols()
+    table = np.array([symbols.get(wx, np.nan) for wx in categories] + [np.nan])
+    counts = np.bincount(codes[codes >= 0], minlength = len(categories))
+    for code in np.flatnonzero(np.isnan(table[:-1]) & (counts > 0)):
+        unknown[categories[code]] += int(counts[code])
+    # Code -1 picks the NaN at the end
+    return table[codes]
+
+def _fixed_codes(found, table):
+    """Return the categories of table followed by the values found outside it,
+    and an array that maps the codes given to found, in order, to codes into
+    those categories. Its last entry keeps code -1 for a missing value."""
+    codes = dict((value, code) for code, value in enumerate(table))
+    for value in found:
+        codes.setdefault(value, len(codes))
+    categories = np.array(sorted(codes, key = codes.get), dtype = object)
+    return categories, np.array([codes[value] for value in found] + [-1], dtype = np.int16)
+
+def parse_metars_to_columns(reports, station_dict = None, year = None, month = None,
+                            fields = None, reference = None):
+    """Takes in many metars, in a text form, and decodes them into one array
+    per field rather than one named tuple per report
+
+    Input:
+    reports = iterable of strings (or bytes) with one METAR each
+    station_dict = dictionary of station metadata, keyed by station id
+    year, month, reference = when the reports were made, as in trees_to_columns
+    fields = groups of the reports to decode, as in parse_metar_to_pandas
+
+    Output:
+    MetarColumns, as from trees_to_columns
+    """
+    return trees_to_columns(decode_many(reports, fields = fields), station_dict,
+                            year = year, month = month, reference = reference)
+
+def trees_to_columns(trees, station_dict = None, year = None, month = None, reference = None):
+    """Takes in already decoded METARs, e.g. from metar_fastpath.decode_bulletin,
+    and builds typed columns of the values parse_metar_to_named_tuple would give
+
+    Input:
+    trees = iterable of parse trees, with None for a report that failed to parse
+    station_dict = dictionary of station metadata, keyed by station id, as in
+        tree_to_named_tuple
+    year, month = the month of every report. Give both to put the times within
+        that month, or neither to have decode_times place each report up to
+        reference instead
+    reference = time the reports were sent, for decode_times. Defaults to now
+
+    Output:
+    MetarColumns with
+        columns = dictionary of one numpy array per Metar field, a row per tree:
+            date_time as datetime64[m], station_id as int32 codes, the
+            SKY_COLUMNS and WX_COLUMNS as int16 codes, and FLOAT_COLUMNS as
+            float64
+        categories = dictionary of the values the codes of each of the
+            CATEGORICAL_COLUMNS index. The sky covers start with SKY_COVERS and
+            the weather with weather_categories(), whatever the batch holds,
+            and the station ids are in the order they first appear
+        failed = boolean array, True for the rows of trees that failed to parse
+
+    Every value is filled in as parse_metar_to_named_tuple does, except that
+    a value that does not convert is NaN rather than an error, the vertical
+    visibility level is a float in feet like the other levels, and a time
+    that cannot be placed is NaT.
+    """
+    check_month(year, month)
+    values = tuple(name for name in FLOAT_COLUMNS if name not in SYMBOL_COLUMNS)
+    floats = dict((name, array('d')) for name in values)
+    if station_dict is None:
+        station_dict = process_stations.station_dict()
+    codes = dict((name, array('h')) for name in SKY_COLUMNS + WX_COLUMNS)
+    sky_codes, wx_codes = {}, {}
+    station_codes = {}
+    station_id = array('i')
+    times = array('h')
+    failed = array('b')
+    nan = np.nan
+
+    (latitude, longitude, elevation, wind_direction, wind_speed, skylev1, skylev2, skylev3,
+     skylev4, cloudcover, temperature, dewpoint, altimeter) = [floats[name].append for name in values]
+    skylevs = (skylev1, skylev2, skylev3, skylev4)
+    skycs = [codes[name].append for name in SKY_COLUMNS]
+    wxs = [codes[name].append for name in WX_COLUMNS]
+
+    for tree in trees:
+        if not tree:
+            failed.append(1)
+            station_id.append(-1)
+            for column in floats.values():
+                column.append(nan)
+            for column in codes.values():
+                column.append(-1)
+            times.extend((-1, -1, -1))
+            continue
+        failed.append(0)
+
+        #Station ID, Latitude, Longitude, and Elevation
+        siteid = tree.siteid.text.strip()
+        station = station_dict.get(siteid) if siteid else None
+        station_id.append(station_codes.setdefault(siteid, len(station_codes)) if siteid else -1)
+        try:
+            latitude(station.latitude)
+            longitude(station.longitude)
+            elevation(station.altitude)
+        except AttributeError:
+            latitude(nan)
+            longitude(nan)
+            elevation(nan)
+
+        # The day, hour and minute, put together into date_time below
+        day_time_utc = tree.datetime.text[:-1].strip()
+        try:
+            times.extend((int(day_time_utc[0:2]), int(day_time_utc[2:4]), int(day_time_utc[4:7])))
+        except ValueError:
+            times.extend((-1, -1, -1))
+
+        # Set the wind variables
+        wind = tree.wind.text
+        direction = speed = nan
+        if wind != '' and '/' not in wind and wind != 'KT':
+            try:
+                speed = float(tree.wind.wind_spd.text)
+                if tree.wind.wind_dir.text not in ('VRB', 'VAR', '///'):
+                    direction = float(tree.wind.wind_dir.text)
+            except ValueError:
+                direction = speed = nan
+        wind_direction(direction)
+        wind_speed(speed)
+
+        # Set the weather, leaving the symbols to be looked up by category
+        wx = tree.curwx.text.split()
+        for i, append in enumerate(wxs):
+            append(wx_codes.setdefault(wx[i], len(wx_codes)) if i < len(wx) else -1)
+
+        # Set the sky conditions
+        skyc = tree.skyc.text
+        layers = skyc.split() if skyc[1:3] != 'VV' else [skyc.strip()]
+        for i in range(4):
+            cover = level = None
+            if i < len(layers):
+                layer = layers[i]
+                cover = layer[0:2] if skyc[1:3] == 'VV' else layer[0:3]
+                try:
+                    level = float(layer[len(cover):]) * 100
+                except ValueError:
+                    # As in parse_metar_to_named_tuple, a layer without a level
+                    # is missing altogether, apart from vertical visibility
+                    if cover != 'VV':
+                        cover = None
+            skycs[i](-1 if cover is None else sky_codes.setdefault(cover, len(sky_codes)))
+            skylevs[i](nan if level is None else level)
+
+        if 'OVC' in skyc:
+            cloudcover(8)
+        elif 'BKN' in skyc:
+            cloudcover(6)
+        elif 'SCT' in skyc:
+            cloudcover(4)
+        elif 'FEW' in skyc or 'SKC' in skyc or 'NCD' in skyc or 'NSC' in skyc or 'CLR' in skyc:
+            cloudcover(2)
+        else:
+            cloudcover(nan)
+
+        # Set the temperature and dewpoint
+        if tree.temp_dewp.text in ('', ' MM/MM'):
+            temperature(nan)
+            dewpoint(nan)
+        else:
+            for append, node in ((temperature, tree.temp_dewp.temp), (dewpoint, tree.temp_dewp.dewp)):
+                try:
+                    value = float(node.text[-2:])
+                except ValueError:
+                    value = nan
+                append(-value if 'M' in node.text else value)
+
+        # Set the altimeter value, in inches of mercury
+        try:
+            value = float(tree.altim.text.strip()[1:5])
+        except ValueError:
+            value = nan
+        altimeter(value / 100 if value > 1100 else value * INHG_PER_HPA)
+
+    columns = dict((name, np.frombuffer(floats[name], dtype = np.float64)) for name in values)
+    columns.update((name, np.frombuffer(codes[name], dtype = np.int16)) for name in codes)
+    columns['station_id'] = np.frombuffer(station_id, dtype = np.int32)
+    failed = np.frombuffer(failed, dtype = np.int8).astype(bool)
+
+    #Put the times together in one pass, leaving NaT where there is none
+    day, hour, minute = np.frombuffer(times, dtype = np.int16).reshape(-1, 3).T
+    if year is not None:
+        columns['date_time'] = month_times(day, hour, minute, year, month)
+    else:
+        columns['date_time'] = decode_times(day, hour, minute, reference)
+
+    # Move the codes, given in the order the values turned up, onto the fixed
+    # code tables; code -1 picks the -1 at the end of each map
+    wx_categories, wx_map = _fixed_codes(sorted(wx_codes, key = wx_codes.get),
+                                         weather_categories())
+    sky_categories, sky_map = _fixed_codes(sorted(sky_codes, key = sky_codes.get), SKY_COVERS)
+    for name in SKY_COLUMNS:
+        columns[name] = sky_map[columns[name]]
+    for name in WX_COLUMNS:
+        columns[name] = wx_map[columns[name]]
+
+    # Look up the symbols of each weather column in one pass
+    for name, symbol in zip(WX_COLUMNS, SYMBOL_COLUMNS):
+        columns[symbol] = weather_to_symbols(columns[name], wx_categories)
+
+    categories = dict([('station_id', np.array(sorted(station_codes, key = station_codes.get),
+                                               dtype = object))] +
+                      [(name, sky_categories) for name in SKY_COLUMNS] +
+                      [(name, wx_categories) for name in WX_COLUMNS])
+    return MetarColumns(dict((name, columns[name]) for name in Metar._fields), categories, failed)
+
+# One record per METAR, with a field per Metar field, for handing a batch to
+# another process in one block of memory. Sky cover codes index the sky
+# categories with NO_COVER where there is none, weather codes are as in the
+# columns, and elevation is in whole meters with NO_ELEVATION where it is
+# missing
+NO_COVER = np.iinfo(np.uint8).max
+NO_ELEVATION = np.iinfo(np.int16).min
+
+def _record_type(name):
+    if name == 'station_id':
+        return 'S5'
+    if name == 'elevation':
+        return 'i2'
+    if name == 'date_time':
+        return 'M8[m]'
+    if name in SKY_COLUMNS:
+        return 'u1'
+    if name in WX_COLUMNS:
+        return 'i2'
+    return 'f4'
+
+METAR_DTYPE = np.dtype([(name, _record_type(name)) for name in Metar._fields])
+SharedMetars = namedtuple('SharedMetars', ['name', 'length', 'categories'])
+
+def columns_to_records(metars):
+    """Takes in MetarColumns, e.g. from parse_metars_to_columns, and packs the
+    reports that parsed into one structured array
+
+    Output:
+    numpy array of METAR_DTYPE, a record per report that parsed, with the
+    station id as bytes, the sky cover and weather as codes into the
+    categories of metars, and the other values narrowed to float32
+    """
+    keep = ~metars.failed
+    records = np.zeros(np.count_nonzero(keep), dtype = METAR_DTYPE)
+    for name in Metar._fields:
+        column = metars.columns[name][keep]
+        if name == 'station_id':
+            # Code -1 picks the empty id at the end
+            column = np.append(metars.categories[name], '')[column].astype('S5')
+        elif name == 'elevation':
+            column = np.where(np.isnan(column), NO_ELEVATION, np.round(column))
+        elif name in SKY_COLUMNS:
+            if len(metars.categories[name]) >= NO_COVER:
+                raise ValueError('Too many sky covers for a record: {0}'.format(
+                    len(metars.categories[name])))
+            column = np.where(column < 0, NO_COVER, column)
+        records[name] = column
+    return records
+
+def share_metars(metars):
+    """Takes in MetarColumns and places their records, as columns_to_records
+    makes them, in a new block of multiprocessing.shared_memory, e.g. in a
+    worker process
+
+    Output:
+    SharedMetars with the name of the block, the number of records, and the
+    categories of the sky cover and weather codes. It pickles small, and
+    attach_metars gives the records back, e.g. in the parent process, which
+    then owns the block
+    """
+    from multiprocessing import resource_tracker, shared_memory
+
+    records = columns_to_records(metars)
+    block = shared_memory.SharedMemory(create = True, size = max(records.nbytes, 1))
+    np.ndarray(records.shape, dtype = METAR_DTYPE, buffer = block.buf)[:] = records
+    # Hand the block over, so it outlives this process until attach_metars's
+    # caller unlinks it
+    resource_tracker.unregister(block._name, 'shared_memory')
+    block.close()
+    categories = dict((name, metars.categories[name]) for name in SKY_COLUMNS + WX_COLUMNS)
+    return SharedMetars(block.name, len(records), categories)
+
+def attach_metars(shared):
+    """Takes in SharedMetars from share_metars and maps their records, without
+    copying them
+
+    Output:
+    numpy array of METAR_DTYPE backed by the block, and the SharedMemory of
+    the block. Copy what is needed out of the records, then close and unlink
+    the block, to free it
+    """
+    from multiprocessing import shared_memory
+
+    block = shared_memory.SharedMemory(shared.name)
+    records = np.ndarray((shared.length,), dtype = METAR_DTYPE, buffer = block.buf)
+    return records, block
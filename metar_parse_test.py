@@ -0,0 +1,379 @@
+import subprocess
+import sys
+
+import numpy as np
+
+from collections import Counter
+
+from metar_parse import (parse_metar_to_pandas, parse_metar_to_named_tuple,
+                         parse_metars_to_columns, Metar, SKY_COLUMNS, WX_COLUMNS, SKY_COVERS,
+                         INHG_PER_HPA, weather_categories, weather_symbols, weather_to_symbols,
+                         unknown_weather, decode_times, month_times, METAR_DTYPE, NO_COVER,
+                         NO_ELEVATION, columns_to_records, share_metars, attach_metars,
+                         LazyMetar, tree_to_named_tuple)
+import process_stations
+from metar_file_parse import iter_reports, iter_metars, read_metars
+from metar_fastpath import decode
+from process_stations import Station
+
+reports = ["KATL 102052Z 31008KT 10SM -RA BR FEW013 SCT100 BKN150 BKN250 26/22 A2996",
+           "BAD REPORT",
+           "EGLL 121250Z VRB03KT 9999 FEW030 18/M09 Q1015 NOSIG=",
+           "METAR CYYT 081100Z 00000KT 0SM FG VV002 07/07 A3019 RMK F8 SLP224"]
+
+stations = {'KATL': Station('KATL', None, 'Atlanta', 'GA', 'US', -84.43, 33.64, 308.)}
+
+def value(columns, name, row):
+    column = columns.columns[name]
+    if name in columns.categories:
+        return columns.categories[name][column[row]] if column[row] >= 0 else np.nan
+    return column[row]
+
+def test_columns_match_named_tuples():
+    columns = parse_metars_to_columns(reports, stations, 2019, 6)
+    assert list(columns.columns) == list(Metar._fields)
+    assert list(columns.failed) == [False, True, False, False]
+    for row in (0, 2):
+        metar = parse_metar_to_named_tuple(reports[row], stations, 2019, 6)
+        for name in Metar._fields:
+            expected, got = getattr(metar, name), value(columns, name, row)
+            if name == 'date_time':
+                assert got == np.datetime64(expected, 'm')
+            elif isinstance(expected, float) and np.isnan(expected):
+                assert got is np.nan or np.isnan(got)
+            else:
+                assert expected == got, name
+
+def test_column_types():
+    columns = parse_metars_to_columns(reports, stations, 2019, 6)
+    assert columns.columns['temperature'].dtype == np.float64
+    assert columns.columns['date_time'].dtype == np.dtype('datetime64[m]')
+    assert np.isnat(columns.columns['date_time'][1])
+    assert columns.columns['station_id'].dtype == np.int32
+    for name in SKY_COLUMNS + WX_COLUMNS:
+        assert columns.columns[name].dtype == np.int16
+    assert columns.categories['skyc1'] is columns.categories['skyc4']
+    assert list(columns.categories['station_id']) == ['KATL', 'EGLL', 'CYYT']
+    assert value(columns, 'station_id', 1) is np.nan
+    assert value(columns, 'current_wx2', 0) == 'BR'
+    assert value(columns, 'dewpoint', 2) == -9.
+    assert round(value(columns, 'altimeter', 2), 2) == 29.97
+
+    # Vertical visibility is in feet, like the other levels
+    assert value(columns, 'skyc1', 3) == 'VV'
+    assert value(columns, 'skylev1', 3) == 200.
+
+    # A day outside the month is NaT rather than an error
+    columns = parse_metars_to_columns(["KATL 312052Z 31008KT 10SM 26/22 A2996"], stations, 2019, 6)
+    assert np.isnat(columns.columns['date_time'][0]) and not columns.failed[0]
+
+def test_fixed_categories():
+    import pandas as pd
+    from subset import station_subset
+
+    # A cover or kind of weather has the same code whichever batch it is in
+    first = parse_metars_to_columns(reports[:1], stations, 2019, 6)
+    second = parse_metars_to_columns(reports[::-1], stations, 2019, 6)
+    assert tuple(first.categories['skyc1'][:len(SKY_COVERS)]) == SKY_COVERS
+    assert tuple(second.categories['current_wx1']) == weather_categories()
+    assert first.columns['current_wx2'][0] == second.columns['current_wx2'][3]
+    assert first.columns['skyc1'][0] == second.columns['skyc1'][3]
+    assert first.columns['skyc1'][0] != second.columns['skyc1'][0]
+
+    # Weather or covers outside the tables come after them
+    odd = parse_metars_to_columns(["KATL 102052Z 31008KT 10SM BR-DZ FEW013 26/22 A2996"],
+                                  stations, 2019, 6)
+    assert odd.categories['current_wx1'][-1] == 'BR-DZ'
+    assert odd.columns['current_wx1'][0] == len(weather_categories())
+
+    frame = pd.DataFrame(dict((name, pd.Categorical.from_codes(column, second.categories[name])
+                                if name in second.categories else column)
+                              for name, column in second.columns.items()))
+    frame.index = frame.station_id
+    subset, _ = station_subset(frame, 'ga', pd.Timestamp(2019, 6, 10), pd.Timestamp(2019, 6, 11))
+    assert list(subset.station_id) == ['KATL']
+
+def test_weather_symbols():
+    from metpy.plots.wx_symbols import wx_code_map
+    symbols = weather_symbols()
+    assert symbols is weather_symbols()
+    assert all(symbols[wx] == wx_code_map[wx] for wx in symbols)
+
+    stormy = "KATL 102052Z 31008KT 10SM -RA BR-DZ FG FEW013 26/22 A2996"
+    counted = unknown_weather['BR-DZ']
+    metar = parse_metar_to_named_tuple(stormy, stations, 2019, 6)
+    assert (metar.current_wx1_symbol, metar.current_wx3_symbol) == (symbols['-RA'], symbols['FG'])
+    assert np.isnan(metar.current_wx2_symbol)
+    assert unknown_weather['BR-DZ'] == counted + 1
+
+    # The third weather group has a symbol in the frame as well
+    df = parse_metar_to_pandas(stormy, 2019, 6, fields = ['curwx'])
+    assert df.current_wx1_symbol.iloc[0] == symbols['-RA']
+    assert df.current_wx3_symbol.iloc[0] == symbols['FG']
+
+    # A whole column at once, counting every row of unknown weather
+    categories = np.array(weather_categories() + ('BR-DZ',), dtype = object)
+    codes = np.array([len(categories) - 1, -1, 0, len(categories) - 1], dtype = np.int16)
+    unknown = Counter()
+    column = weather_to_symbols(codes, categories, unknown)
+    assert np.isnan(column[[0, 1, 3]]).all() and column[2] == symbols[categories[0]]
+    assert unknown == Counter({'BR-DZ': 2})
+
+def test_decode_times():
+    from datetime import datetime, timezone
+    day, hour, minute = [30, 1, 31, -1], [23, 0, 12, -1], [50, 10, 0, -1]
+    times = decode_times(day, hour, minute, datetime(2019, 7, 1, 0, 20))
+    assert times.dtype == np.dtype('datetime64[m]')
+    assert list(times[:2]) == [np.datetime64('2019-06-30T23:50'), np.datetime64('2019-07-01T00:10')]
+    # There is no June 31, and July 31 has not happened yet
+    assert np.isnat(times[2]) and np.isnat(times[3])
+
+    # Either side of the turn of the year
+    times = decode_times([31, 1], [23, 0], [55, 3], np.datetime64('2020-01-01T00:05'))
+    assert list(times) == [np.datetime64('2019-12-31T23:55'), np.datetime64('2020-01-01T00:03')]
+    times = decode_times([31, 1], [23, 0], [55, 3], np.datetime64('2019-12-31T23:58'))
+    assert list(times) == [np.datetime64('2019-12-31T23:55'), np.datetime64('2020-01-01T00:03')]
+
+    # A reference with a time zone is taken in UTC, as numpy has no time zones
+    import warnings
+    from datetime import timedelta
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        times = decode_times([30, 1], [23, 0], [50, 10],
+                             datetime(2019, 7, 1, 2, 20, tzinfo = timezone(timedelta(hours = 2))))
+    assert list(times) == [np.datetime64('2019-06-30T23:50'), np.datetime64('2019-07-01T00:10')]
+
+    # A month and year given place every report in that month
+    times = month_times([30, 1, 31], [23, 0, 12], [50, 10, 0], 2019, 6)
+    assert times[1] == np.datetime64('2019-06-01T00:10') and np.isnat(times[2])
+
+    columns = parse_metars_to_columns(reports, stations, reference = datetime(2019, 7, 1, 0, 20))
+    assert columns.columns['date_time'][0] == np.datetime64('2019-06-10T20:52')
+    assert columns.columns['date_time'][3] == np.datetime64('2019-06-08T11:00')
+
+    # Without a month, the current time is the reference, whenever the call is
+    now = np.datetime64(datetime.now(timezone.utc).replace(tzinfo = None), 'm')
+    date_time = np.datetime64(parse_metar_to_named_tuple(reports[0], stations).date_time, 'm')
+    assert now - np.timedelta64(62, 'D') < date_time <= now + np.timedelta64(1, 'D')
+
+def test_year_without_month():
+    tree = decode(reports[0])
+    calls = [lambda: parse_metar_to_named_tuple(reports[0], stations, year = 2019),
+             lambda: parse_metars_to_columns(reports, stations, month = 6),
+             lambda: tree_to_named_tuple(tree, stations, year = 2019),
+             lambda: LazyMetar(tree, stations, month = 6),
+             lambda: next(iter_metars(reports, stations, year = 2019)),
+             lambda: parse_metar_to_pandas(reports[0], month = 6)]
+    for call in calls:
+        try:
+            call()
+        except ValueError as error:
+            assert 'year and month' in str(error)
+        else:
+            raise AssertionError('year or month dropped')
+
+def share_in_worker(reports):
+    return share_metars(parse_metars_to_columns(reports, stations, 2019, 6))
+
+def test_shared_records():
+    from multiprocessing import Pool
+
+    assert METAR_DTYPE.names == Metar._fields
+    columns = parse_metars_to_columns(reports, stations, 2019, 6)
+    records = columns_to_records(columns)
+    assert len(records) == 3 and records.dtype == METAR_DTYPE
+    assert list(records['station_id']) == [b'KATL', b'EGLL', b'CYYT']
+    assert records['elevation'][0] == 308 and records['elevation'][1] == NO_ELEVATION
+    assert records['skyc2'][2] == NO_COVER
+    assert columns.categories['skyc1'][records['skyc1'][2]] == 'VV'
+    assert records['date_time'][2] == np.datetime64('2019-06-08T11:00')
+
+    # A worker hands its records over in shared memory rather than pickled
+    with Pool(1) as pool:
+        shared = pool.apply(share_in_worker, (reports,))
+    assert shared.length == 3
+    assert list(shared.categories['current_wx1']) == list(columns.categories['current_wx1'])
+    attached, block = attach_metars(shared)
+    try:
+        for name in Metar._fields:
+            assert np.array_equal(attached[name], records[name], equal_nan = name != 'station_id')
+    finally:
+        del attached
+        block.close()
+        block.unlink()
+
+def test_iter_metars():
+    import io
+    import os
+    import tempfile
+
+    # A header, a report wrapped onto a continuation line, and blank lines
+    text = ("SAUS70 KWBC 121300\n\n" + reports[0].replace(" SCT100", "\n     SCT100") + "\n" +
+            "\n".join(reports[1:]) + "\n   \n")
+    expected = [reports[0], reports[2], reports[3]]
+    with tempfile.NamedTemporaryFile('w', suffix = '.txt', delete = False) as myfile:
+        myfile.write(text)
+    try:
+        assert list(iter_reports(myfile.name)) == [metar.encode('ascii') for metar in expected]
+        metars = list(iter_metars(myfile.name, stations, 2019, 6))
+    finally:
+        os.remove(myfile.name)
+    assert metars == [parse_metar_to_named_tuple(metar, stations, 2019, 6) for metar in expected]
+
+    assert list(iter_reports(io.StringIO(text))) == expected
+    assert list(iter_reports(text.split('\n'))) == expected
+
+    # Rows of an array, whole or as characters padded with nulls, as netCDF has them
+    rows = np.array(expected, dtype = 'S80')
+    assert list(iter_reports(rows, chunk = 2)) == list(rows)
+    assert list(iter_reports(rows.view('S1').reshape(3, 80))) == list(rows)
+
+    # CRLF and NOAA PORT's \r\r\n endings break lines as text mode does
+    for newline in ('\r\n', '\r\r\n'):
+        with tempfile.NamedTemporaryFile('wb', suffix = '.txt', delete = False) as myfile:
+            myfile.write(text.replace('\n', newline).encode('ascii'))
+        try:
+            assert list(iter_reports(myfile.name)) == read_metars(myfile.name, binary = True)
+            assert list(iter_reports(myfile.name)) == [metar.encode('ascii') for metar in expected]
+            assert list(iter_metars(myfile.name, stations, 2019, 6)) == metars
+        finally:
+            os.remove(myfile.name)
+        lines = io.StringIO(text.replace('\n', newline), newline = '')
+        assert list(iter_reports(lines)) == expected
+
+    batches = list(iter_metars(text.split('\n'), stations, 2019, 6, batch_size = 2))
+    assert [len(batch.failed) for batch in batches] == [2, 1]
+    assert value(batches[1], 'station_id', 0) == 'CYYT'
+
+def test_lazy_metar():
+    for metar in (reports[0], reports[2], reports[3]):
+        lazy = LazyMetar(decode(metar), stations, 2019, 6)
+        assert lazy.to_named_tuple() == parse_metar_to_named_tuple(metar, stations, 2019, 6)
+
+    # Reading a field decodes its group and nothing else
+    lazy = LazyMetar(decode(reports[0]), stations, 2019, 6)
+    assert lazy.skyc2 == 'SCT' and lazy.skylev2 == 10000
+    assert set(lazy.__dict__) & set(Metar._fields) == set(Metar._fields[10:19])
+    try:
+        lazy.visibility
+    except AttributeError:
+        pass
+    else:
+        assert False
+
+    # The station tables are only loaded for the location
+    loads = []
+    station_dict = process_stations.station_dict
+    process_stations.station_dict = lambda: loads.append(1) or stations
+    try:
+        metar = next(iter_metars(reports[:1], year=2019, month=6, lazy=True))
+        assert metar.station_id == 'KATL' and metar.altimeter == 29.96 and not loads
+        assert metar.elevation == 308. and len(loads) == 1
+    finally:
+        process_stations.station_dict = station_dict
+
+def test_named_tuple_cache():
+    import traceback
+    from metar_decode import ParseCache, ParseError
+
+    cache = ParseCache()
+    metar = parse_metar_to_named_tuple(reports[0], stations, 2019, 6, cache=cache)
+    assert parse_metar_to_named_tuple(reports[0], stations, 2019, 6, cache=cache) is metar
+
+    # Every hit raises a fresh error, with only its own frames
+    errors = []
+    for attempt in range(5):
+        try:
+            parse_metar_to_named_tuple('XX', stations, 2019, 6, cache=cache)
+        except ParseError as error:
+            errors.append(error)
+        else:
+            raise AssertionError('bad report parsed')
+    assert (cache.hits, cache.misses) == (5, 2)
+    assert len(set(map(id, errors))) == 5 and len(set(map(str, errors))) == 1
+    assert len(set(len(traceback.extract_tb(error.__traceback__)) for error in errors[1:])) == 1
+
+    # Without a month, a report for tomorrow at 12Z is last month's until the
+    # reference is within TIME_TOLERANCE of it, later the same day
+    from datetime import datetime
+    metar = "KATL 011200Z 31008KT 10SM FEW013 26/22 A2996"
+    for reference, date_time in ((datetime(2019, 6, 30, 0, 1), datetime(2019, 6, 1, 12)),
+                                 (datetime(2019, 6, 30, 23, 0), datetime(2019, 7, 1, 12))):
+        fresh = parse_metar_to_named_tuple(metar, stations, reference = reference)
+        cached = parse_metar_to_named_tuple(metar, stations, cache = cache, reference = reference)
+        assert cached == fresh and cached.date_time == date_time
+
+def test_altimeter_without_units():
+    from metpy.units import units
+    for hpa in (950, 1015, 1040):
+        assert hpa * INHG_PER_HPA == (hpa * units.hPa).to('inHg').magnitude
+
+    # Decoding a QNH setting leaves pint and metpy unloaded
+    code = ('import sys, metar_parse; '
+            'metar = metar_parse.parse_metar_to_named_tuple({0!r}, {{}}, 2019, 6); '
+            'print(round(metar.altimeter, 2), sorted({{"pint", "metpy"}} & set(sys.modules)))')
+    output = subprocess.check_output([sys.executable, '-c', code.format(reports[2])])
+    assert output.strip() == b'29.97 []'
+
+def test_sea_level_pressure():
+    from metpy.units import units
+    from calculations import altimeter_to_slp, sea_level_pressure
+
+    altim = np.array([29.96, 30.12, np.nan, 29.80, 30.01])
+    elev = np.array([308., 2.5, 10., np.nan, 1609.])
+    temp = np.array([26., -12., 5., 18., np.nan])
+    slp = sea_level_pressure(altim, elev, temp)
+
+    # One missing input makes only its own row NaN
+    assert list(np.isnan(slp)) == [False, False, True, True, True]
+    expected = altimeter_to_slp(altim[:2] * units('inHg'), elev[:2] * units('meters'),
+                                temp[:2] * units('degC')).magnitude
+    assert np.allclose(slp[:2], expected)
+
+    columns = parse_metars_to_columns(reports, stations, 2019, 6).columns
+    slp = sea_level_pressure(columns['altimeter'], columns['elevation'], columns['temperature'])
+    assert round(slp[0], 1) == 1013.4 and np.isnan(slp[1:]).all()
+
+def test_station_cache():
+    loads = []
+
+    class Lookup(object):
+        def __init__(self):
+            loads.append(1)
+            self.sources = [('first', dict(stations)), ('second', {'EGLL': stations['KATL']})]
+
+    lookup = process_stations.StationLookup
+    process_stations.StationLookup = Lookup
+    try:
+        process_stations.clear_station_cache()
+        master = process_stations.station_dict()
+        assert set(master) == {'KATL', 'EGLL'}
+        assert process_stations.station_dict() is master and len(loads) == 1
+
+        # Decoding without a station dictionary shares the cached one
+        metar = parse_metar_to_named_tuple(reports[0], year=2019, month=6)
+        assert metar.latitude == 33.64
+        columns = parse_metars_to_columns(reports, year=2019, month=6)
+        assert columns.columns['longitude'][0] == -84.43 and len(loads) == 1
+
+        process_stations.clear_station_cache()
+        assert process_stations.station_dict() is not master and len(loads) == 2
+    finally:
+        process_stations.StationLookup = lookup
+        process_stations.clear_station_cache()
+
+if __name__ == '__main__':
+    test_columns_match_named_tuples()
+    test_column_types()
+    test_fixed_categories()
+    test_weather_symbols()
+    test_decode_times()
+    test_year_without_month()
+    test_shared_records()
+    test_iter_metars()
+    test_lazy_metar()
+    test_named_tuple_cache()
+    test_altimeter_without_units()
+    test_sea_level_pressure()
+    test_station_cache()
+    print("Everything Passed")
@@ -1,5 +1,6 @@
 import csv
 import logging
+import threading
 from collections import defaultdict, namedtuple
 
 log = logging.getLogger("stations")
@@ -162,11 +163,38 @@ class StationLookup:
                          for s, v in self.sites.items())
 
 
+# The merged station tables, loaded by the first call to station_dict() and
+# shared by every caller in the process until clear_station_cache()
+_stations = None
+_stations_lock = threading.Lock()
+
+
 def station_dict():
-    master = StationLookup().sources[0][1]
-    for station in StationLookup().sources:
-        master = {**master, **station[1]}
-    return master
+    """Return a dictionary of Station by station id, merged from every source
+    of StationLookup, with later sources taking precedence.
+
+    The tables are read once per process and the same dictionary is returned
+    from then on, so treat it as read-only. Call clear_station_cache() to read
+    the files again, e.g. after they are updated.
+    """
+    global _stations
+    stations = _stations
+    if stations is None:
+        with _stations_lock:
+            if _stations is None:
+                master = {}
+                for name, table in StationLookup().sources:
+                    master.update(table)
+                _stations = master
+            stations = _stations
+    return stations
+
+
+def clear_station_cache():
+    """Drop the tables station_dict() loaded, so the next call reads them again."""
+    global _stations
+    with _stations_lock:
+        _stations = None
 
 
 if __name__ == '__main__':
@@ -56,7 +56,7 @@ unparsed_metars = []
 start = datetime.now()
 for report in reports:
     try:
-        ob = parse_metar(report.decode('utf-8'), master, create_df = False)
+        ob = parse_metar(report, master, create_df = False)
         station_id.append(ob[0])
         lat.append(ob[1])
         lon.append(ob[2])
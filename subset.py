@@ -475,7 +475,7 @@ def station_subset(df, region, start_time, end_time):
              & (df['latitude'] > lats_lons[2]) & (df['latitude'] < lats_lons[3])]
 
     #Reindex based on each station (only once since there can be multiple obs at each station)
-    station_id = list(df1.groupby("station_id").mean().index)
+    station_id = sorted(df1['station_id'].dropna().unique())
 
     #Create list to append all the dataframes to
     dataframes = []